@@ -1,12 +1,24 @@
+import multiprocessing
 import os
 from dotenv import load_dotenv
 from flask import Flask
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-# from flask_migrate import Migrate
+from app.utils.read_replica import RoutingSession
 
-db = SQLAlchemy()
-# migrate = Migrate()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+def runs_startup_work(app):
+    """Whether this process should migrate the schema and start the background job workers.
+
+    Not in a helper process that builds an app of its own; by name, since parent_process() is still
+    None while a spawned child imports the main module. And not in the reloader's watcher process
+    (debug mode): it loads the app too, but only restarts the serving child, which werkzeug marks
+    with WERKZEUG_RUN_MAIN=true.
+    """
+    if multiprocessing.current_process().name != 'MainProcess':
+        return False
+    return not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
 
 def create_app():
     load_dotenv()
@@ -28,17 +40,39 @@ def create_app():
     from app.models.candidate_skill import CandidateSkill
     from app.models.required_skill import RequiredSkill
     from app.models.assessment_registration import AssessmentRegistration
+    from app.models.background_job import BackgroundJob
+    from app.models.mcq_pool import PoolMCQ
+    from app.models.resume_json import ResumeJSON
+    from app.models.candidate_ranking import CandidateRanking
+    from app.models.job_match import JobMatch
+
+    # Bring the schema up to date (app/migrations) unless that is left to `flask migrations upgrade`.
+    # Only where runs_startup_work says so: helper processes and the reloader's watcher must not
+    # take the lock or run DDL
+    from app.migrations import migrations_cli, upgrade
+    app.cli.add_command(migrations_cli)
+    if app.config['SCHEMA_AUTO_MIGRATE'] and runs_startup_work(app):
+        with app.app_context():
+            upgrade(db.engine)
     
     # Import and register blueprints
     from app.routes.candidate import candidate_api_bp
     from app.routes.assessment import assessment_api_bp
     from app.routes.recruiter import recruiter_api_bp
     from app.routes.auth import auth_bp
+    from app.routes.jobs import jobs_api_bp
+    from app.routes.metrics import metrics_api_bp
     
     app.register_blueprint(candidate_api_bp)
     app.register_blueprint(assessment_api_bp)
     app.register_blueprint(recruiter_api_bp)
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(jobs_api_bp)
+    app.register_blueprint(metrics_api_bp)
+
+    # Start background workers (question generation) and pick up jobs left over from a restart
+    from app.services.job_queue import job_queue
+    job_queue.init_app(app)
     
     return app
 
@@ -1,14 +1,15 @@
 import os
 from urllib.parse import quote
+from app.utils.db_pool import TimedQueuePool
 
 
 class Config:
     @staticmethod
-    def get_db_uri():
+    def get_db_uri(host=None, port=None):
         db_user = os.getenv("DB_USER")
         db_password = os.getenv("DB_PASSWORD")
-        db_host = os.getenv("DB_HOST", "localhost")
-        db_port = os.getenv("DB_PORT", 5432)
+        db_host = host or os.getenv("DB_HOST", "localhost")
+        db_port = port or os.getenv("DB_PORT", 5432)
         db_name = os.getenv("DB_NAME")
 
         # Debugging step: ensure values are loaded
@@ -22,3 +23,35 @@ class Config:
 
     SQLALCHEMY_DATABASE_URI = get_db_uri.__func__()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool of each engine (primary and replica), per worker process. Pre-ping replaces
+    # connections the server dropped; statement_timeout (0 = none) stops runaway queries server-side
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "poolclass": TimedQueuePool,  # records checkout waits, see GET /api/metrics/db-pool
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", 30)),  # seconds to wait for a free connection
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),  # seconds before a connection is replaced
+        "pool_pre_ping": bool(int(os.getenv("DB_POOL_PRE_PING", 1))),
+        "connect_args": {"options": f"-c statement_timeout={int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 60000))}"},
+    }
+
+    # Optional read replica (same credentials and database name) for the heavy read endpoints,
+    # see app.utils.read_replica; unset, everything uses the primary. Binds do not inherit
+    # SQLALCHEMY_ENGINE_OPTIONS, hence the copy
+    SQLALCHEMY_BINDS = {
+        "replica": dict(SQLALCHEMY_ENGINE_OPTIONS,
+                        url=get_db_uri.__func__(os.getenv("DB_REPLICA_HOST"), os.getenv("DB_REPLICA_PORT")))
+    } if os.getenv("DB_REPLICA_HOST") else {}
+
+    # Apply pending schema migrations (app/migrations) when the app starts, in the serving process
+    # only (see app.runs_startup_work); 0 leaves it to `flask --app run migrations upgrade`
+    SCHEMA_AUTO_MIGRATE = int(os.getenv("SCHEMA_AUTO_MIGRATE", 1))
+
+    # Where live assessment sessions are kept: 'memory' (single worker only) or 'database' (assessment_states table)
+    ASSESSMENT_SESSION_STORE = os.getenv("ASSESSMENT_SESSION_STORE", "memory")
+
+    # Background job queue: worker threads per process (0 disables them) and how long a
+    # 'running' job may go without reporting progress before it is considered abandoned
+    JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", 2))
+    JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 600))
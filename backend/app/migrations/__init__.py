@@ -0,0 +1,171 @@
+"""Versioned schema changes on top of the KnowledgeBase.sql dump.
+
+Each module in app/migrations/versions is one version, named v<NNNN>_<description>.py, with an
+upgrade(connection) function and, where it can be reverted, downgrade(connection). Each runs in a
+transaction of its own, unless the module sets TRANSACTIONAL = False (e.g. for CREATE INDEX
+CONCURRENTLY): then it gets an autocommit connection, so it should be safe to re-run after a
+partial failure. Applied versions are recorded in the schema_migrations table. create_app applies pending versions at startup, in the
+serving process only (app.runs_startup_work; SCHEMA_AUTO_MIGRATE=0 turns that off); from backend/, `flask --app run migrations status`,
+`... upgrade` and `... downgrade <version>` do it by hand.
+"""
+import importlib
+import pkgutil
+from contextlib import contextmanager
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, delete, insert, select, text
+from app import db
+
+# Kept out of db.metadata: the bookkeeping table belongs to the migrations, not to the models
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('name', String(255), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+# Postgres advisory lock held while migrating, so workers starting together apply each version once
+MIGRATION_LOCK_KEY = 720240
+
+
+def available_migrations():
+    """[(version, name, module)] for every module in app.migrations.versions, oldest first."""
+    from app.migrations import versions
+    found = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        prefix, _, name = module_info.name.partition('_')
+        module = importlib.import_module(f'{versions.__name__}.{module_info.name}')
+        found.append((int(prefix.lstrip('v')), name, module))
+    return sorted(found, key=lambda migration: migration[0])
+
+
+def applied_versions(connection):
+    schema_migrations.create(connection, checkfirst=True)
+    return {version for (version,) in connection.execute(select(schema_migrations.c.version))}
+
+
+def upgrade(engine, target=None):
+    """Apply every pending version up to target (all by default), each in its own transaction
+    (or on an autocommit connection, see the module docstring).
+
+    Returns the [(version, name)] applied.
+    """
+    applied = []
+    with _migration_connection(engine) as connection:
+        done = applied_versions(connection)
+        connection.commit()
+        for version, name, module in available_migrations():
+            if version in done or (target is not None and version > target):
+                continue
+            try:
+                with _version_connection(engine, connection, module) as version_connection:
+                    module.upgrade(version_connection)
+                connection.execute(insert(schema_migrations).values(
+                    version=version, name=name, applied_at=datetime.utcnow()
+                ))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            applied.append((version, name))
+    return applied
+
+
+def downgrade(engine, target):
+    """Revert applied versions newer than target, newest first. Returns the [(version, name)] reverted.
+
+    Raises RuntimeError for a version that cannot be reverted (no downgrade function).
+    """
+    reverted = []
+    with _migration_connection(engine) as connection:
+        done = applied_versions(connection)
+        connection.commit()
+        to_revert = [(version, name, module) for version, name, module in reversed(available_migrations())
+                     if version in done and version > target]
+        for version, name, module in to_revert:
+            if not hasattr(module, 'downgrade'):
+                raise RuntimeError(f"Migration {version} ({name}) cannot be reverted")
+        for version, name, module in to_revert:
+            try:
+                with _version_connection(engine, connection, module) as version_connection:
+                    module.downgrade(version_connection)
+                connection.execute(delete(schema_migrations).where(schema_migrations.c.version == version))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            reverted.append((version, name))
+    return reverted
+
+
+def migration_status(engine):
+    """[(version, name, applied)] for every available version."""
+    with engine.connect() as connection:
+        done = applied_versions(connection)
+        connection.commit()
+    return [(version, name, version in done) for version, name, _ in available_migrations()]
+
+
+@contextmanager
+def _version_connection(engine, connection, module):
+    # Index builds may take longer than the statement_timeout requests run under (Config.SQLALCHEMY_ENGINE_OPTIONS)
+    postgres = connection.dialect.name == 'postgresql'
+    if getattr(module, 'TRANSACTIONAL', True):
+        if postgres:
+            connection.execute(text("SET LOCAL statement_timeout = 0"))
+        yield connection
+        return
+    # Outside any transaction, on a connection of its own; the advisory lock stays with `connection`,
+    # which has committed, so a concurrent index build is not left waiting on it
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as autocommit:
+        if postgres:
+            autocommit.execute(text("SET statement_timeout = 0"))
+        try:
+            yield autocommit
+        finally:
+            if postgres:
+                autocommit.execute(text("RESET statement_timeout"))
+
+
+@contextmanager
+def _migration_connection(engine):
+    with engine.connect() as connection:
+        locked = connection.dialect.name == 'postgresql'
+        if locked:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+        try:
+            yield connection
+        finally:
+            if locked:
+                connection.rollback()
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
+
+
+migrations_cli = AppGroup('migrations', help='Show and apply schema migrations.')
+
+
+@migrations_cli.command('status')
+def status_command():
+    for version, name, applied in migration_status(db.engine):
+        click.echo(f"{version:04d} {name:<40} {'applied' if applied else 'pending'}")
+
+
+@migrations_cli.command('upgrade')
+@click.argument('target', type=int, required=False)
+def upgrade_command(target):
+    applied = upgrade(db.engine, target)
+    for version, name in applied:
+        click.echo(f"applied {version:04d} {name}")
+    if not applied:
+        click.echo("nothing to apply")
+
+
+@migrations_cli.command('downgrade')
+@click.argument('target', type=int)
+def downgrade_command(target):
+    for version, name in downgrade(db.engine, target):
+        click.echo(f"reverted {version:04d} {name}")
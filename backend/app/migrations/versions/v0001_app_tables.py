@@ -0,0 +1,96 @@
+"""Baseline: tables, columns and indexes the app added to the dumped schema before versioned migrations.
+
+These were created ad hoc by create_app (assessment_registrations and assessment_states, which the
+code uses but the dump lacks, are included). Every statement is idempotent, so databases that already
+have them are simply recorded as being at this version. Not reversible.
+"""
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+# The tables as they were at this version, not as the models define them today: later versions
+# change them (0002 indexes assessment_registrations.job_id), and this one must keep building the same schema
+metadata = MetaData()
+
+# Tables of the dump that the ones below reference; only their keys, and never created here
+for table_name, key in (('candidates', 'candidate_id'), ('job_descriptions', 'job_id'),
+                        ('assessment_attempts', 'attempt_id'), ('skills', 'skill_id')):
+    Table(table_name, metadata, Column(key, Integer, primary_key=True))
+
+# Tables missing from the KnowledgeBase.sql schema dump
+TABLES = (
+    Table(
+        'assessment_registrations', metadata,
+        Column('candidate_id', Integer, ForeignKey('candidates.candidate_id'), primary_key=True),
+        Column('job_id', Integer, ForeignKey('job_descriptions.job_id'), primary_key=True),
+        Column('registration_date', DateTime),
+    ),
+    Table(
+        'assessment_states', metadata,
+        Column('attempt_id', Integer, ForeignKey('assessment_attempts.attempt_id'), primary_key=True),
+        Column('state', JSONB, nullable=False),
+    ),
+    Table(
+        'background_jobs', metadata,
+        Column('job_id', String(36), primary_key=True),
+        Column('kind', String(50), nullable=False),
+        Column('payload', JSONB, nullable=False),
+        Column('status', String(20), nullable=False),
+        Column('progress', JSONB),
+        Column('result', JSONB),
+        Column('error', Text),
+        Column('attempts', Integer, nullable=False),
+        Column('created_at', DateTime),
+        Column('updated_at', DateTime),
+    ),
+    Table(
+        'mcq_pool', metadata,
+        Column('pool_mcq_id', Integer, primary_key=True),
+        Column('skill_id', Integer, ForeignKey('skills.skill_id'), nullable=False),
+        Column('difficulty_band', String(20), nullable=False),
+        Column('question', Text, nullable=False),
+        Column('option_a', Text, nullable=False),
+        Column('option_b', Text, nullable=False),
+        Column('option_c', Text, nullable=False),
+        Column('option_d', Text, nullable=False),
+        Column('correct_answer', String(1), nullable=False),
+        Column('usage_count', Integer, nullable=False),
+        Column('created_at', DateTime),
+        Index('ix_mcq_pool_skill_band_usage', 'skill_id', 'difficulty_band', 'usage_count'),
+    ),
+    Table(
+        'job_matches', metadata,
+        Column('candidate_id', Integer, ForeignKey('candidates.candidate_id', ondelete='CASCADE'), primary_key=True),
+        Column('job_id', Integer, ForeignKey('job_descriptions.job_id', ondelete='CASCADE'), primary_key=True),
+        Column('match_score', Float, nullable=False),
+        Column('candidate_rank', Integer),
+        Column('job_rank', Integer),
+        Index('ix_job_matches_candidate_rank', 'candidate_id', 'candidate_rank'),
+        Index('ix_job_matches_job_rank', 'job_id', 'job_rank'),
+    ),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, tables=TABLES, checkfirst=True)
+
+    # The dump's resume_json has neither a key nor the hashes
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text(
+            "ALTER TABLE resume_json "
+            "ADD COLUMN IF NOT EXISTS resume_json_id SERIAL PRIMARY KEY, "
+            "ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64), "
+            "ADD COLUMN IF NOT EXISTS text_hash VARCHAR(64), "
+            "ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT now()"
+        ))
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_resume_json_content_hash ON resume_json (content_hash)",
+        "CREATE INDEX IF NOT EXISTS ix_resume_json_text_hash ON resume_json (text_hash)",
+        # Candidate eligibility filters (see JobDescription.__table_args__)
+        "CREATE INDEX IF NOT EXISTS ix_job_descriptions_lower_degree_required "
+        "ON job_descriptions (lower(degree_required))",
+        "CREATE INDEX IF NOT EXISTS ix_job_descriptions_experience ON job_descriptions (experience_min, experience_max)",
+        # Recruiter ranking pages (see CandidateRanking.__table_args__)
+        "CREATE INDEX IF NOT EXISTS ix_candidate_rankings_job_score "
+        "ON candidate_rankings (job_id, match_score DESC, candidate_id)",
+    ):
+        connection.execute(text(statement))
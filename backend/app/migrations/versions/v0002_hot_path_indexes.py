@@ -0,0 +1,49 @@
+"""Secondary indexes for the columns hot queries filter on; the dump only has primary keys and unique constraints.
+
+- mcqs (job_id, skill_id, difficulty_band): a job's questions per skill and band
+- assessment_attempts (candidate_id, job_id): a candidate's attempts, at one job or all of them
+- assessment_registrations (job_id): a job's registrants (ranking); the key leads with candidate_id
+- candidate_skills (skill_id): who holds a skill (ranking, match rebuild); the key leads with candidate_id
+- job_descriptions (recruiter_id): a recruiter's assessments
+
+On Postgres they are built and dropped CONCURRENTLY, so writes to the tables carry on meanwhile;
+that cannot run inside a transaction, hence TRANSACTIONAL = False (see app.migrations.upgrade).
+The same indexes are declared in the models' __table_args__. benchmarks/bench_hot_path_indexes.py
+compares the queries before and after.
+"""
+from sqlalchemy import text
+
+INDEXES = {
+    'ix_mcqs_job_skill_band': 'mcqs (job_id, skill_id, difficulty_band)',
+    'ix_assessment_attempts_candidate_job': 'assessment_attempts (candidate_id, job_id)',
+    'ix_assessment_registrations_job': 'assessment_registrations (job_id)',
+    'ix_candidate_skills_skill': 'candidate_skills (skill_id)',
+    'ix_job_descriptions_recruiter': 'job_descriptions (recruiter_id)',
+}
+
+TRANSACTIONAL = False
+
+
+def upgrade(connection):
+    concurrently = _concurrently(connection)
+    for name, target in INDEXES.items():
+        # A concurrent build that failed part way leaves an invalid index, which IF NOT EXISTS would keep
+        if concurrently and _invalid(connection, name):
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        connection.execute(text(f"CREATE INDEX{concurrently} IF NOT EXISTS {name} ON {target}"))
+
+
+def downgrade(connection):
+    concurrently = _concurrently(connection)
+    for name in INDEXES:
+        connection.execute(text(f"DROP INDEX{concurrently} IF EXISTS {name}"))
+
+
+def _concurrently(connection):
+    return ' CONCURRENTLY' if connection.dialect.name == 'postgresql' else ''
+
+
+def _invalid(connection, name):
+    return bool(connection.execute(
+        text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar())
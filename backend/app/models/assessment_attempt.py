@@ -4,6 +4,10 @@ from sqlalchemy.dialects.postgresql import JSONB
 
 class AssessmentAttempt(db.Model):
     __tablename__ = 'assessment_attempts'
+    __table_args__ = (
+        # A candidate's attempts (migration 0002)
+        db.Index('ix_assessment_attempts_candidate_job', 'candidate_id', 'job_id'),
+    )
 
     attempt_id = db.Column(db.Integer, primary_key=True)
     candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.candidate_id'), nullable=False)
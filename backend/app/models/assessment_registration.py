@@ -3,6 +3,10 @@ from datetime import datetime
 
 class AssessmentRegistration(db.Model):
     __tablename__ = 'assessment_registrations'
+    __table_args__ = (
+        # A job's registrants; the primary key leads with candidate_id (migration 0002)
+        db.Index('ix_assessment_registrations_job', 'job_id'),
+    )
 
     candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.candidate_id'), primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey('job_descriptions.job_id'), primary_key=True)
@@ -0,0 +1,17 @@
+from app import db
+
+class CandidateRanking(db.Model):
+    """A registered candidate's match score for a job, kept current by app.services.ranking."""
+    __tablename__ = 'candidate_rankings'
+
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.candidate_id', ondelete='CASCADE'), primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('job_descriptions.job_id', ondelete='CASCADE'), primary_key=True)
+    match_score = db.Column(db.Float, nullable=False)
+
+    # A job's ranking page is one index range scan in (match_score DESC, candidate_id) order
+    __table_args__ = (
+        db.Index('ix_candidate_rankings_job_score', job_id, match_score.desc(), candidate_id),
+    )
+
+    def __repr__(self):
+        return f'<CandidateRanking candidate_id={self.candidate_id} job_id={self.job_id} match_score={self.match_score}>'
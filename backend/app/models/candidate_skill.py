@@ -2,6 +2,10 @@ from app import db
 
 class CandidateSkill(db.Model):
     __tablename__ = 'candidate_skills'
+    __table_args__ = (
+        # Who holds a skill; the primary key leads with candidate_id (migration 0002)
+        db.Index('ix_candidate_skills_skill', 'skill_id'),
+    )
 
     candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.candidate_id'), primary_key=True)
     skill_id = db.Column(db.Integer, db.ForeignKey('skills.skill_id'), primary_key=True)
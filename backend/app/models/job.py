@@ -3,6 +3,13 @@ from datetime import datetime
 
 class JobDescription(db.Model):
     __tablename__ = 'job_descriptions'
+    __table_args__ = (
+        # Candidate eligibility filters (app.services.eligibility)
+        db.Index('ix_job_descriptions_lower_degree_required', db.func.lower(db.text('degree_required'))),
+        db.Index('ix_job_descriptions_experience', 'experience_min', 'experience_max'),
+        # A recruiter's assessments (migration 0002)
+        db.Index('ix_job_descriptions_recruiter', 'recruiter_id'),
+    )
     
     job_id = db.Column(db.Integer, primary_key=True)
     recruiter_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -0,0 +1,19 @@
+from app import db
+
+class JobMatch(db.Model):
+    """A (candidate, job) pair in the candidate's top jobs or the job's top candidates, from the last match rebuild."""
+    __tablename__ = 'job_matches'
+
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.candidate_id', ondelete='CASCADE'), primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('job_descriptions.job_id', ondelete='CASCADE'), primary_key=True)
+    match_score = db.Column(db.Float, nullable=False)
+    candidate_rank = db.Column(db.Integer)  # position among the candidate's best jobs, if in their top k
+    job_rank = db.Column(db.Integer)  # position among the job's best candidates, if in its top k
+
+    __table_args__ = (
+        db.Index('ix_job_matches_candidate_rank', 'candidate_id', 'candidate_rank'),
+        db.Index('ix_job_matches_job_rank', 'job_id', 'job_rank'),
+    )
+
+    def __repr__(self):
+        return f'<JobMatch candidate_id={self.candidate_id} job_id={self.job_id} match_score={self.match_score}>'
@@ -2,6 +2,10 @@ from app import db
 
 class MCQ(db.Model):
     __tablename__ = 'mcqs'
+    __table_args__ = (
+        # A job's questions per skill and band (migration 0002)
+        db.Index('ix_mcqs_job_skill_band', 'job_id', 'skill_id', 'difficulty_band'),
+    )
     
     mcq_id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey('job_descriptions.job_id'), nullable=False)
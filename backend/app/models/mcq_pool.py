@@ -0,0 +1,25 @@
+from app import db
+from datetime import datetime
+
+class PoolMCQ(db.Model):
+    """A generated question that can be handed out to any job needing this skill and band."""
+    __tablename__ = 'mcq_pool'
+
+    pool_mcq_id = db.Column(db.Integer, primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skills.skill_id'), nullable=False)
+    difficulty_band = db.Column(db.String(20), nullable=False)  # 'good', 'better', 'perfect'
+    question = db.Column(db.Text, nullable=False)
+    option_a = db.Column(db.Text, nullable=False)
+    option_b = db.Column(db.Text, nullable=False)
+    option_c = db.Column(db.Text, nullable=False)
+    option_d = db.Column(db.Text, nullable=False)
+    correct_answer = db.Column(db.String(1), nullable=False)  # 'A', 'B', 'C', or 'D'
+    usage_count = db.Column(db.Integer, nullable=False, default=0)  # jobs this question was given to
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_mcq_pool_skill_band_usage', 'skill_id', 'difficulty_band', 'usage_count'),
+    )
+
+    def __repr__(self):
+        return f'<PoolMCQ {self.pool_mcq_id} skill_id={self.skill_id} band={self.difficulty_band} used={self.usage_count}>'
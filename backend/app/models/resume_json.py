@@ -0,0 +1,17 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
+
+class ResumeJSON(db.Model):
+    """Gemini's analysis of an uploaded resume, keyed by hashes of the file and of its extracted text."""
+    __tablename__ = 'resume_json'
+
+    resume_json_id = db.Column(db.Integer, primary_key=True)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.candidate_id', ondelete='CASCADE'))
+    raw_resume = db.Column(JSONB, nullable=False)
+    content_hash = db.Column(db.String(64), index=True)  # sha256 of the PDF bytes
+    text_hash = db.Column(db.String(64), index=True)  # sha256 of the whitespace-normalised extracted text
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ResumeJSON {self.resume_json_id} candidate_id={self.candidate_id}>'
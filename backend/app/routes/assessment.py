@@ -1,37 +1,17 @@
-import os
-import json
+import hashlib
+import hmac
 import random
 from datetime import datetime
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from app import db
 from app.models.candidate import Candidate
 from app.models.job import JobDescription
 from app.models.assessment_attempt import AssessmentAttempt
+from app.services.question_bank import BAND_ORDER, get_question_bank
+from app.services.session_store import get_session_store
 
 assessment_api_bp = Blueprint('assessment_api', __name__, url_prefix='/api/assessment')
 
-# --- Configuration ---
-QUESTION_DIR = "app/question_batches"
-BAND_ORDER = ["good", "better", "perfect"]
-
-# In-memory state for each assessment attempt (in a production environment, use a proper state management solution)
-assessment_states = {}
-
-def load_question_bank():
-    bank = {band: {} for band in BAND_ORDER}
-    for fname in os.listdir(QUESTION_DIR):
-        if fname.endswith(".json"):
-            parts = fname[:-5].split("_")
-            skill = "_".join(parts[:-1])
-            band = parts[-1]
-            with open(os.path.join(QUESTION_DIR, fname), "r") as f:
-                questions = json.load(f)
-            if skill not in bank[band]:
-                bank[band][skill] = []
-            random.shuffle(questions)
-            bank[band][skill].extend(questions)
-    return bank
-
 def divide_experience_range(jd_range):
     start, end = map(float, jd_range.split("-"))
     interval = (end - start) / 3
@@ -71,7 +51,6 @@ def start_assessment_session(attempt_id):
     candidate_experience = candidate.years_of_experience
     jd_experience_range = f"{job.experience_min}-{job.experience_max}"
 
-    question_bank = load_question_bank()
     base_band = get_base_band(candidate_experience, jd_experience_range)
     priority_sum = sum(jd_priorities.values())
     questions_per_skill = {
@@ -92,9 +71,15 @@ def start_assessment_session(attempt_id):
         "responses": []
     } for skill in jd_priorities}
     
+    # Questions come from the shared bank; each attempt only keeps a seed and a cursor per (skill, band)
+    skill_order = [skill for skill, _ in sorted(jd_priorities.items(), key=lambda x: -x[1])]
+    bank_cursor = {skill: {band: 0 for band in BAND_ORDER} for skill in jd_priorities}
+
     # Store state
-    assessment_states[attempt_id] = {
-        'question_bank': question_bank,
+    get_session_store().create(attempt_id, {
+        'bank_seed': random.getrandbits(32),
+        'bank_cursor': bank_cursor,
+        'skill_order': skill_order,
         'questions_per_skill': questions_per_skill,
         'current_band_per_skill': current_band_per_skill,
         'initial_band_per_skill': initial_band_per_skill,
@@ -104,96 +89,127 @@ def start_assessment_session(attempt_id):
         'test_duration': test_duration,
         'start_time': datetime.utcnow().timestamp(),
         'asked_questions': [],
-    }
+    })
 
     return jsonify({
         'total_questions': total_questions,
         'test_duration': test_duration,
     }), 200
 
-@assessment_api_bp.route('/next-question/<int:attempt_id>', methods=['GET'])
-def get_next_question(attempt_id):
-    if attempt_id not in assessment_states:
-        return jsonify({'error': 'Assessment session not found'}), 404
+def finalize_assessment(state, attempt_id):
+    # Finalize performance log
+    for skill in state['performance_log']:
+        state.set_in(('performance_log', skill, "final_band"), state['current_band_per_skill'][skill])
+        correct = state['performance_log'][skill]["correct_answers"]
+        total = state['performance_log'][skill]["questions_attempted"]
+        state.set_in(('performance_log', skill, "accuracy_percent"),
+                     round((correct / total) * 100, 2) if total > 0 else 0.0)
 
-    state = assessment_states[attempt_id]
-    question_count = state['question_count']
-    total_questions = state['total_questions']
-    test_duration = state['test_duration']
-    start_time = state['start_time']
-    questions_per_skill = state['questions_per_skill']
+    # Save performance log to the database
+    attempt = AssessmentAttempt.query.get(attempt_id)
+    attempt.performance_log = state['performance_log']
+    attempt.end_time = datetime.utcnow()
+    attempt.status = 'completed'
+    db.session.commit()
 
-    # Check if time is up or all questions are asked
-    elapsed_time = datetime.utcnow().timestamp() - start_time
-    if question_count >= total_questions or elapsed_time >= test_duration:
-        # Finalize performance log
-        for skill in state['performance_log']:
-            state['performance_log'][skill]["final_band"] = state['current_band_per_skill'][skill]
-            correct = state['performance_log'][skill]["correct_answers"]
-            total = state['performance_log'][skill]["questions_attempted"]
-            state['performance_log'][skill]["accuracy_percent"] = round((correct / total) * 100, 2) if total > 0 else 0.0
-
-        # Save performance log to the database
-        attempt = AssessmentAttempt.query.get(attempt_id)
-        attempt.performance_log = state['performance_log']
-        attempt.end_time = datetime.utcnow()
-        attempt.status = 'completed'
-        db.session.commit()
-
-        return jsonify({
-            'message': 'Assessment completed',
-            'candidate_report': state['performance_log']
-        }), 200
+    return {
+        'message': 'Assessment completed',
+        'candidate_report': state['performance_log']
+    }
 
-    # Get the next question
-    sorted_skills = sorted(questions_per_skill.items(), key=lambda x: -jd_priorities.get(x[0], 0))
-    for skill, remaining in sorted_skills:
-        if remaining <= 0:
+def select_next_question(state, current_band_per_skill):
+    question_bank = get_question_bank()
+    for skill in state['skill_order']:
+        if state['questions_per_skill'][skill] <= 0:
             continue
 
-        # Fetch question
-        band = state['current_band_per_skill'][skill]
-        available = state['question_bank'].get(band, {}).get(skill, [])
-        if not available:
-            continue
+        band = current_band_per_skill[skill]
+        question_id = question_bank.pick(skill, band, state['bank_seed'], state['bank_cursor'][skill][band])
+        if question_id is not None:
+            return skill, band, question_id
+
+    return None
 
-        question = available.pop(0)
-        state['questions_per_skill'][skill] -= 1
-        state['question_count'] += 1
-        state['asked_questions'].append(question)
+def question_handle(attempt_id, question_number, question_id):
+    # Opaque to the client: it can only match handles, not recover question ids
+    message = f"{attempt_id}:{question_number}:{question_id}".encode()
+    return hmac.new(current_app.secret_key.encode(), message, hashlib.sha256).hexdigest()[:16]
 
-        return jsonify({
-            'question': {
-                'question': question['question'],
-                'options': question['options']
-            },
-            'skill': skill,
-            'question_number': state['question_count']
-        }), 200
+def question_payload(attempt_id, skill, question_id, question_number, prefetch=False, known_handles=()):
+    payload = {
+        'skill': skill,
+        'question_number': question_number
+    }
+    handle = question_handle(attempt_id, question_number, question_id) if prefetch else None
+    if handle:
+        payload['handle'] = handle
+    if handle not in known_handles:
+        question = get_question_bank().get(question_id)
+        payload['question'] = {
+            'question': question['question'],
+            'options': list(question['options'])
+        }
+    return payload
+
+def prefetch_successors(state, attempt_id, skill):
+    # The next question only depends on whether the current answer moves the band up or down,
+    # so both candidates can be picked now without touching the state
+    band_index = BAND_ORDER.index(state['current_band_per_skill'][skill])
+    outcomes = {
+        'correct': BAND_ORDER[min(band_index + 1, len(BAND_ORDER) - 1)],
+        'incorrect': BAND_ORDER[max(band_index - 1, 0)]
+    }
 
-    return jsonify({'message': 'No more questions available'}), 200
+    successors = {}
+    for outcome, band in outcomes.items():
+        selected = None
+        if state['question_count'] < state['total_questions']:
+            selected = select_next_question(state, {**state['current_band_per_skill'], skill: band})
+        if selected is None:
+            successors[outcome] = None
+            continue
+        next_skill, _, question_id = selected
+        successors[outcome] = question_payload(attempt_id, next_skill, question_id, state['question_count'] + 1, prefetch=True)
+    return successors
 
-@assessment_api_bp.route('/submit-answer/<int:attempt_id>', methods=['POST'])
-def submit_answer(attempt_id):
-    if attempt_id not in assessment_states:
-        return jsonify({'error': 'Assessment session not found'}), 404
+def advance_assessment(state, attempt_id, prefetch=False, known_handles=()):
+    # Check if time is up or all questions are asked
+    elapsed_time = datetime.utcnow().timestamp() - state['start_time']
+    if state['question_count'] >= state['total_questions'] or elapsed_time >= state['test_duration']:
+        return finalize_assessment(state, attempt_id)
 
-    state = assessment_states[attempt_id]
-    data = request.get_json()
+    # Get the next question
+    selected = select_next_question(state, state['current_band_per_skill'])
+    if selected is None:
+        return {'message': 'No more questions available'}
+
+    skill, band, question_id = selected
+    state.add_to(('bank_cursor', skill, band), 1)
+    state.add_to(('questions_per_skill', skill), -1)
+    state['question_count'] += 1
+    state.append_to(('asked_questions',), question_id)
+
+    response = question_payload(attempt_id, skill, question_id, state['question_count'], prefetch, known_handles)
+    if prefetch:
+        response['prefetch'] = prefetch_successors(state, attempt_id, skill)
+    return response
+
+def grade_answer(state, data):
     skill = data.get('skill')
     user_input = data.get('answer')
     time_taken = data.get('time_taken')
 
     # Get the last asked question
-    question = state['asked_questions'][-1]
+    question = get_question_bank().get(state['asked_questions'][-1])
     band = state['current_band_per_skill'][skill]
     user_option = question['options'][int(user_input) - 1]
     correct = user_option == question['answer']
 
-    # Update performance log
-    state['performance_log'][skill]["questions_attempted"] += 1
-    state['performance_log'][skill]["time_spent"] += time_taken
-    state['performance_log'][skill]["responses"].append({
+    # Update performance log, in place: only the counters and the new response are saved
+    log = ('performance_log', skill)
+    state.add_to(log + ("questions_attempted",), 1)
+    state.add_to(log + ("time_spent",), time_taken)
+    state.append_to(log + ("responses",), {
         "question": question['question'],
         "chosen": user_option,
         "correct": question['answer'],
@@ -204,43 +220,72 @@ def submit_answer(attempt_id):
 
     feedback = ''
     if correct:
-        state['performance_log'][skill]["correct_answers"] += 1
+        state.add_to(log + ("correct_answers",), 1)
         if BAND_ORDER.index(band) < 2:
-            state['current_band_per_skill'][skill] = BAND_ORDER[BAND_ORDER.index(band) + 1]
+            state.set_in(('current_band_per_skill', skill), BAND_ORDER[BAND_ORDER.index(band) + 1])
         feedback = "✅ Nice one! That was spot on."
     else:
-        state['performance_log'][skill]["incorrect_answers"] += 1
+        state.add_to(log + ("incorrect_answers",), 1)
         if BAND_ORDER.index(band) > 0:
-            state['current_band_per_skill'][skill] = BAND_ORDER[BAND_ORDER.index(band) - 1]
+            state.set_in(('current_band_per_skill', skill), BAND_ORDER[BAND_ORDER.index(band) - 1])
         feedback = f"❌ Oops! The correct answer was: {question['answer']}"
 
+    return feedback
+
+@assessment_api_bp.route('/next-question/<int:attempt_id>', methods=['GET'])
+def get_next_question(attempt_id):
+    session_store = get_session_store()
+    state = session_store.load(attempt_id)
+    if state is None:
+        return jsonify({'error': 'Assessment session not found'}), 404
+
+    prefetch = request.args.get('prefetch') in ('1', 'true')
+    response = advance_assessment(state, attempt_id, prefetch)
+    session_store.save(state)
+
+    return jsonify(response), 200
+
+@assessment_api_bp.route('/submit-answer/<int:attempt_id>', methods=['POST'])
+def submit_answer(attempt_id):
+    session_store = get_session_store()
+    state = session_store.load(attempt_id)
+    if state is None:
+        return jsonify({'error': 'Assessment session not found'}), 404
+
+    feedback = grade_answer(state, request.get_json())
+    session_store.save(state)
+
     return jsonify({'feedback': feedback}), 200
 
-@assessment_api_bp.route('/end/<int:attempt_id>', methods=['POST'])
-def end_assessment(attempt_id):
-    if attempt_id not in assessment_states:
+# Grades the answer and returns the feedback together with the next question (or the final report),
+# saving the client the follow-up /next-question round trip.
+# Prefetch mode: a client that sends the 'prefetch_handles' it got from an earlier response only gets
+# the handle of the next question back when it already holds it, plus the successors of that question.
+@assessment_api_bp.route('/submit-and-next/<int:attempt_id>', methods=['POST'])
+def submit_and_next(attempt_id):
+    session_store = get_session_store()
+    state = session_store.load(attempt_id)
+    if state is None:
         return jsonify({'error': 'Assessment session not found'}), 404
 
-    state = assessment_states[attempt_id]
+    data = request.get_json()
+    feedback = grade_answer(state, data)
+    prefetch = 'prefetch_handles' in data
+    response = advance_assessment(state, attempt_id, prefetch, data.get('prefetch_handles') or ())
+    session_store.save(state)
+
+    return jsonify({'feedback': feedback, **response}), 200
 
-    # Finalize performance log
-    for skill in state['performance_log']:
-        state['performance_log'][skill]["final_band"] = state['current_band_per_skill'][skill]
-        correct = state['performance_log'][skill]["correct_answers"]
-        total = state['performance_log'][skill]["questions_attempted"]
-        state['performance_log'][skill]["accuracy_percent"] = round((correct / total) * 100, 2) if total > 0 else 0.0
+@assessment_api_bp.route('/end/<int:attempt_id>', methods=['POST'])
+def end_assessment(attempt_id):
+    session_store = get_session_store()
+    state = session_store.load(attempt_id)
+    if state is None:
+        return jsonify({'error': 'Assessment session not found'}), 404
 
-    # Save to database
-    attempt = AssessmentAttempt.query.get(attempt_id)
-    attempt.performance_log = state['performance_log']
-    attempt.end_time = datetime.utcnow()
-    attempt.status = 'completed'
-    db.session.commit()
+    response = finalize_assessment(state, attempt_id)
 
     # Clean up state
-    del assessment_states[attempt_id]
+    session_store.delete(attempt_id)
 
-    return jsonify({
-        'message': 'Assessment completed',
-        'candidate_report': state['performance_log']
-    }), 200
\ No newline at end of file
+    return jsonify(response), 200
@@ -0,0 +1,12 @@
+from flask import Blueprint, jsonify
+from app import db
+from app.models.background_job import BackgroundJob
+
+jobs_api_bp = Blueprint('jobs_api', __name__, url_prefix='/api/jobs')
+
+@jobs_api_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
@@ -0,0 +1,10 @@
+from flask import Blueprint, jsonify
+from app import db
+from app.utils.db_pool import pool_stats
+
+metrics_api_bp = Blueprint('metrics_api', __name__, url_prefix='/api/metrics')
+
+# Connection pool usage and checkout wait times for this worker process, per engine (primary, replica)
+@metrics_api_bp.route('/db-pool', methods=['GET'])
+def get_db_pool_stats():
+    return jsonify(pool_stats(db.engines)), 200
@@ -1,63 +1,25 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
 from app import db
-from app.models.user import User
 from app.models.job import JobDescription
-from app.models.skill import Skill
-from datetime import datetime
-from app.services import question_batches
-
-recruiter_bp = Blueprint('recruiter', __name__)
-
-# Fetch past and active assessments
-@recruiter_bp.route('/assessments', methods=['GET'])
-def get_assessments():
-    # Temporarily hardcode recruiter_id for testing (replace with session['user_id'] after login is implemented)
-    recruiter_id = 1
-    current_time = datetime.utcnow()
-
-    # Fetch jobs (assessments) for the recruiter
-    jobs = JobDescription.query.filter_by(recruiter_id=recruiter_id).all()
-
-    # Categorize into past and active assessments
-    past_assessments = []
-    active_assessments = []
-    for job in jobs:
-        assessment = {
-            'id': job.job_id,
-            'test_name': job.job_title,
-            'company': job.company,
-            'schedule': job.schedule.isoformat(),
-            'num_questions': job.num_questions,
-            'duration': job.duration,
-            'experience_min': job.experience_min,
-            'experience_max': job.experience_max,
-            'skills': [{'name': skill.skill.name, 'priority': skill.priority} for skill in job.required_skills]
-        }
-        if job.schedule < current_time:
-            past_assessments.append(assessment)
-        else:
-            active_assessments.append(assessment)
-
-    return jsonify({
-        'past_assessments': past_assessments,
-        'active_assessments': active_assessments
-    })
-
-# Create a new assessment
-@recruiter_bp.route('/assessments', methods=['POST'])
-def create_assessment():from flask import Blueprint, jsonify
-from app import db
-from app.models.job import JobDescription
-from app.models.assessment_registration import AssessmentRegistration
-from app.models.candidate import Candidate
 from app.models.required_skill import RequiredSkill
-from app.models.candidate_skill import CandidateSkill
 from app.models.skill import Skill
-from sqlalchemy import and_
+from app.services.job_queue import job_queue
+from app.services.match_matrix import MATCH_MAX_TOP_K, MATCH_TOP_K, top_candidates_for_job
+from app.services.ranking import (RANKING_MAX_PAGE_SIZE, RANKING_PAGE_SIZE, iter_ranking, ranked_page,
+                                  refresh_job_rankings)
+from app.utils.pagination import page_limit
+from app.utils.read_replica import replica_reads
+from datetime import datetime
+import csv
+import io
+import json
 
 recruiter_api_bp = Blueprint('recruiter_api', __name__, url_prefix='/api/recruiter')
 
+EXPORT_COLUMNS = ['rank', 'candidate_id', 'name', 'email', 'total_score', 'skill_score', 'experience_score', 'description']
+
 @recruiter_api_bp.route('/assessments/<int:recruiter_id>', methods=['GET'])
+@replica_reads
 def get_assessments(recruiter_id):
     assessments = JobDescription.query.filter_by(recruiter_id=recruiter_id).all()
     return jsonify([{
@@ -74,101 +36,108 @@ def get_assessments(recruiter_id):
     } for assessment in assessments]), 200
 
 @recruiter_api_bp.route('/candidates/<int:job_id>', methods=['GET'])
+@replica_reads
 def get_ranked_candidates(job_id):
     # Fetch job details
     job = JobDescription.query.get_or_404(job_id)
     
-    # Fetch registered candidates
-    registrations = AssessmentRegistration.query.filter_by(job_id=job_id).all()
-    candidate_ids = [r.candidate_id for r in registrations]
-    candidates = Candidate.query.filter(Candidate.candidate_id.in_(candidate_ids)).all()
-    
-    # Fetch required skills for the job
-    required_skills = RequiredSkill.query.filter_by(job_id=job_id).all()
-    required_skill_dict = {
-        rs.skill_id: rs.priority for rs in required_skills
-    }
-    
-    # Fetch candidate skills
-    candidate_skills = CandidateSkill.query.filter(
-        and_(
-            CandidateSkill.candidate_id.in_(candidate_ids),
-            CandidateSkill.skill_id.in_(required_skill_dict.keys())
-        )
-    ).all()
-    
-    # Organize candidate skills
-    candidate_skill_map = {}
-    for cs in candidate_skills:
-        if cs.candidate_id not in candidate_skill_map:
-            candidate_skill_map[cs.candidate_id] = {}
-        candidate_skill_map[cs.candidate_id][cs.skill_id] = cs.proficiency
-    
-    # Calculate maximum possible skill score
-    max_proficiency = 8  # As per parsing.py (advanced=8)
-    max_skill_score = sum(required_skill_dict.values()) * max_proficiency
-    
-    # Rank candidates
-    ranked_candidates = []
-    for candidate in candidates:
-        # Skill match score
-        skill_score = 0
-        matched_skills = []
-        for skill_id, priority in required_skill_dict.items():
-            proficiency = candidate_skill_map.get(candidate.candidate_id, {}).get(skill_id, 0)
-            if proficiency > 0:
-                skill_name = Skill.query.get(skill_id).name
-                matched_skills.append(f"{skill_name} (Proficiency: {proficiency})")
-                skill_score += priority * proficiency
-        
-        skill_score_normalized = skill_score / max_skill_score if max_skill_score > 0 else 0
-        
-        # Experience score
-        exp_midpoint = (job.experience_min + job.experience_max) / 2
-        exp_range = job.experience_max - job.experience_min
-        exp_diff = abs(candidate.years_of_experience - exp_midpoint)
-        exp_score = max(0, 1 - (exp_diff / (exp_range / 2))) if exp_range > 0 else 1
-        
-        # Total score
-        total_score = (0.7 * skill_score_normalized) + (0.3 * exp_score)
-        
-        # Generate rank description
-        description = f"{candidate.name} is ranked based on "
-        if matched_skills:
-            description += f"strong skills in {', '.join(matched_skills)}"
-        else:
-            description += "limited skill matches"
-        description += f" and {candidate.years_of_experience} years of experience, which "
-        if exp_diff < 0.5:
-            description += "closely matches"
-        elif exp_diff < 1.5:
-            description += "reasonably matches"
-        else:
-            description += "is outside"
-        description += f" the job's {job.experience_min}-{job.experience_max} year requirement."
-        
-        ranked_candidates.append({
-            'candidate_id': candidate.candidate_id,
-            'name': candidate.name,
-            'email': candidate.email,
-            'total_score': round(total_score, 2),
-            'skill_score': round(skill_score_normalized, 2),
-            'experience_score': round(exp_score, 2),
-            'description': description
-        })
-    
-    # Sort by total score (descending)
-    ranked_candidates.sort(key=lambda x: x['total_score'], reverse=True)
-    
-    # Add rank numbers
-    for i, candidate in enumerate(ranked_candidates, 1):
-        candidate['rank'] = i
+    # Registered candidates by match score, a page at a time from candidate_rankings (app.services.ranking):
+    # ?limit=N (default RANKING_PAGE_SIZE) and ?cursor=<next_cursor of the previous page>
+    try:
+        limit = page_limit(RANKING_PAGE_SIZE, RANKING_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    try:
+        ranked_candidates, next_cursor = ranked_page(job, cursor=request.args.get('cursor'), limit=limit)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     
     return jsonify({
         'job_id': job_id,
         'job_title': job.job_title,
-        'candidates': ranked_candidates
+        'candidates': ranked_candidates,
+        'next_cursor': next_cursor
     }), 200
+
+# The whole ranking as a download (?format=csv, the default, or ndjson), streamed a chunk of candidates at a time
+@recruiter_api_bp.route('/candidates/<int:job_id>/export', methods=['GET'])
+@replica_reads
+def export_ranked_candidates(job_id):
+    job = JobDescription.query.get_or_404(job_id)
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+
+    def generate():
+        if export_format == 'ndjson':
+            for row in iter_ranking(job):
+                yield json.dumps({column: row[column] for column in EXPORT_COLUMNS}) + '\n'
+            return
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for row in iter_ranking(job):
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=job-{job_id}-rankings.{export_format}'
+    })
+
+# Rebuild candidate_rankings (all jobs, or {"job_ids": [...]}), e.g. after registrations were imported
+@recruiter_api_bp.route('/rankings/rebuild', methods=['POST'])
+def rebuild_rankings():
+    data = request.get_json(silent=True) or {}
+    job_ids = data.get('job_ids')
+    if job_ids is not None and not (isinstance(job_ids, list) and all(isinstance(j, int) for j in job_ids)):
+        return jsonify({"error": "job_ids must be a list of job ids"}), 400
+    rebuild_job = job_queue.submit('rebuild_rankings', {"job_ids": job_ids})
+    return jsonify({
+        "message": "Rankings are being rebuilt",
+        "rebuild_job_id": rebuild_job.job_id,
+        "status_url": url_for('jobs_api.get_job', job_id=rebuild_job.job_id)
+    }), 202
+
+# Best-matching candidates for a job among everyone, registered or not, from the last match rebuild; ?limit=N
+@recruiter_api_bp.route('/recommended-candidates/<int:job_id>', methods=['GET'])
+@replica_reads
+def get_recommended_candidates(job_id):
+    JobDescription.query.get_or_404(job_id)
+    try:
+        limit = page_limit(MATCH_TOP_K, MATCH_MAX_TOP_K)
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    return jsonify({'job_id': job_id, 'candidates': [{
+        'candidate_id': candidate.candidate_id,
+        'name': candidate.name,
+        'email': candidate.email,
+        'years_of_experience': candidate.years_of_experience,
+        'match_score': round(match.match_score, 2),
+        'rank': match.job_rank
+    } for match, candidate in top_candidates_for_job(job_id, limit=limit)]}), 200
+
+# Recompute job_matches, every candidate's top jobs and every job's top candidates ({"top_k": N} optional)
+@recruiter_api_bp.route('/matches/rebuild', methods=['POST'])
+def rebuild_matches():
+    data = request.get_json(silent=True) or {}
+    top_k = data.get('top_k')
+    if top_k is not None and not (isinstance(top_k, int) and 0 < top_k <= MATCH_MAX_TOP_K):
+        return jsonify({"error": f"top_k must be an integer from 1 to {MATCH_MAX_TOP_K}"}), 400
+    rebuild_job = job_queue.submit('rebuild_job_matches', {"top_k": top_k})
+    return jsonify({
+        "message": "Job matches are being rebuilt",
+        "rebuild_job_id": rebuild_job.job_id,
+        "status_url": url_for('jobs_api.get_job', job_id=rebuild_job.job_id)
+    }), 202
+
+# Create a new assessment; question generation runs in the background job queue
+@recruiter_api_bp.route('/assessments', methods=['POST'])
+def create_assessment():
     data = request.json
     # Temporarily hardcode recruiter_id for testing (replace with session['user_id'] after login is implemented)
     recruiter_id = 1
@@ -227,22 +196,27 @@ def get_ranked_candidates(job_id):
             )
             db.session.add(required_skill)
 
+        # Score the job's registered candidates against its required skills
+        refresh_job_rankings(job.job_id)
         db.session.commit()
 
-        # Trigger question generation
-        try:
-            skills_with_priorities = [
-                {"name": skill_data['name'], "priority": priority_map[skill_data['priority'].lower()]}
-                for skill_data in data['skills']
-            ]
-            jd_experience_range = f"{data['experience_min']}-{data['experience_max']}"
-            question_batches.prepare_question_batches(skills_with_priorities, jd_experience_range, job.job_id)
-        except Exception as e:
-            print(f"⚠️ Error generating questions: {e}")
-            # Continue even if question generation fails (assessment is still created)
-            pass
-
-        return jsonify({"message": "Assessment created successfully", "job_id": job.job_id}), 201
+        # Queue question generation; progress is available from the jobs endpoint
+        skills_with_priorities = [
+            {"name": skill_data['name'], "priority": priority_map[skill_data['priority'].lower()]}
+            for skill_data in data['skills']
+        ]
+        generation_job = job_queue.submit('generate_questions', {
+            "job_id": job.job_id,
+            "skills_with_priorities": skills_with_priorities,
+            "jd_experience_range": f"{data['experience_min']}-{data['experience_max']}"
+        })
+
+        return jsonify({
+            "message": "Assessment created, questions are being generated",
+            "job_id": job.job_id,
+            "generation_job_id": generation_job.job_id,
+            "status_url": url_for('jobs_api.get_job', job_id=generation_job.job_id)
+        }), 202
 
     except ValueError as e:
         db.session.rollback()
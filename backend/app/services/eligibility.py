@@ -0,0 +1,57 @@
+from datetime import datetime
+from sqlalchemy import func, or_, tuple_
+from app import db
+from app.models.job import JobDescription
+
+# Page size for the candidate dashboard's assessment list, and the most a client may ask for
+ELIGIBLE_PAGE_SIZE = 50
+ELIGIBLE_MAX_PAGE_SIZE = 200
+
+
+def eligible_jobs(candidate, cursor=None, limit=ELIGIBLE_PAGE_SIZE, now=None):
+    """One page of the jobs a candidate may take, earliest schedule first, filtered in SQL.
+
+    Eligible means the candidate's experience is inside the job's range, the required degree is
+    empty or equal to the candidate's (case-insensitive), and the assessment has not closed yet
+    (schedule + duration minutes is still ahead). Pages are keyset-paginated on (schedule, job_id):
+    pass the returned cursor back to get the next page. Returns (jobs, next_cursor or None).
+    Raises ValueError for a malformed cursor.
+    """
+    now = now or datetime.utcnow()
+    query = JobDescription.query.filter(
+        JobDescription.experience_min <= candidate.years_of_experience,
+        JobDescription.experience_max >= candidate.years_of_experience,
+        _degree_matches(candidate.degree),
+        _closes_at() > now
+    )
+    if cursor:
+        query = query.filter(tuple_(JobDescription.schedule, JobDescription.job_id) > decode_cursor(cursor))
+    jobs = query.order_by(JobDescription.schedule, JobDescription.job_id).limit(limit + 1).all()
+    if len(jobs) > limit:
+        return jobs[:limit], encode_cursor(jobs[limit - 1])
+    return jobs, None
+
+
+def encode_cursor(job):
+    return f"{job.schedule.isoformat()}_{job.job_id}"
+
+
+def decode_cursor(cursor):
+    schedule, _, job_id = cursor.rpartition("_")
+    return datetime.fromisoformat(schedule), int(job_id)
+
+
+def _degree_matches(degree):
+    # Every branch goes through lower(degree_required) so the functional index serves all of them;
+    # no degree required (NULL or empty) matches every candidate
+    required = func.lower(JobDescription.degree_required)
+    if not degree:
+        return or_(required.is_(None), required == "")
+    return or_(required.is_(None), required.in_(["", degree.lower()]))
+
+
+def _closes_at():
+    # Interval arithmetic differs per dialect; SQLite is what the benchmarks run on
+    if db.engine.dialect.name == "sqlite":
+        return func.datetime(JobDescription.schedule, "+" + JobDescription.duration.cast(db.String) + " minutes", type_=db.DateTime)
+    return JobDescription.schedule + func.make_interval(0, 0, 0, 0, 0, JobDescription.duration)
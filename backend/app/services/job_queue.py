@@ -0,0 +1,123 @@
+import importlib
+import logging
+import queue
+import threading
+from datetime import datetime, timedelta
+from app import db, runs_startup_work
+from app.models.background_job import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> "module:function". Handlers are imported lazily by the worker so that
+# the web process never pays for heavy imports (LLM clients, pdf backends, ...)
+JOB_HANDLERS = {
+    'generate_questions': 'app.services.question_batches:run_question_generation_job',
+    'process_resume': 'app.services.resume_pipeline:run_resume_job',
+    'rebuild_rankings': 'app.services.ranking:run_rankings_rebuild',
+    'rebuild_job_matches': 'app.services.match_matrix:run_match_rebuild',
+}
+
+
+class JobQueue:
+    """Local background job queue with its own worker threads.
+
+    Job status lives in the background_jobs table, so progress is visible from
+    any process and queued or interrupted jobs are picked up again on restart.
+    Handlers are called as ``handler(payload, report_progress)`` inside an app
+    context and must be safe to re-run from the start.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._workers = []
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['job_queue'] = self
+        num_workers = app.config.get('JOB_QUEUE_WORKERS', 2)
+        # Only the serving process runs jobs and recovers stale ones: not a helper process that builds
+        # an app of its own, nor the debug reloader's watcher (see runs_startup_work)
+        if num_workers <= 0 or not runs_startup_work(app):
+            return
+
+        with app.app_context():
+            self.recover(app.config.get('JOB_STALE_SECONDS', 600))
+
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, kind, payload):
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = BackgroundJob(kind=kind, payload=payload, status='queued', progress={})
+        db.session.add(job)
+        db.session.commit()
+        self._queue.put(job.job_id)
+        return job
+
+    def recover(self, stale_seconds):
+        # 'running' jobs that stopped reporting progress belong to a dead process
+        stale_before = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        BackgroundJob.query.filter(
+            BackgroundJob.status == 'running',
+            BackgroundJob.updated_at < stale_before
+        ).update({'status': 'queued', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+
+        job_ids = [job_id for (job_id,) in db.session.query(BackgroundJob.job_id)
+                   .filter_by(status='queued').order_by(BackgroundJob.created_at)]
+        for job_id in job_ids:
+            self._queue.put(job_id)
+        if job_ids:
+            logger.info(f"Recovered {len(job_ids)} queued background jobs")
+
+    def _claim(self, job_id):
+        # Conditional update so that two processes recovering the same job cannot both run it
+        claimed = BackgroundJob.query.filter_by(job_id=job_id, status='queued').update({
+            'status': 'running',
+            'attempts': BackgroundJob.attempts + 1,
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def _update(self, job_id, **values):
+        values['updated_at'] = datetime.utcnow()
+        BackgroundJob.query.filter_by(job_id=job_id).update(values, synchronize_session=False)
+        db.session.commit()
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                with self.app.app_context():
+                    self._run(job_id)
+            except Exception as e:
+                logger.error(f"Background job {job_id} crashed the worker loop: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id):
+        if not self._claim(job_id):
+            return
+        job = db.session.get(BackgroundJob, job_id)
+        module_name, func_name = JOB_HANDLERS[job.kind].split(":")
+        handler = getattr(importlib.import_module(module_name), func_name)
+
+        def report_progress(progress):
+            self._update(job_id, progress=progress)
+
+        try:
+            result = handler(job.payload, report_progress)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Background job {job_id} ({job.kind}) failed: {e}")
+            self._update(job_id, status='failed', error=str(e))
+            return
+        self._update(job_id, status='completed', result=result, error=None)
+
+
+job_queue = JobQueue()
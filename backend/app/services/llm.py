@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import hashlib
+import random
+import threading
+import time
+import google.generativeai as genai
+from google.api_core.exceptions import DeadlineExceeded, ServiceUnavailable, TooManyRequests
+from app.utils.disk_cache import DiskCache
+
+# 'gemini' talks to the Gemini API; 'stub' answers locally with canned, well-formed output
+# so that the generation and resume pipelines can run in tests without network access
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+# Gemini quota shared by every job in the process, and how failed calls are retried
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", 60))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", 10))
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", 5))
+GEMINI_BACKOFF_SECONDS = float(os.getenv("GEMINI_BACKOFF_SECONDS", 2))
+GEMINI_MAX_BACKOFF_SECONDS = float(os.getenv("GEMINI_MAX_BACKOFF_SECONDS", 60))
+
+# Content-addressed cache of prompt responses; a TTL of 0 turns it off
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "instance/cache")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+
+
+def configure_gemini():
+    if LLM_BACKEND == "stub":
+        return
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable not set")
+    genai.configure(api_key=api_key)
+
+
+def get_generative_model(model_name, generation_config=None):
+    if LLM_BACKEND == "stub":
+        return StubGenerativeModel(model_name, generation_config)
+    return genai.GenerativeModel(model_name=model_name, generation_config=generation_config)
+
+
+class TextResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class TokenBucket:
+    """Thread-safe token bucket: refills at rate_per_minute and holds at most burst tokens."""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+gemini_rate_limiter = TokenBucket(GEMINI_REQUESTS_PER_MINUTE, GEMINI_BURST)
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = DiskCache(
+                    os.path.join(LLM_CACHE_DIR, "llm_responses.sqlite3"), LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES
+                )
+    return _response_cache
+
+
+def response_cache_key(model, prompt):
+    generation_config = getattr(model, "_generation_config", None) or getattr(model, "generation_config", None) or {}
+    material = json.dumps({
+        "model": model.model_name,
+        "generation_config": dict(generation_config),
+        "prompt": prompt
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def send_prompt(model, prompt, use_cache=True):
+    """Send one prompt through the shared rate limiter, retrying quota and transient errors
+    with exponential backoff. Raises the last error once GEMINI_MAX_ATTEMPTS is used up.
+
+    Responses are cached by (model, generation config, prompt); pass use_cache=False for
+    prompts that must reach the model every time.
+    """
+    use_cache = use_cache and LLM_CACHE_TTL_SECONDS > 0
+    if use_cache:
+        key = response_cache_key(model, prompt)
+        hit, text = get_response_cache().get(key)
+        if hit:
+            return TextResponse(text)
+
+    response = _send_with_retry(model, prompt)
+    if use_cache and response and isinstance(response.text, str) and response.text.strip():
+        get_response_cache().put(key, response.text)
+    return response
+
+
+def _send_with_retry(model, prompt):
+    for attempt in range(1, GEMINI_MAX_ATTEMPTS + 1):
+        gemini_rate_limiter.acquire()
+        try:
+            chat_session = model.start_chat(history=[{"role": "user", "parts": [prompt]}])
+            return chat_session.send_message(prompt)
+        except (TooManyRequests, ServiceUnavailable, DeadlineExceeded) as e:
+            if attempt == GEMINI_MAX_ATTEMPTS:
+                raise
+            delay = min(GEMINI_MAX_BACKOFF_SECONDS, GEMINI_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            delay *= random.uniform(0.5, 1.0)  # jitter so parallel retries do not line up
+            print(f"⛔️ Gemini call failed ({type(e).__name__}), retrying in {delay:.1f}s (attempt {attempt}/{GEMINI_MAX_ATTEMPTS})")
+            time.sleep(delay)
+
+
+class StubChatSession:
+    def __init__(self, model):
+        self.model = model
+
+    def send_message(self, prompt):
+        return self.model.generate_content(prompt)
+
+
+class StubGenerativeModel:
+    """Drop-in for genai.GenerativeModel that recognises the prompts this app sends."""
+
+    def __init__(self, model_name, generation_config=None):
+        self.model_name = model_name
+        self.generation_config = generation_config
+
+    def start_chat(self, history=None):
+        return StubChatSession(self)
+
+    def generate_content(self, prompt):
+        subtopics = re.search(r"List 5 key subtopics under (.+?) that", prompt)
+        if subtopics:
+            skill = subtopics.group(1)
+            return TextResponse("\n".join(f"- {skill} Topic {i}" for i in range(1, 6)))
+
+        mcqs = re.search(r"Generate (\d+) unique and diverse multiple-choice questions \(MCQs\) on the skill '(.+?)'", prompt)
+        if mcqs:
+            count, skill = int(mcqs.group(1)), mcqs.group(2)
+            questions = [
+                f"Stub question {i} about {skill}?\n\n(A) Option {i}A\n(B) Option {i}B\n(C) Option {i}C\n(D) Option {i}D\n\nCorrect Answer: (B)"
+                for i in range(1, count + 1)
+            ]
+            # Same shape Gemini returns: a bracketed list of quoted strings with real line breaks
+            return TextResponse("[" + ",\n".join(f'"{q}"' for q in questions) + "]")
+
+        if "You are a JSON assistant" in prompt:
+            return TextResponse(json.dumps({
+                "Skills": {"Technical Skills": ["Python", "Machine Learning"], "Soft Skills": ["Communication"], "Tools": ["GitHub"]},
+                "Work Experience": [{"Company": "Stub Corp", "Title": "Engineer", "Start Date": "", "End Date": "",
+                                     "Description": "Developed machine learning pipelines in Python", "Technologies": "Python, Flask"}],
+                "Projects": [{"Title": "Stub Project", "Description": "Built a deep learning model", "Technologies": "Python"}],
+                "Education": [{"Degree": "BTech", "Institution": "Stub University", "Graduation Year": 2020, "Certification": False}]
+            }))
+
+        return TextResponse("")
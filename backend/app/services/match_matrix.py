@@ -0,0 +1,242 @@
+import os
+import numpy as np
+from scipy import sparse
+from sqlalchemy import delete, insert, select
+from app import db
+from app.models.candidate import Candidate
+from app.models.candidate_skill import CandidateSkill
+from app.models.job import JobDescription
+from app.models.job_match import JobMatch
+from app.models.required_skill import RequiredSkill
+from app.services.ranking import EXPERIENCE_WEIGHT, MAX_PROFICIENCY, SKILL_WEIGHT
+
+# How many jobs are kept per candidate and candidates per job, and how many candidates are scored
+# at once (a block holds MATCH_BLOCK_ROWS x number of jobs float64 scores)
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", 20))
+# The largest top_k a rebuild may be asked for; recommendation limits go up to it, and a response
+# then holds as many matches as the last rebuild stored
+MATCH_MAX_TOP_K = int(os.getenv("MATCH_MAX_TOP_K", 500))
+MATCH_BLOCK_ROWS = int(os.getenv("MATCH_BLOCK_ROWS", 1024))
+# About how many job_matches rows are replaced per transaction of a rebuild
+MATCH_STORE_ROWS = int(os.getenv("MATCH_STORE_ROWS", 10000))
+
+
+def load_match_inputs():
+    """Every candidate and job, with skills as sparse matrices, in four queries.
+
+    Returns a dict with candidate_ids, years, job_ids, experience_min, experience_max (NumPy arrays),
+    proficiency (candidates x skills CSR) and priority (skills x jobs CSR). Only skills some job
+    requires get a column; the others cannot add to any score.
+    """
+    connection = db.session.connection()
+    candidates = connection.execute(
+        select(Candidate.candidate_id, Candidate.years_of_experience).order_by(Candidate.candidate_id)
+    ).all()
+    jobs = connection.execute(
+        select(JobDescription.job_id, JobDescription.experience_min, JobDescription.experience_max)
+        .order_by(JobDescription.job_id)
+    ).all()
+    required = connection.execute(select(RequiredSkill.job_id, RequiredSkill.skill_id, RequiredSkill.priority)).all()
+    held = connection.execute(
+        select(CandidateSkill.candidate_id, CandidateSkill.skill_id, CandidateSkill.proficiency)
+        .where(CandidateSkill.proficiency > 0, CandidateSkill.skill_id.in_(select(RequiredSkill.skill_id)))
+    ).all()
+
+    candidate_ids = np.array([c for c, _ in candidates], dtype=np.int64)
+    # No experience on file counts as 0 years, as in ranking
+    years = np.nan_to_num(np.array([y for _, y in candidates], dtype=np.float64), nan=0.0)
+    job_ids = np.array([j for j, _, _ in jobs], dtype=np.int64)
+    skill_ids = np.unique(np.array([s for _, s, _ in required], dtype=np.int64))
+
+    proficiency = _sparse(held, candidate_ids, skill_ids, shape=(len(candidate_ids), len(skill_ids)))
+    priority = _sparse(required, job_ids, skill_ids, shape=(len(job_ids), len(skill_ids))).T.tocsr()
+    return {
+        "candidate_ids": candidate_ids,
+        "years": years,
+        "job_ids": job_ids,
+        "experience_min": np.array([m for _, m, _ in jobs], dtype=np.int64),
+        "experience_max": np.array([m for _, _, m in jobs], dtype=np.int64),
+        "proficiency": proficiency,
+        "priority": priority,
+    }
+
+
+def _sparse(rows, row_ids, column_ids, shape):
+    # CSR from (row id, column id, value) triples; ids are mapped through the sorted id arrays
+    if not rows:
+        return sparse.csr_matrix(shape, dtype=np.int64)
+    ids, columns, values = (np.array(part, dtype=np.int64) for part in zip(*rows))
+    return sparse.csr_matrix(
+        (values, (np.searchsorted(row_ids, ids), np.searchsorted(column_ids, columns))), shape=shape
+    )
+
+
+def compute_top_matches(inputs, top_k=MATCH_TOP_K, block_rows=MATCH_BLOCK_ROWS):
+    """Best jobs for every candidate and best candidates for every job.
+
+    Scores use the ranking formula (app.services.ranking.score_candidates), with the same operations
+    in the same order, so every score equals what the job's ranking computes for that candidate.
+    Skill scores are the sparse product proficiency @ priority, taken a block of candidates at a time
+    so the dense candidates x jobs score matrix never exists in full.
+
+    Returns (by_candidate, by_job): by_candidate is (job index, score) arrays of shape (candidates, k),
+    by_job is (candidate index, score) arrays of shape (k, jobs), both best first; empty slots are
+    -1 / -inf when there are fewer than k jobs or candidates.
+    """
+    proficiency, priority, years = inputs["proficiency"], inputs["priority"], inputs["years"]
+    num_candidates, num_jobs = len(inputs["candidate_ids"]), len(inputs["job_ids"])
+    k_jobs, k_candidates = min(top_k, num_jobs), min(top_k, num_candidates)
+
+    max_skill_score = np.asarray(priority.sum(axis=0)).ravel() * MAX_PROFICIENCY
+    has_skills = max_skill_score > 0
+    exp_midpoint = (inputs["experience_min"] + inputs["experience_max"]) / 2
+    exp_range = inputs["experience_max"] - inputs["experience_min"]
+    has_range = exp_range > 0
+    half_range = np.where(has_range, exp_range, 2) / 2
+
+    candidate_jobs = np.full((num_candidates, k_jobs), -1, dtype=np.int64)
+    candidate_scores = np.full((num_candidates, k_jobs), -np.inf)
+    job_candidates = np.full((k_candidates, num_jobs), -1, dtype=np.int64)
+    job_scores = np.full((k_candidates, num_jobs), -np.inf)
+    if not k_jobs or not k_candidates:
+        return (candidate_jobs, candidate_scores), (job_candidates, job_scores)
+
+    for start in range(0, num_candidates, block_rows):
+        stop = min(start + block_rows, num_candidates)
+        raw = (proficiency[start:stop] @ priority).toarray()
+        skill_scores = np.divide(raw, np.where(has_skills, max_skill_score, 1))
+        skill_scores[:, ~has_skills] = 0.0
+        exp_diffs = np.abs(years[start:stop, None] - exp_midpoint)
+        exp_scores = np.where(has_range, np.maximum(0, 1 - (exp_diffs / half_range)), 1.0)
+        totals = (SKILL_WEIGHT * skill_scores) + (EXPERIENCE_WEIGHT * exp_scores)
+
+        # Candidates in this block: their k best jobs
+        best = np.argpartition(-totals, k_jobs - 1, axis=1)[:, :k_jobs]
+        candidate_jobs[start:stop] = best
+        candidate_scores[start:stop] = np.take_along_axis(totals, best, axis=1)
+
+        # Jobs: merge this block's k best candidates with the best found so far
+        block_k = min(k_candidates, stop - start)
+        best = np.argpartition(-totals, block_k - 1, axis=0)[:block_k]
+        merged_candidates = np.vstack([job_candidates, best + start])
+        merged_scores = np.vstack([job_scores, np.take_along_axis(totals, best, axis=0)])
+        keep = np.argpartition(-merged_scores, k_candidates - 1, axis=0)[:k_candidates]
+        job_candidates = np.take_along_axis(merged_candidates, keep, axis=0)
+        job_scores = np.take_along_axis(merged_scores, keep, axis=0)
+
+    # Best first; equal scores in id order (indexes follow the id-sorted inputs)
+    order = np.lexsort((candidate_jobs, -candidate_scores), axis=1)
+    candidate_jobs = np.take_along_axis(candidate_jobs, order, axis=1)
+    candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+    order = np.lexsort((job_candidates, -job_scores), axis=0)
+    job_candidates = np.take_along_axis(job_candidates, order, axis=0)
+    job_scores = np.take_along_axis(job_scores, order, axis=0)
+    return (candidate_jobs, candidate_scores), (job_candidates, job_scores)
+
+
+def rebuild_job_matches(top_k=MATCH_TOP_K, report_progress=None):
+    """Recompute job_matches from scratch: every candidate's top_k jobs and every job's top_k candidates.
+
+    Rows are replaced a range of candidates at a time, each range in its own transaction: a
+    candidate's matches change all at once, while a job's may mix the previous and the new rebuild
+    until it finishes. Returns counts for the job result.
+    """
+    inputs = load_match_inputs()
+    if report_progress:
+        report_progress({"stage": "score", "candidates": len(inputs["candidate_ids"]), "jobs": len(inputs["job_ids"])})
+    by_candidate, by_job = compute_top_matches(inputs, top_k)
+    keys, scores, candidate_ranks, job_ranks = match_rows(by_candidate, by_job, len(inputs["job_ids"]))
+
+    candidate_ids, job_ids = inputs["candidate_ids"], inputs["job_ids"]
+    num_candidates, num_jobs = len(candidate_ids), len(job_ids)
+    if report_progress:
+        report_progress({"stage": "store", "rows": len(keys)})
+    step = max(1, MATCH_STORE_ROWS // max(1, min(top_k, num_jobs)))
+    for start in range(0, max(num_candidates, 1), step):
+        stop = min(start + step, num_candidates)
+        first, last = np.searchsorted(keys, [start * num_jobs, stop * num_jobs])
+        # The first and last ranges also clear rows of candidates that are gone
+        stale = delete(JobMatch)
+        if start > 0:
+            stale = stale.where(JobMatch.candidate_id >= int(candidate_ids[start]))
+        if stop < num_candidates:
+            stale = stale.where(JobMatch.candidate_id < int(candidate_ids[stop]))
+        db.session.execute(stale)
+        if last > first:
+            chunk = keys[first:last]
+            db.session.execute(insert(JobMatch), [{
+                "candidate_id": candidate_id, "job_id": job_id, "match_score": score,
+                "candidate_rank": candidate_rank or None, "job_rank": job_rank or None
+            } for candidate_id, job_id, score, candidate_rank, job_rank in zip(
+                candidate_ids[chunk // num_jobs].tolist(), job_ids[chunk % num_jobs].tolist(),
+                scores[first:last].tolist(), candidate_ranks[first:last].tolist(), job_ranks[first:last].tolist()
+            )])
+        db.session.commit()
+    return {"candidates": num_candidates, "jobs": num_jobs, "rows": len(keys)}
+
+
+def match_rows(by_candidate, by_job, num_jobs):
+    """The union of the (candidate, job) pairs in by_candidate and by_job (see compute_top_matches).
+
+    Returns NumPy arrays (keys, scores, candidate_ranks, job_ranks), one entry per pair, sorted by
+    key = candidate index * num_jobs + job index; a rank is 0 where the pair is not in that top k.
+    """
+    (candidate_jobs, candidate_scores), (job_candidates, job_scores) = by_candidate, by_job
+    num_candidates, k_jobs = candidate_jobs.shape
+    k_candidates = job_candidates.shape[0]
+    sides = []
+    for candidates, jobs, scores, ranks in (
+        # Row i of by_candidate holds candidate i's jobs, best first
+        (np.repeat(np.arange(num_candidates), k_jobs), candidate_jobs.ravel(), candidate_scores.ravel(),
+         np.tile(np.arange(1, k_jobs + 1), num_candidates)),
+        # Row r of by_job holds every job's candidate at rank r + 1
+        (job_candidates.ravel(), np.tile(np.arange(num_jobs), k_candidates), job_scores.ravel(),
+         np.repeat(np.arange(1, k_candidates + 1), num_jobs)),
+    ):
+        valid = (candidates >= 0) & (jobs >= 0)
+        side_keys = candidates[valid] * num_jobs + jobs[valid]
+        order = np.argsort(side_keys)
+        sides.append((side_keys[order], scores[valid][order], ranks[valid][order]))
+
+    keys = np.union1d(sides[0][0], sides[1][0])
+    scores = np.empty(len(keys))
+    ranks = []
+    for side_keys, side_scores, side_ranks in sides:
+        position = np.searchsorted(side_keys, keys)
+        found = position < len(side_keys)
+        found[found] = side_keys[position[found]] == keys[found]
+        # A pair in both top k lists has the same score in each
+        scores[found] = side_scores[position[found]]
+        rank = np.zeros(len(keys), dtype=np.int64)
+        rank[found] = side_ranks[position[found]]
+        ranks.append(rank)
+    return keys, scores, ranks[0], ranks[1]
+
+
+def run_match_rebuild(payload, report_progress):
+    # Background job entry point (see app.services.job_queue)
+    return rebuild_job_matches(top_k=payload.get("top_k") or MATCH_TOP_K, report_progress=report_progress)
+
+
+def top_jobs_for_candidate(candidate_id, limit=MATCH_TOP_K):
+    """[(JobMatch, JobDescription)] best first, from the last rebuild."""
+    return (
+        db.session.query(JobMatch, JobDescription)
+        .join(JobDescription, JobDescription.job_id == JobMatch.job_id)
+        .filter(JobMatch.candidate_id == candidate_id, JobMatch.candidate_rank.isnot(None))
+        .order_by(JobMatch.candidate_rank)
+        .limit(limit)
+        .all()
+    )
+
+
+def top_candidates_for_job(job_id, limit=MATCH_TOP_K):
+    """[(JobMatch, Candidate)] best first, from the last rebuild."""
+    return (
+        db.session.query(JobMatch, Candidate)
+        .join(Candidate, Candidate.candidate_id == JobMatch.candidate_id)
+        .filter(JobMatch.job_id == job_id, JobMatch.job_rank.isnot(None))
+        .order_by(JobMatch.job_rank)
+        .limit(limit)
+        .all()
+    )
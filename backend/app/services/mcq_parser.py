@@ -0,0 +1,159 @@
+import json
+import re
+
+# Strings of the bracketed list: a double-quoted run, allowing backslash escapes
+QUOTED_ITEM = re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL)
+NUMBERING = re.compile(r'^(?:(?:Q(?:uestion)?\s*)?\d+\s*[.):-]\s+|Q(?:uestion)?\s*\d*\s*:\s*)', re.IGNORECASE)
+# An option marker: "(A)" or "A)" in either case, or "A." / "A:" in upper case only, so that text
+# such as "d: a dict" is not taken for an option
+OPTION_LINE = re.compile(r'^(?=[A-D][.:]|\(?[A-Da-d]\))\(?([A-Da-d])[).:]\s*(.*)$')
+# One match per line of an item: a "Correct Answer: (B)" line, an "(A) option" line, or plain text
+ITEM_LINE = re.compile(
+    r'^[ \t]*(?:'
+    r'(?:\*\*)?Correct\s+Answer\s*[:\-]?\s*(?:\*\*)?\s*\(?(?P<correct>[A-Da-d])\b\)?.*?'
+    r'|(?-i:(?=[A-D][.:]|\(?[A-Da-d]\))\(?(?P<letter>[A-Da-d])[).:])[ \t]*(?P<option>.*?)'
+    r'|(?P<text>.*?)'
+    r')[ \t]*$',
+    re.MULTILINE | re.IGNORECASE
+)
+# Options written on one line, "(A) x (B) y (C) z (D) w", possibly after the question and before the answer
+INLINE_MARKER = re.compile(r'\(([A-D])\)')
+INLINE_OPTION = re.compile(r'\(([A-D])\)\s*(.*?)(?=\s*\([A-D]\)|$)', re.DOTALL)
+INLINE_ANSWER = re.compile(r'(?:\*\*)?Correct\s+Answer\s*[:\-]?\s*(?:\*\*)?\s*\(?([A-Da-d])\b', re.IGNORECASE)
+OPTION_KEYS = ("A", "B", "C", "D")
+
+
+def parse_mcq_response(raw_text):
+    """Parse one Gemini MCQ batch in a single pass.
+
+    Accepts a JSON list (JSON mode: objects with question/options/answer, or plain strings)
+    and the bracketed list of quoted strings the prompt asks for, with or without code fences.
+    Returns (questions, rejected), where rejected is a list of {"item", "reason"} dicts.
+    """
+    text = raw_text.strip()
+    if text.startswith("```"):
+        text = text.partition("\n")[2]
+    if text.endswith("```"):
+        text = text[:-3]
+    text = text.strip()
+    if not text:
+        return [], [{"item": raw_text, "reason": "empty response"}]
+
+    try:
+        # strict=False: Gemini often puts raw newlines inside the strings
+        items = json.loads(text, strict=False)
+    except ValueError:
+        items = None
+    if isinstance(items, dict):
+        items = items.get("questions", [items])
+    if not isinstance(items, list):
+        start, end = text.find("["), text.rfind("]")
+        if start == -1 or end <= start:
+            return [], [{"item": raw_text, "reason": "response is not a list"}]
+        items = [_unescape(match.group(1)) for match in QUOTED_ITEM.finditer(text, start + 1, end)]
+
+    questions, rejected = [], []
+    for item in items:
+        if isinstance(item, dict):
+            parsed, reason = parse_mcq_object(item)
+        elif isinstance(item, str):
+            parsed, reason = parse_mcq_text(item)
+        else:
+            parsed, reason = None, f"unsupported item type {type(item).__name__}"
+        if parsed:
+            questions.append(parsed)
+        else:
+            rejected.append({"item": item, "reason": reason})
+    return questions, rejected
+
+
+def parse_mcq_text(item):
+    """Parse "Question\\n(A) ..\\n(B) ..\\n(C) ..\\n(D) ..\\nCorrect Answer: (B)"; returns (question, reason).
+
+    Options may also come on one line, alone or after the question, with the answer at its end.
+    """
+    question_lines, options, correct = [], {}, None
+    for line in ITEM_LINE.finditer(item):
+        letter, text = line.group("letter", "text")
+        inline = _inline_options(line.group(0)) if letter or text else None
+        if inline:
+            before, line_options, line_correct = inline
+            if before:
+                if options:
+                    return None, f"unexpected text after options: {before[:60]}"
+                question_lines.append(before)
+            options.update(line_options)
+            correct = line_correct or correct
+        elif letter and question_lines:
+            options[letter.upper()] = line.group("option")
+        elif text is None and not letter:
+            correct = line.group("correct").upper()
+        elif text or letter:
+            if options:
+                return None, f"unexpected text after options: {line.group(0).strip()[:60]}"
+            question_lines.append(text or line.group(0).strip())
+
+    question = NUMBERING.sub("", " ".join(question_lines)).strip()
+    return _build(question, options, correct)
+
+
+def parse_mcq_object(item):
+    """Parse a JSON-mode item; options may be a list or an A-D mapping, the answer a letter or the option text."""
+    question = NUMBERING.sub("", str(item.get("question", "")).strip())
+    raw_options = item.get("options", [])
+    if isinstance(raw_options, dict):
+        options = {str(key).strip("() ").upper(): str(value).strip() for key, value in raw_options.items()}
+    elif isinstance(raw_options, list):
+        options = {key: OPTION_LINE.sub(r"\2", str(value).strip()) for key, value in zip(OPTION_KEYS, raw_options)}
+    else:
+        options = {}
+
+    answer = str(item.get("correct_answer", item.get("answer", ""))).strip()
+    correct = None
+    letter = re.fullmatch(r"\(?([A-Da-d])\)?", answer)
+    if letter:
+        correct = letter.group(1).upper()
+    else:
+        correct = next((key for key, value in options.items() if value == answer), None)
+    return _build(question, options, correct)
+
+
+def _build(question, options, correct):
+    if not question:
+        return None, "missing question text"
+    missing = [key for key in OPTION_KEYS if not options.get(key)]
+    if missing:
+        return None, f"missing options {', '.join(missing)}"
+    if len(options) != 4:
+        return None, f"expected 4 options, got {len(options)}"
+    if correct is None:
+        return None, "missing or unparseable correct answer"
+    return {
+        "question": question,
+        "option_a": options["A"],
+        "option_b": options["B"],
+        "option_c": options["C"],
+        "option_d": options["D"],
+        "correct_answer": correct
+    }, None
+
+
+def _inline_options(line):
+    # (text before the options, {letter: option}, answer letter or None) for a line holding more
+    # than one "(X)" marker, else None. The answer tail is cut off first: its "(C)" is not an option
+    if line.count("(") < 2 or len(INLINE_MARKER.findall(line)) < 2:
+        return None
+    answer = INLINE_ANSWER.search(line)
+    body = line[:answer.start()] if answer else line
+    markers = list(INLINE_MARKER.finditer(body))
+    if len(markers) < 2:
+        return None
+    start = markers[0].start()
+    options = {key: value.strip() for key, value in INLINE_OPTION.findall(body, start)}
+    return body[:start].strip(), options, answer.group(1).upper() if answer else None
+
+
+def _unescape(value):
+    if "\\" not in value:
+        return value
+    return value.replace('\\"', '"').replace("\\n", "\n").replace("\\t", " ").replace("\\\\", "\\")
@@ -0,0 +1,166 @@
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+# Tried in order until one returns text; names are keys of EXTRACTORS
+PDF_BACKENDS = [name.strip() for name in os.getenv("PDF_BACKENDS", "pymupdf,pypdfium2,pdfminer").split(",") if name.strip()]
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 20))
+# Wall-clock budget per document, shared by all backends it falls back through
+PDF_TIMEOUT_SECONDS = float(os.getenv("PDF_TIMEOUT_SECONDS", 15))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 2))
+# Address-space cap per worker process (0 = unlimited); a decompression bomb then fails instead of swapping
+PDF_WORKER_MEMORY_MB = int(os.getenv("PDF_WORKER_MEMORY_MB", 1024))
+
+
+def extract_pymupdf(data, max_pages):
+    import fitz
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return "\n".join(doc[i].get_text() for i in range(min(doc.page_count, max_pages)))
+
+
+def extract_pypdfium2(data, max_pages):
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(data)
+    try:
+        texts = []
+        for i in range(min(len(pdf), max_pages)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_bounded())
+            textpage.close()
+            page.close()
+        return "\n".join(texts)
+    finally:
+        pdf.close()
+
+
+def extract_pdfminer(data, max_pages):
+    from pdfminer.high_level import extract_text
+    return extract_text(BytesIO(data), maxpages=max_pages)
+
+
+EXTRACTORS = {
+    "pymupdf": extract_pymupdf,
+    "pypdfium2": extract_pypdfium2,
+    "pdfminer": extract_pdfminer,
+}
+
+
+def _limit_worker_memory():
+    if PDF_WORKER_MEMORY_MB <= 0:
+        return
+    try:
+        import resource
+        limit = PDF_WORKER_MEMORY_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Could not limit PDF worker memory: {e}")
+
+
+def _start_worker(worker_pids):
+    # Report this worker to the parent, which kills it if a document gets it stuck (_discard_pool)
+    worker_pids.put(os.getpid())
+    _limit_worker_memory()
+
+
+def _run_extractor(backend, data, max_pages):
+    return EXTRACTORS[backend](data, max_pages)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# {pool: queue of the pids its workers reported at start}
+_worker_pids = {}
+
+
+def get_extraction_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the web process has threads (job workers, torch) that fork would copy mid-flight
+                context = multiprocessing.get_context("spawn")
+                worker_pids = context.SimpleQueue()
+                _pool = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS,
+                    mp_context=context,
+                    initializer=_start_worker,
+                    initargs=(worker_pids,)
+                )
+                _worker_pids[_pool] = worker_pids
+    return _pool
+
+
+def _discard_pool(pool):
+    # A worker stuck on a pathological document cannot be cancelled, only killed
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+        worker_pids = _worker_pids.pop(pool, None)
+    pool.shutdown(wait=False, cancel_futures=True)
+    while worker_pids is not None and not worker_pids.empty():
+        try:
+            os.kill(worker_pids.get(), getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            pass  # already gone
+
+
+def _reset_after_fork():
+    global _pool, _pool_lock, _worker_pids
+    _pool = None
+    _pool_lock = threading.Lock()
+    _worker_pids = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def extract_pdf_text(data, backends=None, max_pages=None, timeout=None):
+    """Text of the first max_pages pages of a PDF, or None if no backend could extract any.
+
+    Runs in the extraction process pool. Backends are tried in order; an error or empty
+    text falls through to the next one, and all of them share one timeout per document.
+    """
+    backends = backends or PDF_BACKENDS
+    max_pages = max_pages or PDF_MAX_PAGES
+    timeout = timeout or PDF_TIMEOUT_SECONDS
+    deadline = time.monotonic() + timeout
+
+    for backend in backends:
+        if backend not in EXTRACTORS:
+            logger.warning(f"Unknown PDF backend {backend!r}, skipping")
+            continue
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.error(f"PDF extraction ran out of time ({timeout}s) before trying {backend}")
+            return None
+        pool = get_extraction_pool()
+        try:
+            text = pool.submit(_run_extractor, backend, data, max_pages).result(timeout=remaining)
+        except FutureTimeoutError:
+            logger.error(f"PDF extraction with {backend} timed out after {timeout}s")
+            _discard_pool(pool)
+            return None
+        except BrokenProcessPool:
+            # The worker died (memory limit, segfault in a native library): try the next backend on a fresh pool
+            logger.warning(f"PDF extraction worker crashed using {backend}")
+            _discard_pool(pool)
+            continue
+        except Exception as e:
+            logger.warning(f"PDF extraction with {backend} failed: {e}")
+            continue
+        if text and text.strip():
+            logger.debug(f"Extracted {len(text)} characters from PDF using {backend}")
+            return text
+        logger.warning(f"PDF extraction with {backend} returned no text")
+    return None
@@ -0,0 +1,88 @@
+import os
+import json
+import random
+import threading
+from math import gcd
+from types import MappingProxyType
+
+QUESTION_DIR = os.getenv("QUESTION_DIR", "app/question_batches")
+BAND_ORDER = ["good", "better", "perfect"]
+
+
+class QuestionBank:
+    """Read-only question bank shared by every assessment attempt in the process.
+
+    Each question is stored once and addressed by an integer id; the
+    (skill, band) index maps to the ids belonging to that slice. Attempts never
+    copy questions, they only keep a seed and a cursor per (skill, band).
+    """
+
+    def __init__(self, questions, index):
+        self._questions = tuple(questions)
+        self._index = {key: tuple(ids) for key, ids in index.items()}
+
+    @classmethod
+    def from_directory(cls, question_dir):
+        questions = []
+        index = {}
+        for fname in sorted(os.listdir(question_dir)):
+            if not fname.endswith(".json"):
+                continue
+            parts = fname[:-5].split("_")
+            skill = "_".join(parts[:-1])
+            band = parts[-1]
+            with open(os.path.join(question_dir, fname), "r") as f:
+                batch = json.load(f)
+            ids = index.setdefault((skill, band), [])
+            for question in batch:
+                ids.append(len(questions))
+                questions.append(MappingProxyType({
+                    'question': question['question'],
+                    'options': tuple(question['options']),
+                    'answer': question['answer'],
+                }))
+        return cls(questions, index)
+
+    def __len__(self):
+        return len(self._questions)
+
+    def get(self, question_id):
+        return self._questions[question_id]
+
+    def size(self, skill, band):
+        return len(self._index.get((skill, band), ()))
+
+    def pick(self, skill, band, seed, cursor):
+        """Return the id of the cursor-th question of an attempt's permutation of
+        (skill, band), or None once the slice is exhausted.
+
+        The permutation is the affine map ``(offset + cursor * stride) % n`` with
+        ``stride`` coprime to ``n``, both derived from the attempt seed, so every
+        question is visited exactly once without storing a shuffled copy.
+        """
+        ids = self._index.get((skill, band), ())
+        n = len(ids)
+        if cursor >= n:
+            return None
+        rng = random.Random(f"{seed}:{skill}:{band}")
+        offset = rng.randrange(n)
+        stride = 1
+        if n > 2:
+            stride = rng.randrange(1, n)
+            while gcd(stride, n) != 1:
+                stride = stride % (n - 1) + 1
+        return ids[(offset + cursor * stride) % n]
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """Load the process-wide question bank on first use and return it."""
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = QuestionBank.from_directory(QUESTION_DIR)
+    return _bank
@@ -1,55 +1,111 @@
-import wikipediaapi
-import numpy as np
-import time
 import os
-import re
-from sentence_transformers import SentenceTransformer
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google.api_core.exceptions import TooManyRequests
+from sqlalchemy import func, insert
 from app import db
+from app.models.job import JobDescription
+from app.models.required_skill import RequiredSkill
 from app.models.skill import Skill
 from app.models.mcq import MCQ
-
-def prepare_question_batches(skills_with_priorities, jd_experience_range, job_id):
+from app.models.mcq_pool import PoolMCQ
+from app.services.llm import configure_gemini, get_generative_model, get_response_cache, send_prompt
+from app.services.mcq_parser import parse_mcq_response
+from app.services.wiki_cache import fetch_summary
+
+# Gemini calls in flight per generation job; the request rate itself is capped by the shared limiter in app.services.llm
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", 8))
+# Follow-up prompts per (skill, band) for questions that were rejected or missing from the first answer
+GENERATION_REPAIR_ATTEMPTS = int(os.getenv("GENERATION_REPAIR_ATTEMPTS", 2))
+# Characters of each topic's Wikipedia summary given to the batch prompts as background (0 = none)
+PROMPT_CONTEXT_CHARS = int(os.getenv("PROMPT_CONTEXT_CHARS", 600))
+
+POOL_QUESTION_COLUMNS = (
+    PoolMCQ.question, PoolMCQ.option_a, PoolMCQ.option_b, PoolMCQ.option_c, PoolMCQ.option_d, PoolMCQ.correct_answer
+)
+
+def run_question_generation_job(payload, report_progress):
+    # Background job entry point (see app.services.job_queue). Questions are committed per
+    # (skill, band), so a re-run after a crash only fills the bands that are still short
+    total_saved = prepare_question_batches(
+        payload["skills_with_priorities"], payload["jd_experience_range"], payload["job_id"], report_progress
+    )
+    return {"questions_saved": total_saved, "llm_cache": get_response_cache().stats()}
+
+def questions_needed_per_skill(job_id):
+    # Same split as start_assessment_session: a skill gets its priority's share of num_questions.
+    # The assessment is adaptive and may serve all of them from one band, so every band needs that many
+    job = db.session.get(JobDescription, job_id)
+    required_skills = RequiredSkill.query.filter_by(job_id=job_id).all()
+    priority_sum = sum(rs.priority or 0 for rs in required_skills)
+    needed = {}
+    for rs in required_skills:
+        share = (rs.priority or 0) / priority_sum if priority_sum else 1 / len(required_skills)
+        needed[rs.skill_id] = max(1, round(share * job.num_questions))
+    return needed
+
+def take_from_pool(job_id, skill_id, band, count):
+    # Least-exposed questions first, so reuse is spread across the pool
+    pooled = db.session.query(PoolMCQ.pool_mcq_id, *POOL_QUESTION_COLUMNS) \
+        .filter_by(skill_id=skill_id, difficulty_band=band) \
+        .order_by(PoolMCQ.usage_count, func.random()).limit(count).all()
+    if not pooled:
+        return 0
+    save_questions(job_id, skill_id, band, [row._asdict() for row in pooled], add_to_pool=False)
+    PoolMCQ.query.filter(PoolMCQ.pool_mcq_id.in_([row.pool_mcq_id for row in pooled])) \
+        .update({"usage_count": PoolMCQ.usage_count + 1}, synchronize_session=False)
+    db.session.commit()
+    return len(pooled)
+
+def save_questions(job_id, skill_id, band, questions, add_to_pool=True):
+    # One executemany per table instead of an ORM object per row; the caller commits,
+    # so the job's MCQs and their pool copies land in the same transaction
+    rows = [
+        {
+            "skill_id": skill_id,
+            "difficulty_band": band,
+            "question": q["question"],
+            "option_a": q["option_a"],
+            "option_b": q["option_b"],
+            "option_c": q["option_c"],
+            "option_d": q["option_d"],
+            "correct_answer": q["correct_answer"]
+        }
+        for q in questions
+    ]
+    if not rows:
+        return
+    db.session.execute(insert(MCQ), [dict(row, job_id=job_id) for row in rows])
+    if add_to_pool:
+        db.session.execute(insert(PoolMCQ), [dict(row, usage_count=1) for row in rows])
+
+def saved_counts(job_id):
+    # (skill_id, band) -> MCQs already committed for this job, e.g. by an interrupted earlier run
+    rows = db.session.query(MCQ.skill_id, MCQ.difficulty_band, func.count()) \
+        .filter(MCQ.job_id == job_id).group_by(MCQ.skill_id, MCQ.difficulty_band).all()
+    return {(skill_id, band): count for skill_id, band, count in rows}
+
+def prepare_question_batches(skills_with_priorities, jd_experience_range, job_id, report_progress=None):
     # Configure Gemini AI API
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY environment variable not set")
-    genai.configure(api_key=api_key)
+    configure_gemini()
 
     generation_config = {
         "temperature": 0.2,
         "max_output_tokens": 2048
     }
 
-    model_gemini = genai.GenerativeModel(
-        model_name="gemini-2.0-flash", generation_config=generation_config
-    )
-
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-
-    wiki = wikipediaapi.Wikipedia(
-        user_agent="MandviAIQuiz/1.0 (contact: mandvishukla20@gmail.com)", language='en'
-    )
+    model_gemini = get_generative_model("gemini-2.0-flash", generation_config)
 
     # Utility Functions
-    def divide_experience_range(jd_range):
-        start, end = map(float, jd_range.split("-"))
-        interval = (end - start) / 3
-        return {
-            "good": (start, start + interval),
-            "better": (start + interval, start + 2 * interval),
-            "perfect": (start + 2 * interval, end)
-        }
-
     def expand_skills_with_gemini(skill):
         prompt = f"List 5 key subtopics under {skill} that are relevant for a technical interview. Only list the subskills."
         try:
-            chat_session = model_gemini.start_chat(history=[{"role": "user", "parts": [prompt]}])
-            response = chat_session.send_message(prompt)
+            response = send_prompt(model_gemini, prompt)
         except TooManyRequests:
             print(f"⛔️ Gemini quota exceeded while expanding skill: {skill}")
             return []
+        except Exception as e:
+            print(f"⚠️ Error expanding skill {skill}: {e}")
+            return []
 
         if response and isinstance(response.text, str):
             subtopics = [line.strip("- ").strip() for line in response.text.split("\n") if line.strip()][:5]
@@ -57,10 +113,28 @@ def prepare_question_batches(skills_with_priorities, jd_experience_range, job_id
         return []
 
     def fetch_wikipedia_content(topic):
-        page = wiki.page(topic)
-        return page.summary if page.exists() else None
+        try:
+            return fetch_summary(topic)
+        except Exception as e:
+            print(f"⚠️ Could not fetch Wikipedia content for {topic}: {e}")
+            return None
 
-    def generate_questions_prompt(skill, subskills, difficulty_band):
+    def topic_context(skill, subskills):
+        # Background for the batch prompts: the start of each topic's Wikipedia summary (cached on disk)
+        if PROMPT_CONTEXT_CHARS <= 0:
+            return {}
+        context = {}
+        for topic in dict.fromkeys([skill] + subskills):
+            content = fetch_wikipedia_content(topic)
+            if content:
+                context[topic] = content[:PROMPT_CONTEXT_CHARS].strip()
+        return context
+
+    def expand_skill(skill):
+        subskills = expand_skills_with_gemini(skill)
+        return subskills, topic_context(skill, subskills)
+
+    def generate_questions_prompt(skill, subskills, difficulty_band, count=20, context=None):
         difficulty_descriptor = {
             "good": "easy and theory-based, suitable for beginners",
             "better": "moderate difficulty, mixing theory and practical concepts",
@@ -68,7 +142,7 @@ def prepare_question_batches(skills_with_priorities, jd_experience_range, job_id
         }[difficulty_band]
 
         prompt = f"""
-    Generate 20 unique and diverse multiple-choice questions (MCQs) on the skill '{skill}' and its subskills: {", ".join(subskills)}.
+    Generate {count} unique and diverse multiple-choice questions (MCQs) on the skill '{skill}' and its subskills: {", ".join(subskills)}.
     The questions should be {difficulty_descriptor}.
     Guidelines:
     1. Each question must be different in wording and concept.
@@ -80,94 +154,58 @@ def prepare_question_batches(skills_with_priorities, jd_experience_range, job_id
     "Question text\n\n(A) Option A\n(B) Option B\n(C) Option C\n(D) Option D\n\nCorrect Answer: (B)"
     7. Return the questions as a list of strings, separated by commas, enclosed in square brackets, e.g., ["question1...", "question2..."].
 
-    Return ONLY the list of 20 formatted MCQs. No extra text, no explanations, no code block markers (like ```json or ```python).
+    Return ONLY the list of {count} formatted MCQs. No extra text, no explanations, no code block markers (like ```json or ```python).
+    """
+        if context:
+            background = "\n".join(f"- {topic}: {summary}" for topic, summary in context.items())
+            prompt += f"""
+    Background on these topics, from Wikipedia; use it to keep the questions and answers accurate, but do not quote it:
+    {background}
     """
         return prompt.strip()
 
-    def parse_question(question_text):
-        # Split the question text into lines
-        lines = [line.strip() for line in question_text.strip().split("\n") if line.strip()]
-        if len(lines) != 6:  # Expect exactly 6 lines (question, 4 options, correct answer)
-            print(f"Invalid question format (wrong number of lines, got {len(lines)}): {question_text}")
-            return None
-
-        question = lines[0]
-        # Extract options (remove "(A) ", "(B) ", etc.)
-        option_a = re.sub(r'^\(A\)\s*', '', lines[1])
-        option_b = re.sub(r'^\(B\)\s*', '', lines[2])
-        option_c = re.sub(r'^\(C\)\s*', '', lines[3])
-        option_d = re.sub(r'^\(D\)\s*', '', lines[4])
-        # Extract correct answer (e.g., "Correct Answer: (B)" -> "B")
-        correct_answer_line = lines[5]
-        match = re.match(r'Correct Answer:\s*\(([A-D])\)\s*$', correct_answer_line)
-        if not match:
-            print(f"Invalid correct answer format in line: '{correct_answer_line}'")
-            return None
-        correct_answer = match.group(1)
-
-        return {
-            "question": question,
-            "option_a": option_a,
-            "option_b": option_b,
-            "option_c": option_c,
-            "option_d": option_d,
-            "correct_answer": correct_answer
-        }
-
-    def parse_response(raw_text):
-        # Remove code block markers if present (e.g., ```json ... ``` or ```python ... ```)
-        raw_text = raw_text.strip()
-        raw_text = re.sub(r'^```(json|python)\s*\n', '', raw_text, flags=re.MULTILINE)
-        raw_text = re.sub(r'\n```$', '', raw_text, flags=re.MULTILINE)
-        raw_text = raw_text.strip()
-
-        # Check if the response is a list
-        if not (raw_text.startswith("[") and raw_text.endswith("]")):
-            print(f"⚠️ Response is not a list after cleaning: {raw_text}")
-            return []
-
-        content = raw_text[1:-1].strip()
-        if not content:
-            return []
-
-        # Manually parse the list by tracking quoted strings and commas
-        questions = []
-        current_question = []
-        inside_quote = False
-        current_line = ""
-
-        for char in content:
-            if char == '"':
-                inside_quote = not inside_quote
-                current_line += char
-            elif char == ',' and not inside_quote:
-                # End of a question string
-                if current_line:
-                    current_question.append(current_line.strip('"'))
-                    question_text = "\n".join(current_question)
-                    questions.append(question_text)
-                    current_question = []
-                    current_line = ""
-            else:
-                current_line += char
-                if char == "\n":
-                    current_question.append(current_line.strip())
-                    current_line = ""
-
-        # Handle the last question
-        if current_line:
-            current_question.append(current_line.strip('"'))
-            question_text = "\n".join(current_question)
-            questions.append(question_text)
-
-        return questions
+    def generate_batch(skill, subskills, difficulty_band, count, context=None):
+        # Ask for the full batch, then only for what is still missing after parsing
+        # (rejected or absent items), at most GENERATION_REPAIR_ATTEMPTS more times
+        questions, rejected, seen = [], [], set()
+        for attempt in range(1 + GENERATION_REPAIR_ATTEMPTS):
+            missing = count - len(questions)
+            if missing <= 0:
+                break
+            if attempt:
+                print(f"🔁 [{difficulty_band.upper()}] {skill}: asking for {missing} more questions (repair {attempt})")
+            prompt = generate_questions_prompt(skill, subskills, difficulty_band, missing, context)
+            try:
+                # Not response-cached: reuse of questions goes through the MCQ pool, and a cached
+                # answer would only hand back questions the pool already has
+                response = send_prompt(model_gemini, prompt, use_cache=False)
+            except Exception:
+                if not attempt:
+                    raise
+                print(f"⚠️ Repair request failed for {skill} in {difficulty_band} band, keeping {len(questions)} questions")
+                break
+            if not (response and isinstance(response.text, str)):
+                continue
+            parsed, batch_rejected = parse_mcq_response(response.text)
+            rejected.extend(batch_rejected)
+            for question in parsed:
+                key = " ".join(question["question"].lower().split())
+                if key in seen:
+                    rejected.append({"item": question["question"], "reason": "duplicate question"})
+                    continue
+                seen.add(key)
+                questions.append(question)
+        return questions[:count], rejected
 
     # Initialize
-    band_ranges = divide_experience_range(jd_experience_range)
-    knowledge_base = {}
-    question_bank = {"good": {}, "better": {}, "perfect": {}}
-    total_questions_saved = 0
-
+    completed_batches = 0
+
+    # Resolve skills and serve as much as possible from the shared pool up front;
+    # only this thread touches the database session
+    needed_per_skill = questions_needed_per_skill(job_id)
+    already_saved = saved_counts(job_id)
+    total_questions_saved = sum(already_saved.values())
+    skills = []
     for skill_data in skills_with_priorities:
         skill_name = skill_data["name"]
         print(f"\n📌 Processing Skill: {skill_name} (Priority: {skill_data['priority']})")
@@ -177,76 +215,72 @@ def prepare_question_batches(skills_with_priorities, jd_experience_range, job_id
         if not skill:
             print(f"⚠️ Skill {skill_name} not found in database. Skipping...")
             continue
-        skill_id = skill.skill_id
-
-        subskills = expand_skills_with_gemini(skill_name)
-        all_topics = [skill_name] + subskills
-
-        # Fetch and store Wikipedia summaries
-        for topic in all_topics:
-            if topic not in knowledge_base:
-                content = fetch_wikipedia_content(topic)
-                if content:
-                    embedding = embedding_model.encode(content)
-                    knowledge_base[topic] = {
-                        "content": content,
-                        "embedding": np.array(embedding)
-                    }
-
-        # Generate MCQ batches per band
-        for band in ["good", "better", "perfect"]:
-            key = f"{skill_name}"
-            if key not in question_bank[band]:
-                question_bank[band][key] = []
 
-            prompt = generate_questions_prompt(skill_name, subskills, band)
+        needed = needed_per_skill.get(skill.skill_id, 0)
+        shortfall = {}
+        for band in ["good", "better", "perfect"]:
+            missing = needed - already_saved.get((skill.skill_id, band), 0)
+            if missing <= 0:
+                continue
+            reused = take_from_pool(job_id, skill.skill_id, band, missing)
+            total_questions_saved += reused
+            if reused < missing:
+                shortfall[band] = missing - reused
+        print(f"♻️ {skill_name}: {needed} questions needed per band, still to generate: {shortfall or 'none'}")
+        if shortfall:
+            skills.append((skill_name, skill.skill_id, shortfall))
+    total_batches = sum(len(shortfall) for _, _, shortfall in skills)
+    if report_progress:
+        report_progress({
+            "completed_batches": 0,
+            "total_batches": total_batches,
+            "questions_generated": total_questions_saved
+        })
+
+    with ThreadPoolExecutor(max_workers=GENERATION_CONCURRENCY) as executor:
+        # Expand all skills concurrently (subskills, then their Wikipedia background) and fan out each
+        # skill's band prompts as soon as that arrives
+        expansions = {
+            executor.submit(expand_skill, skill_name): (skill_name, skill_id, shortfall)
+            for skill_name, skill_id, shortfall in skills
+        }
+        batches = {}
+        for future in as_completed(expansions):
+            skill_name, skill_id, shortfall = expansions[future]
+            subskills, context = future.result()
+            for band, count in shortfall.items():
+                batch = executor.submit(generate_batch, skill_name, subskills, band, count, context)
+                batches[batch] = (skill_name, skill_id, band, count)
+
+        # Store MCQ batches as they complete
+        for future in as_completed(batches):
+            skill_name, skill_id, band, count = batches[future]
             try:
-                chat = model_gemini.start_chat(history=[{"role": "user", "parts": [prompt]}])
-                response = chat.send_message(prompt)
-                if response and isinstance(response.text, str):
-                    raw_text = response.text.strip()
-                    questions = parse_response(raw_text)
-
-                    print(f"✅ [{band.upper()}] {skill_name}: {len(questions)} questions generated")
-
-                    # Parse and store questions in the database
-                    for q in questions:
-                        parsed = parse_question(q)
-                        if not parsed:
-                            print(f"⚠️ Invalid question format for {skill_name} in {band} band: {q}")
-                            continue
-
-                        try:
-                            mcq = MCQ(
-                                job_id=job_id,
-                                skill_id=skill_id,
-                                question=parsed["question"],
-                                option_a=parsed["option_a"],
-                                option_b=parsed["option_b"],
-                                option_c=parsed["option_c"],
-                                option_d=parsed["option_d"],
-                                correct_answer=parsed["correct_answer"],
-                                difficulty_band=band
-                            )
-                            db.session.add(mcq)
-                            total_questions_saved += 1
-                            print(f"Added MCQ: {parsed['question']} (Band: {band}, Correct Answer: {parsed['correct_answer']})")
-                        except Exception as e:
-                            print(f"⚠️ Error adding MCQ to session for {skill_name} in {band} band: {e}")
-                            print(f"MCQ data: {parsed}")
+                questions, rejected = future.result()
+                print(f"✅ [{band.upper()}] {skill_name}: {len(questions)}/{count} questions generated, {len(rejected)} rejected")
+                for item in rejected:
+                    print(f"⚠️ Rejected question for {skill_name} in {band} band ({item['reason']}): {item['item']}")
+
+                # Commit per (skill, band) so a later failure cannot take these questions with it
+                try:
+                    save_questions(job_id, skill_id, band, questions)
+                    db.session.commit()
+                    total_questions_saved += len(questions)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"⚠️ Error saving questions for {skill_name} in {band} band: {e}")
             except TooManyRequests:
-                print("⛔️ Gemini quota exceeded. Retrying in 10 seconds...")
-                time.sleep(10)
+                print(f"⛔️ Gemini quota still exceeded after retries for {skill_name} in {band} band")
             except Exception as e:
                 print(f"⚠️ Error generating batch for {skill_name} in {band} band: {e}")
-            time.sleep(1.5)
-
-    # Commit all questions to the database
-    try:
-        db.session.commit()
-        print(f"✅ {total_questions_saved} questions saved to the database.")
-    except Exception as e:
-        db.session.rollback()
-        print(f"⚠️ Error saving questions to database: {e}")
-
-    print("\n✅ Question generation completed!")
\ No newline at end of file
+            completed_batches += 1
+            if report_progress:
+                report_progress({
+                    "completed_batches": completed_batches,
+                    "total_batches": total_batches,
+                    "questions_generated": total_questions_saved
+                })
+
+    print(f"✅ {total_questions_saved} questions saved to the database.")
+    print("\n✅ Question generation completed!")
+    return total_questions_saved
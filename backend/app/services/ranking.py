@@ -0,0 +1,289 @@
+import numpy as np
+from sqlalchemy import and_, delete, or_, select
+from app import db
+from app.models.assessment_registration import AssessmentRegistration
+from app.models.candidate import Candidate
+from app.models.candidate_ranking import CandidateRanking
+from app.models.candidate_skill import CandidateSkill
+from app.models.job import JobDescription
+from app.models.required_skill import RequiredSkill
+from app.models.skill import Skill
+from app.services.sql_dialect import dialect_insert
+from app.utils.read_replica import primary_reads
+
+MAX_PROFICIENCY = 8  # Advanced, the highest level infer_proficiency assigns
+SKILL_WEIGHT = 0.7
+EXPERIENCE_WEIGHT = 0.3
+
+# Page size for the recruiter's ranking page, and the most a client may ask for
+RANKING_PAGE_SIZE = 50
+RANKING_MAX_PAGE_SIZE = 500
+# Rows read and described per step of a full ranking export
+RANKING_EXPORT_CHUNK = 1000
+
+
+def ranked_page(job, cursor=None, limit=RANKING_PAGE_SIZE):
+    """One page of a job's ranking, read from candidate_rankings in (match_score DESC, candidate_id) order.
+
+    Only the page's candidates are loaded and described, so the cost does not grow with the number
+    of registrations. Pass the returned cursor back for the next page. Returns (rows, next_cursor
+    or None). Raises ValueError for a malformed cursor.
+    """
+    query = (
+        select(CandidateRanking.candidate_id, CandidateRanking.match_score)
+        .where(CandidateRanking.job_id == job.job_id)
+        .order_by(CandidateRanking.match_score.desc(), CandidateRanking.candidate_id)
+        .limit(limit + 1)
+    )
+    first_rank = 1
+    if cursor:
+        score, candidate_id, first_rank = decode_cursor(cursor)
+        query = query.where(or_(
+            CandidateRanking.match_score < score,
+            and_(CandidateRanking.match_score == score, CandidateRanking.candidate_id > candidate_id)
+        ))
+    ranked = db.session.execute(query).all()
+    if ranked or cursor:
+        return _page_rows(job, ranked, limit, first_rank)
+    # An empty first page from a lagging replica does not mean the rankings are missing: decide on
+    # the primary, and materialise them there only if it has none either (e.g. registrations
+    # imported directly)
+    with primary_reads():
+        ranked = db.session.execute(query).all()
+        if not ranked and _has_registrations(job.job_id):
+            refresh_job_rankings(job.job_id)
+            db.session.commit()
+            ranked = db.session.execute(query).all()
+        return _page_rows(job, ranked, limit, first_rank)
+
+
+def iter_ranking(job, chunk_size=RANKING_EXPORT_CHUNK):
+    """Every row of a job's ranking, in order, read and described chunk_size candidates at a time.
+
+    A generator for streaming exports: memory holds one chunk, however many candidates registered.
+    """
+    cursor = None
+    while True:
+        rows, cursor = ranked_page(job, cursor=cursor, limit=chunk_size)
+        yield from rows
+        if not cursor:
+            return
+
+
+def encode_cursor(score, candidate_id, next_rank):
+    # repr round-trips the float exactly, so the keyset comparison resumes at the right row
+    return f"{score!r}_{candidate_id}_{next_rank}"
+
+
+def decode_cursor(cursor):
+    score, candidate_id, next_rank = cursor.rsplit("_", 2)
+    return float(score), int(candidate_id), int(next_rank)
+
+
+def refresh_job_rankings(job_id):
+    """Recompute candidate_rankings for everyone registered for one job, e.g. after its required skills change.
+
+    Rows of candidates no longer registered are removed. The caller commits.
+    """
+    db.session.flush()
+    job = db.session.get(JobDescription, job_id)
+    if job is None:
+        return
+    registered = select(AssessmentRegistration.candidate_id).where(AssessmentRegistration.job_id == job_id)
+    db.session.execute(delete(CandidateRanking).where(
+        CandidateRanking.job_id == job_id, CandidateRanking.candidate_id.not_in(registered)
+    ))
+    _store_rankings(_match_rows(job))
+
+
+def refresh_candidate_rankings(candidate_id):
+    """Recompute one candidate's candidate_rankings rows, e.g. after their skills or experience change.
+
+    Only the jobs the candidate is registered for are scored, and only for this candidate. The caller commits.
+    """
+    db.session.flush()
+    registered = select(AssessmentRegistration.job_id).where(AssessmentRegistration.candidate_id == candidate_id)
+    db.session.execute(delete(CandidateRanking).where(
+        CandidateRanking.candidate_id == candidate_id, CandidateRanking.job_id.not_in(registered)
+    ))
+    rows = []
+    for job in JobDescription.query.filter(JobDescription.job_id.in_(registered)).all():
+        rows += _match_rows(job, candidate_ids=[candidate_id])
+    _store_rankings(rows)
+
+
+def run_rankings_rebuild(payload, report_progress):
+    # Background job entry point (see app.services.job_queue): rebuild candidate_rankings for the
+    # given jobs, or all of them. Needed after registrations are written outside the app
+    job_ids = payload.get("job_ids") or [job_id for (job_id,) in db.session.query(JobDescription.job_id)]
+    for done, job_id in enumerate(job_ids, 1):
+        refresh_job_rankings(job_id)
+        db.session.commit()
+        report_progress({"jobs_done": done, "jobs_total": len(job_ids)})
+    return {"jobs": len(job_ids)}
+
+
+def _has_registrations(job_id):
+    return db.session.execute(
+        select(AssessmentRegistration.candidate_id).where(AssessmentRegistration.job_id == job_id).limit(1)
+    ).first() is not None
+
+
+def _match_rows(job, candidate_ids=None):
+    candidates, _, _, scores = _score_job(job, candidate_ids)
+    return [
+        {"candidate_id": candidate.candidate_id, "job_id": job.job_id, "match_score": total}
+        for candidate, total in zip(candidates, scores[3].tolist())
+    ]
+
+
+def _store_rankings(rows):
+    if not rows:
+        return
+    upsert = dialect_insert(CandidateRanking)
+    db.session.execute(upsert.on_conflict_do_update(
+        index_elements=["candidate_id", "job_id"],
+        set_={"match_score": upsert.excluded.match_score}
+    ), rows)
+
+
+def _page_rows(job, ranked, limit, first_rank):
+    # ranked: up to limit + 1 (candidate_id, match_score) in rank order; the extra row means there is a next page
+    page = ranked[:limit]
+    if not page:
+        return [], None
+    candidates, required, proficiency, scores = _score_job(job, candidate_ids=[c for c, _ in page])
+    index = {candidate.candidate_id: i for i, candidate in enumerate(candidates)}
+    # A candidate whose registration was removed since the last refresh has no row to describe
+    page = [(candidate_id, score) for candidate_id, score in page if candidate_id in index]
+    order = [index[candidate_id] for candidate_id, _ in page]
+    rows = _ranking_rows(job, candidates, required, proficiency, scores, order,
+                         [round(score, 2) for _, score in page], first_rank)
+
+    next_cursor = None
+    if len(ranked) > limit:
+        last_candidate_id, last_score = ranked[limit - 1]
+        next_cursor = encode_cursor(last_score, last_candidate_id, first_rank + limit)
+    return rows, next_cursor
+
+
+def _score_job(job, candidate_ids=None):
+    # (candidates, required, proficiency, (skill_score, experience_score, experience_diff, total))
+    candidates, required, proficiency = load_ranking_inputs(job.job_id, candidate_ids)
+    priorities = np.array([priority for _, priority, _ in required], dtype=np.int64)
+    # No experience on file counts as 0 years (None becomes NaN in a float array)
+    years = np.nan_to_num(np.array([c.years_of_experience for c in candidates], dtype=np.float64), nan=0.0)
+    return candidates, required, proficiency, score_candidates(job, years, proficiency, priorities)
+
+
+def _ranking_rows(job, candidates, required, proficiency, scores, order, total_scores, first_rank):
+    # Response rows for the candidates at `order` (indexes into candidates), in that order
+    skill_scores, exp_scores, exp_diffs, _ = (values.tolist() for values in scores)
+    descriptions = describe_rankings(job, [r[2] for r in required], proficiency, order, candidates, exp_diffs)
+    return [{
+        'candidate_id': candidates[i].candidate_id,
+        'name': candidates[i].name,
+        'email': candidates[i].email,
+        'total_score': total_score,
+        'skill_score': round(skill_scores[i], 2),
+        'experience_score': round(exp_scores[i], 2),
+        'description': description,
+        'rank': rank
+    } for rank, (i, total_score, description) in enumerate(zip(order, total_scores, descriptions), first_rank)]
+
+
+def load_ranking_inputs(job_id, candidate_ids=None):
+    # (candidates, [(skill_id, priority, name)], proficiency matrix [candidate, required skill]),
+    # for every registered candidate or only the registered ones among candidate_ids.
+    # Executed as Core statements: rows come back as plain tuples, without the ORM's per-row work
+    connection = db.session.connection()
+    registered = AssessmentRegistration.job_id == job_id
+    if candidate_ids is not None:
+        registered = and_(registered, AssessmentRegistration.candidate_id.in_(candidate_ids))
+    candidates = connection.execute(
+        select(Candidate.candidate_id, Candidate.name, Candidate.email, Candidate.years_of_experience)
+        .join(AssessmentRegistration, AssessmentRegistration.candidate_id == Candidate.candidate_id)
+        .where(registered)
+    ).all()
+    required = connection.execute(
+        select(RequiredSkill.skill_id, RequiredSkill.priority, Skill.name)
+        .outerjoin(Skill, Skill.skill_id == RequiredSkill.skill_id)
+        .where(RequiredSkill.job_id == job_id)
+    ).all()
+
+    proficiency = np.zeros((len(candidates), len(required)), dtype=np.int64)
+    if candidates and required:
+        skill_column = {skill_id: j for j, (skill_id, _, _) in enumerate(required)}
+        rows = connection.execute(
+            select(CandidateSkill.candidate_id, CandidateSkill.skill_id, CandidateSkill.proficiency)
+            .join(AssessmentRegistration, AssessmentRegistration.candidate_id == CandidateSkill.candidate_id)
+            .where(registered, CandidateSkill.skill_id.in_(list(skill_column)))
+        ).all()
+        if rows:
+            candidate_ids, skill_ids, values = zip(*rows)
+            registered_ids = np.array([c.candidate_id for c in candidates], dtype=np.int64)
+            by_id = np.argsort(registered_ids)
+            row_index = by_id[np.searchsorted(registered_ids, np.array(candidate_ids, dtype=np.int64), sorter=by_id)]
+            column_index = np.array([skill_column[skill_id] for skill_id in skill_ids], dtype=np.int64)
+            proficiency[row_index, column_index] = [value or 0 for value in values]
+    return candidates, required, proficiency
+
+
+def score_candidates(job, years, proficiency, priorities):
+    """Vectorised ranking formula; returns (skill_score, experience_score, experience_diff, total) arrays.
+
+    skill_score is the priority-weighted sum of the candidate's positive proficiencies over the best
+    possible (every required skill at MAX_PROFICIENCY). experience_score falls linearly from 1 at the
+    middle of the job's experience range to 0 at its edges (always 1 for a zero-width range).
+    total = 0.7 * skill_score + 0.3 * experience_score. Operations are ordered like the per-candidate
+    loop this replaced, so the float64 results are bit-identical.
+    """
+    max_skill_score = int(priorities.sum()) * MAX_PROFICIENCY
+    if max_skill_score > 0:
+        skill_scores = np.where(proficiency > 0, proficiency, 0) @ priorities / max_skill_score
+    else:
+        skill_scores = np.zeros(len(years))
+
+    exp_midpoint = (job.experience_min + job.experience_max) / 2
+    exp_range = job.experience_max - job.experience_min
+    exp_diffs = np.abs(years - exp_midpoint)
+    if exp_range > 0:
+        exp_scores = np.maximum(0, 1 - (exp_diffs / (exp_range / 2)))
+    else:
+        exp_scores = np.ones(len(years))
+
+    totals = (SKILL_WEIGHT * skill_scores) + (EXPERIENCE_WEIGHT * exp_scores)
+    return skill_scores, exp_scores, exp_diffs, totals
+
+
+def describe_rankings(job, skill_names, proficiency, order, candidates, exp_diffs):
+    # One sentence per candidate in `order`; skill fragments are formatted once per (skill, proficiency)
+    fragments = {}
+    requirement = f" the job's {job.experience_min}-{job.experience_max} year requirement."
+    matrix = proficiency.tolist()
+    descriptions = []
+    for i in order:
+        matched_skills = []
+        for j, value in enumerate(matrix[i]):
+            if value > 0:
+                fragment = fragments.get((j, value))
+                if fragment is None:
+                    fragment = fragments[(j, value)] = f"{skill_names[j]} (Proficiency: {value})"
+                matched_skills.append(fragment)
+        candidate = candidates[i]
+        if matched_skills:
+            skills = f"strong skills in {', '.join(matched_skills)}"
+        else:
+            skills = "limited skill matches"
+        exp_diff = exp_diffs[i]
+        if exp_diff < 0.5:
+            fit = "closely matches"
+        elif exp_diff < 1.5:
+            fit = "reasonably matches"
+        else:
+            fit = "is outside"
+        descriptions.append(
+            f"{candidate.name} is ranked based on {skills} and {candidate.years_of_experience} "
+            f"years of experience, which {fit}{requirement}"
+        )
+    return descriptions
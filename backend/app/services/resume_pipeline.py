@@ -0,0 +1,384 @@
+import bisect
+import hashlib
+import json
+import logging
+import threading
+import time
+from sqlalchemy import select
+from app import db
+from app.models.candidate import Candidate
+from app.models.resume_json import ResumeJSON
+from app.models.skill import Skill
+from app.models.candidate_skill import CandidateSkill
+from app.services.llm import configure_gemini, get_generative_model, send_prompt
+from app.services.pdf_extraction import extract_pdf_text
+from app.services.ranking import refresh_candidate_rankings
+from app.services.sql_dialect import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+RESUME_MODEL_NAME = "gemini-1.5-pro-latest"
+# Part of every resume hash: bump it when the prompt or model changes so stored analyses stop matching
+RESUME_ANALYSIS_VERSION = 1
+
+
+def run_resume_job(payload, report_progress):
+    # Background job entry point (see app.services.job_queue): extract -> analyse -> score -> persist.
+    # Analyses are stored by resume hash and persist is an upsert, so a re-run is cheap and safe
+    candidate_id = payload["candidate_id"]
+
+    report_progress({"stage": "extract"})
+    with open(payload["resume_path"], "rb") as f:
+        data = f.read()
+    content_hash = hash_resume_bytes(data)
+    cached = find_cached_analysis(content_hash=content_hash)
+    if cached:
+        _count_cache("content_hits")
+        parsed_data, text_hash = cached.raw_resume, cached.text_hash
+    else:
+        resume_text = extract_text_from_pdf(data)
+        if not resume_text:
+            raise ValueError("Failed to extract text from the resume. Please ensure the file is a valid, non-corrupted PDF.")
+        text_hash = hash_resume_text(resume_text)
+        cached = find_cached_analysis(text_hash=text_hash)
+        if cached:
+            # Same text in a different file (re-exported or re-saved PDF)
+            _count_cache("text_hits")
+            parsed_data = cached.raw_resume
+        else:
+            report_progress({"stage": "analyse"})
+            started = time.monotonic()
+            gemini_output = analyze_resume(resume_text)
+            if not gemini_output:
+                raise ValueError("Failed to parse resume with Gemini API.")
+            parsed_data = refine_json_output(gemini_output)
+            if not parsed_data:
+                raise ValueError("Failed to parse Gemini API output.")
+            _count_cache("misses", time.monotonic() - started)
+    remember_analysis(candidate_id, parsed_data, content_hash, text_hash)
+    db.session.commit()
+
+    report_progress({"stage": "score"})
+    scored_skills = score_skills(parsed_data)
+
+    report_progress({"stage": "persist", "skills_found": len(scored_skills)})
+    candidate = db.session.get(Candidate, candidate_id)
+    if candidate is None or candidate.resume != payload["resume"]:
+        # A newer upload replaced this resume while it was being processed; its own job persists the skills
+        return {"skills": [], "superseded": True, "resume_cache": resume_cache_stats()}
+    persist_candidate_skills(candidate_id, scored_skills)
+    db.session.commit()
+    return {
+        "skills": [{"name": name, "proficiency": proficiency} for name, proficiency in scored_skills],
+        "resume_cache": resume_cache_stats()
+    }
+
+
+def apply_cached_analysis(candidate_id, data):
+    """Score and persist skills from a stored analysis of exactly these PDF bytes, without extraction or Gemini.
+
+    Returns the scored skills, or None when the file has not been analysed before. The caller commits.
+    """
+    content_hash = hash_resume_bytes(data)
+    cached = find_cached_analysis(content_hash=content_hash)
+    if cached is None:
+        return None
+    _count_cache("content_hits")
+    remember_analysis(candidate_id, cached.raw_resume, content_hash, cached.text_hash)
+    scored_skills = score_skills(cached.raw_resume)
+    persist_candidate_skills(candidate_id, scored_skills)
+    return scored_skills
+
+
+def hash_resume_bytes(data):
+    return hashlib.sha256(f"v{RESUME_ANALYSIS_VERSION}\n".encode() + data).hexdigest()
+
+
+def hash_resume_text(text):
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"v{RESUME_ANALYSIS_VERSION}\n{normalized}".encode()).hexdigest()
+
+
+def find_cached_analysis(content_hash=None, text_hash=None):
+    query = ResumeJSON.query
+    if content_hash:
+        query = query.filter(ResumeJSON.content_hash == content_hash)
+    else:
+        query = query.filter(ResumeJSON.text_hash == text_hash)
+    return query.order_by(ResumeJSON.created_at.desc()).first()
+
+
+def remember_analysis(candidate_id, raw_resume, content_hash, text_hash):
+    # One row per candidate and file; a hit on another candidate's upload still gets its own row
+    exists = db.session.query(ResumeJSON.resume_json_id).filter_by(
+        candidate_id=candidate_id, content_hash=content_hash
+    ).first()
+    if not exists:
+        db.session.add(ResumeJSON(
+            candidate_id=candidate_id, raw_resume=raw_resume, content_hash=content_hash, text_hash=text_hash
+        ))
+
+
+# Per-process counters, like the other caches' stats()
+_cache_counts = {"content_hits": 0, "text_hits": 0, "misses": 0}
+_analysis_seconds = 0.0
+_cache_lock = threading.Lock()
+
+
+def _count_cache(outcome, analysis_seconds=0.0):
+    global _analysis_seconds
+    with _cache_lock:
+        _cache_counts[outcome] += 1
+        _analysis_seconds += analysis_seconds
+
+
+def resume_cache_stats():
+    with _cache_lock:
+        hits = _cache_counts["content_hits"] + _cache_counts["text_hits"]
+        lookups = hits + _cache_counts["misses"]
+        average_analysis = _analysis_seconds / _cache_counts["misses"] if _cache_counts["misses"] else 0.0
+        return dict(
+            _cache_counts,
+            hit_rate=round(hits / lookups, 4) if lookups else 0.0,
+            # Gemini time the hits did not spend, at the average latency of the analyses that ran
+            llm_seconds_saved=round(hits * average_analysis, 1)
+        )
+
+
+def extract_text_from_pdf(data):
+    try:
+        if not data.startswith(b'%PDF-'):
+            raise ValueError("The uploaded file is not a valid PDF.")
+        # Process pool with page/time limits and backend fallback (app.services.pdf_extraction)
+        return extract_pdf_text(data)
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {e}")
+        return None
+
+
+def analyze_resume(resume_text):
+    try:
+        configure_gemini()
+        model = get_generative_model(RESUME_MODEL_NAME)
+        prompt = f"""
+You are a JSON assistant. Extract and return ONLY valid JSON in the following format (no comments or explanations):
+
+{{
+  "Skills": {{
+    "Technical Skills": [],
+    "Soft Skills": [],
+    "Tools": []
+  }},
+  "Work Experience": [
+    {{
+      "Company": "",
+      "Title": "",
+      "Start Date": "",
+      "End Date": "",
+      "Description": "",
+      "Technologies": ""
+    }}
+  ],
+  "Projects": [
+    {{
+      "Title": "",
+      "Description": "",
+      "Technologies": ""
+    }}
+  ],
+  "Education": [
+    {{
+      "Degree": "",
+      "Institution": "",
+      "Graduation Year": 0,
+      "Certification": false
+    }}
+  ]
+}}
+
+Extract skills and related information from the resume as follows:
+- Under "Skills", categorize into "Technical Skills", "Soft Skills", and "Tools".
+- Under "Work Experience", include each work experience with a brief "Description" and "Technologies".
+- Under "Projects", list each project with its "Title", "Description", and "Technologies".
+- Infer technologies for both "Work Experience" and "Projects":
+  - If "Jupyter Notebook", "Google Collab", "Flask", or "Jupyter" is mentioned, include "Python" in Technologies.
+  - If React is mentioned, include "JavaScript" in Technologies.
+  - If terms like "deep learning", "reinforcement learning", "AIML", or "AI" are mentioned, include "Artificial Intelligence" and "Machine Learning" in Technologies.
+  - If terms like "data structures", "algorithms", or "programming" are mentioned, include the relevant programming language (e.g., "Python", "Java") if specified.
+- Include skills like "Excel Pivoting" and "GitHub" in "Technical Skills" if mentioned, even if they might also be considered tools.
+
+Resume:
+{resume_text}
+        """
+        # Resumes are personal data: keep them out of the shared on-disk response cache
+        response = send_prompt(model, prompt, use_cache=False)
+        logger.debug(f"Raw Gemini API output: {response.text}")
+        return response.text
+    except Exception as e:
+        logger.error(f"Error during Gemini API call: {e}")
+        return None
+
+
+def refine_json_output(json_string):
+    try:
+        cleaned = json_string.strip().removeprefix("```json").removesuffix("```").strip()
+        result = json.loads(cleaned)
+        return result
+    except Exception as e:
+        logger.error(f"Error parsing JSON: {e}")
+        return None
+
+
+STRONG_KEYWORDS = ("developed", "built", "implemented", "designed", "used", "created", "led", "integrated", "deployed")
+
+RELATED_TERMS = {
+    "artificial intelligence": ["ai", "aiml", "reinforcement learning", "deep learning"],
+    "machine learning": ["ml", "aiml", "deep learning", "reinforcement learning"],
+    "python": ["jupyter notebook", "google collab", "flask", "jupyter"],
+    "javascript": ["react", "ajax"]
+}
+
+
+def infer_proficiency(skill, work_experience, education, projects):
+    return infer_proficiencies([skill], work_experience, education, projects)[skill.lower()]
+
+
+def infer_proficiencies(skills, work_experience, education, projects):
+    """Proficiency (4 beginner, 6 intermediate, 8 advanced) for every skill, keyed by lowercased name.
+
+    Scoring per entry: the skill named +2 and a related term +2 (education: +1 each); if either matched,
+    a strong keyword +2 (education: "certification" +2); the skill named twice or more +1 (not education).
+    Entry texts are built once and every needle is searched once across all of them.
+    """
+    skill_lowers = list(dict.fromkeys(skill.lower() for skill in skills))
+    # needle -> skills it can score: the skill itself and the skills it is a related term of
+    scored_by = {s: [s] for s in skill_lowers}
+    for s in skill_lowers:
+        for term in RELATED_TERMS.get(s, ()):
+            scored_by.setdefault(term, []).append(s)
+
+    sections = [
+        (work_experience, ("Title", "Description", "Technologies"), 2, STRONG_KEYWORDS, True),
+        (projects, ("Title", "Description", "Technologies"), 2, STRONG_KEYWORDS, True),
+        (education, ("Degree", "Institution"), 1, ("certification",), False),
+    ]
+    texts = [
+        " ".join(str(entry.get(field, "")) for field in fields).lower()
+        for entries, fields, *_ in sections for entry in entries
+    ]
+    occurrences = _find_occurrences(list(scored_by) + list(STRONG_KEYWORDS) + ["certification"], texts)
+
+    scores = dict.fromkeys(skill_lowers, 0)
+    entry_occurrences = iter(occurrences)
+    for entries, _, weight, bonus_terms, count_bonus in sections:
+        for _ in entries:
+            found_in_entry = next(entry_occurrences)
+            bonus = any(term in found_in_entry for term in bonus_terms)
+            # Only skills with a needle in this entry can score here
+            matched = {s for needle in found_in_entry if needle in scored_by for s in scored_by[needle]}
+            for s in matched:
+                found = s in found_in_entry
+                related = any(term in found_in_entry for term in RELATED_TERMS.get(s, ()))
+                score = weight * (found + related)
+                if bonus and (found or related):
+                    score += 2
+                if count_bonus and found and _count_non_overlapping(found_in_entry[s], len(s)) >= 2:
+                    score += 1
+                scores[s] += score
+
+    proficiencies = {s: 8 if score >= 5 else 6 if score >= 2 else 4 for s, score in scores.items()}
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Skill scores: " + ", ".join(f"{s}={scores[s]}->{proficiencies[s]}" for s in skill_lowers))
+    return proficiencies
+
+
+def _find_occurrences(needles, texts):
+    """[{needle: start positions}] per text, counting overlapping occurrences like repeated str.find.
+
+    The texts are joined with NUL separators so each needle is one C-level search over the whole
+    resume; a per-resume regex alternation costs more to compile than these searches take.
+    """
+    joined = "\0".join(texts)
+    offsets, offset = [], 0
+    for text in texts:
+        offsets.append(offset)
+        offset += len(text) + 1
+    found = [{} for _ in texts]
+    find = joined.find
+    for needle in set(filter(None, needles)):
+        start = find(needle)
+        while start != -1:
+            index = bisect.bisect_right(offsets, start) - 1
+            found[index].setdefault(needle, []).append(start)
+            start = find(needle, start + 1)
+    return found
+
+
+def _count_non_overlapping(starts, length):
+    # What str.count returns, from the positions of all (overlapping) occurrences
+    count, next_free = 0, 0
+    for start in starts:
+        if start >= next_free:
+            count += 1
+            next_free = start + length
+    return count
+
+
+def score_skills(parsed_data):
+    # [(skill_name, proficiency)] for every skill the analysis listed
+    skills_data = parsed_data.get("Skills", {})
+    work_experience = parsed_data.get("Work Experience", [])
+    projects = parsed_data.get("Projects", [])
+    education = parsed_data.get("Education", [])
+
+    all_skills = (
+        skills_data.get("Technical Skills", []) +
+        skills_data.get("Soft Skills", []) +
+        skills_data.get("Tools", [])
+    )
+
+    skill_names = [name.strip() for name in all_skills if name.strip()]
+    proficiencies = infer_proficiencies(skill_names, work_experience, education, projects)
+    return [(name, proficiencies[name.lower()]) for name in skill_names]
+
+
+def persist_candidate_skills(candidate_id, scored_skills):
+    """Upsert the candidate's skills with at most four statements, however many skills the resume lists.
+
+    Existing skills are resolved with one IN query, missing ones created with a single
+    INSERT ... ON CONFLICT DO NOTHING RETURNING, and candidate_skills upserted in one statement.
+    The candidate's candidate_rankings rows are then recomputed. The caller commits.
+    """
+    # Later duplicates win, as they did when each skill was written in turn
+    proficiencies = dict(scored_skills)
+    if not proficiencies:
+        return
+    names = list(proficiencies)
+
+    skill_ids = dict(db.session.execute(
+        select(Skill.name, Skill.skill_id).where(Skill.name.in_(names))
+    ).all())
+    missing = [name for name in names if name not in skill_ids]
+    if missing:
+        created = dialect_insert(Skill).values([
+            {"name": name, "category": "technical"}  # Default to technical category
+            for name in missing
+        ]).on_conflict_do_nothing(index_elements=["name"]).returning(Skill.name, Skill.skill_id)
+        skill_ids.update(db.session.execute(created).all())
+        # Names another upload created between the two statements come back from neither
+        raced = [name for name in missing if name not in skill_ids]
+        if raced:
+            skill_ids.update(db.session.execute(
+                select(Skill.name, Skill.skill_id).where(Skill.name.in_(raced))
+            ).all())
+
+    upsert = dialect_insert(CandidateSkill).values([
+        {"candidate_id": candidate_id, "skill_id": skill_ids[name], "proficiency": proficiency}
+        for name, proficiency in proficiencies.items()
+    ])
+    db.session.execute(upsert.on_conflict_do_update(
+        index_elements=["candidate_id", "skill_id"],
+        set_={"proficiency": upsert.excluded.proficiency}
+    ))
+    refresh_candidate_rankings(candidate_id)
+
@@ -0,0 +1,156 @@
+import json
+from flask import current_app
+from sqlalchemy import select, text
+from app import db
+from app.models.assessment_state import AssessmentState
+
+
+class SessionState(dict):
+    """Live state of one assessment attempt.
+
+    Top-level assignments are tracked automatically, and mark_dirty() flags a
+    top-level key changed in place; save() rewrites those keys whole. Changes
+    deep inside growing values (performance_log, asked_questions, ...) go through
+    set_in(), add_to() and append_to() instead, so that save() only sends the
+    changed values and the appended items.
+    """
+
+    def __init__(self, attempt_id, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.attempt_id = attempt_id
+        self.dirty = set()
+        # [(op, path, value)] in order; op is 'set' or 'append', path a tuple of keys
+        self.changes = []
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.dirty.add(key)
+
+    def mark_dirty(self, *keys):
+        self.dirty.update(keys)
+
+    def set_in(self, path, value):
+        """Set a nested value, e.g. set_in(('current_band_per_skill', skill), 'better')."""
+        self._parent(path)[path[-1]] = value
+        self.changes.append(('set', path, value))
+
+    def add_to(self, path, amount):
+        """Add amount to a nested number, e.g. a performance_log counter."""
+        self.set_in(path, self._parent(path)[path[-1]] + amount)
+
+    def append_to(self, path, value):
+        """Append to a nested list, e.g. append_to(('performance_log', skill, 'responses'), response)."""
+        self._parent(path)[path[-1]].append(value)
+        self.changes.append(('append', path, value))
+
+    def clear_changes(self):
+        self.dirty.clear()
+        self.changes.clear()
+
+    def _parent(self, path):
+        target = self
+        for key in path[:-1]:
+            target = target[key]
+        return target
+
+
+class InMemorySessionStore:
+    """Keeps sessions in a process-local dict. Only valid with a single worker process."""
+
+    def __init__(self):
+        self._states = {}
+
+    def create(self, attempt_id, state):
+        session_state = SessionState(attempt_id, state)
+        self._states[attempt_id] = session_state
+        return session_state
+
+    def load(self, attempt_id):
+        return self._states.get(attempt_id)
+
+    def save(self, session_state):
+        session_state.clear_changes()
+
+    def delete(self, attempt_id):
+        self._states.pop(attempt_id, None)
+
+
+class DatabaseSessionStore:
+    """Keeps sessions in the assessment_states table so any worker can serve any attempt.
+
+    load() locks the row (SELECT ... FOR UPDATE) until save() or delete() commits, so
+    concurrent requests for one attempt, such as a double-clicked submit, run one after
+    the other instead of overwriting each other's answers. save() sends only what
+    changed: the top-level keys touched during the request are merged into the stored
+    JSONB document with ``||``, nested values are set with jsonb_set and appended
+    items added with jsonb_insert, so an answer does not resend the response log.
+    """
+
+    def create(self, attempt_id, state):
+        row = db.session.get(AssessmentState, attempt_id)
+        if row:
+            row.state = state
+        else:
+            db.session.add(AssessmentState(attempt_id=attempt_id, state=state))
+        db.session.commit()
+        return SessionState(attempt_id, state)
+
+    def load(self, attempt_id):
+        state = db.session.execute(
+            select(AssessmentState.state).where(AssessmentState.attempt_id == attempt_id).with_for_update()
+        ).scalar_one_or_none()
+        if state is None:
+            return None
+        return SessionState(attempt_id, state)
+
+    def save(self, session_state):
+        expression, params = update_expression(session_state)
+        if params:
+            params['attempt_id'] = session_state.attempt_id
+            db.session.execute(
+                text(f"UPDATE assessment_states SET state = {expression} WHERE attempt_id = :attempt_id"), params
+            )
+        db.session.commit()
+        session_state.clear_changes()
+
+    def delete(self, attempt_id):
+        AssessmentState.query.filter_by(attempt_id=attempt_id).delete()
+        db.session.commit()
+
+
+def update_expression(session_state):
+    """(SQL expression for the new state, bind parameters) applying session_state's changes to ``state``."""
+    expression, params = "state", {}
+    if session_state.dirty:
+        patch = {key: session_state[key] for key in session_state.dirty}
+        expression = f"({expression} || CAST(:patch AS jsonb))"
+        params['patch'] = json.dumps(patch)
+    for n, (op, path, value) in enumerate(session_state.changes):
+        if path[0] in session_state.dirty:
+            continue  # already in the patch, as a whole
+        params[f'path_{n}'] = [str(key) for key in path] + (['-1'] if op == 'append' else [])
+        params[f'value_{n}'] = json.dumps(value)
+        if op == 'append':
+            # After the last element; an empty array gets it as its first
+            expression = f"jsonb_insert({expression}, CAST(:path_{n} AS text[]), CAST(:value_{n} AS jsonb), true)"
+        else:
+            expression = f"jsonb_set({expression}, CAST(:path_{n} AS text[]), CAST(:value_{n} AS jsonb))"
+    return expression, params
+
+
+SESSION_STORES = {
+    'memory': InMemorySessionStore,
+    'database': DatabaseSessionStore,
+}
+
+
+def get_session_store():
+    """Return the session store configured by ASSESSMENT_SESSION_STORE for the current app."""
+    store = current_app.extensions.get('assessment_session_store')
+    if store is None:
+        backend = current_app.config.get('ASSESSMENT_SESSION_STORE', 'memory')
+        if backend not in SESSION_STORES:
+            raise ValueError(f"Unknown ASSESSMENT_SESSION_STORE: {backend}")
+        store = SESSION_STORES[backend]()
+        current_app.extensions['assessment_session_store'] = store
+    return store
@@ -0,0 +1,13 @@
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+
+
+def dialect_insert(model):
+    """INSERT for the bound database's dialect, for statements that need ON CONFLICT.
+
+    ON CONFLICT is dialect-specific in SQLAlchemy; SQLite takes the same form (benchmarks run on it).
+    """
+    if db.engine.dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return postgresql_insert(model)
@@ -0,0 +1,54 @@
+import os
+import re
+import threading
+import wikipediaapi
+from app.utils.disk_cache import DiskCache
+
+WIKI_CACHE_DIR = os.getenv("WIKI_CACHE_DIR", "instance/cache")
+WIKI_CACHE_TTL_SECONDS = int(os.getenv("WIKI_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+# Missing pages are remembered for a shorter time, in case the article gets created
+WIKI_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("WIKI_CACHE_NEGATIVE_TTL_SECONDS", 24 * 3600))
+WIKI_CACHE_MAX_ENTRIES = int(os.getenv("WIKI_CACHE_MAX_ENTRIES", 20000))
+# Serve from the cache only and never touch the network (tests, air-gapped runs)
+WIKI_OFFLINE = os.getenv("WIKI_OFFLINE", "0") == "1"
+
+
+def normalize_topic(topic):
+    return re.sub(r"\s+", " ", topic.replace("_", " ")).strip().casefold()
+
+
+_wiki = wikipediaapi.Wikipedia(
+    user_agent="MandviAIQuiz/1.0 (contact: mandvishukla20@gmail.com)", language='en'
+)
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_wiki_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskCache(
+                    os.path.join(WIKI_CACHE_DIR, "wikipedia.sqlite3"), WIKI_CACHE_TTL_SECONDS, WIKI_CACHE_MAX_ENTRIES
+                )
+    return _cache
+
+
+def fetch_summary(topic):
+    """Wikipedia summary for topic, or None if the page does not exist (or is not cached when offline).
+
+    Missing pages are cached as None (negative entries); network errors are not cached.
+    """
+    cache = get_wiki_cache()
+    key = normalize_topic(topic)
+    hit, summary = cache.get(key, allow_expired=WIKI_OFFLINE)
+    if hit or WIKI_OFFLINE:
+        return summary
+
+    page = _wiki.page(topic)
+    if page.exists():
+        cache.put(key, page.summary)
+        return page.summary
+    cache.put(key, None, ttl=WIKI_CACHE_NEGATIVE_TTL_SECONDS)
+    return None
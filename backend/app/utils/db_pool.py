@@ -0,0 +1,60 @@
+import threading
+import time
+
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (milliseconds) of the checkout wait histogram; the last bucket is everything slower
+WAIT_BUCKETS_MS = (1, 10, 100, 1000)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection.
+
+    The wait covers queueing for a free connection and, below the pool's capacity, opening a new
+    one. Counters are kept per pool (so per engine) and per process; see pool_stats.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self._record_wait(time.perf_counter() - started)
+
+    def _record_wait(self, seconds):
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if seconds * 1000 < bound), len(WAIT_BUCKETS_MS))
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self.wait_histogram[bucket] += 1
+
+
+def pool_stats(engines):
+    """Pool usage and checkout waits for each engine in {bind key: engine}; the primary's key is None."""
+    stats = {}
+    for key, engine in engines.items():
+        pool = engine.pool
+        entry = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        if isinstance(pool, TimedQueuePool):
+            with pool._stats_lock:
+                labels = [f"<{bound}ms" for bound in WAIT_BUCKETS_MS] + [f">={WAIT_BUCKETS_MS[-1]}ms"]
+                entry.update(
+                    checkouts=pool.checkouts,
+                    wait_ms_total=round(pool.wait_seconds_total * 1000, 3),
+                    wait_ms_avg=round(pool.wait_seconds_total * 1000 / pool.checkouts, 3) if pool.checkouts else 0.0,
+                    wait_ms_max=round(pool.wait_seconds_max * 1000, 3),
+                    wait_histogram=dict(zip(labels, pool.wait_histogram))
+                )
+        stats[key or "primary"] = entry
+    return stats
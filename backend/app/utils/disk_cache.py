@@ -0,0 +1,77 @@
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class DiskCache:
+    """Key/value cache in a SQLite file, with per-entry TTL and LRU eviction.
+
+    Values are stored as JSON. Hit and miss counters are kept per process.
+    """
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+    def _connect(self):
+        # One short-lived connection per call keeps this safe to use from any thread or process.
+        # Use as `with self._connect() as conn, conn:` - closed on exit, after the inner `with`
+        # commits (or rolls back); a sqlite3 connection's own `with` does not close it
+        return contextlib.closing(sqlite3.connect(self.path, timeout=30))
+
+    def _count(self, hit):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, allow_expired=False):
+        """Return (hit, value); expired entries count as misses unless allow_expired is set."""
+        now = time.time()
+        with self._connect() as conn, conn:
+            row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] < now and not allow_expired):
+                self._count(False)
+                return False, None
+            conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+        self._count(True)
+        return True, json.loads(row[0])
+
+    def put(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now)
+            )
+            conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        with self._counter_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,15 @@
+from flask import request
+
+
+def page_limit(default, maximum):
+    """The request's ?limit=N page size: default when absent, at most maximum.
+
+    Raises ValueError unless it is a positive integer (?limit=abc, ?limit=0).
+    """
+    value = request.args.get('limit')
+    if value is None:
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError(f"limit must be positive, got {limit}")
+    return min(limit, maximum)
@@ -0,0 +1,75 @@
+import functools
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+# Bind key of the optional read replica (Config.SQLALCHEMY_BINDS)
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """db.session class that sends the reads of replica_reads views to the replica bind, if one is configured.
+
+    Only SELECTs (ORM queries, select() statements and session.connection() reads) go to the replica.
+    Flushes, INSERT/UPDATE/DELETE statements and textual SQL stay on the primary, as does
+    everything outside replica_reads views. Once the session has written, its reads stay on the
+    primary too until the transaction commits or rolls back, so a view reads its own writes.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if _may_write(clause):
+            self._wrote = True
+        elif bind is None and _replica_reads() and not self._flushing and not self._wrote:
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _pin_to_primary(session, flush_context):
+    session._wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def _unpin(session):
+    session._wrote = False
+
+
+def replica_reads(view):
+    """Route the view's reads to the replica: for endpoints that read a lot and tolerate replication lag."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.replica_reads = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside a replica_reads view, e.g. rows the view has just written."""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('replica_reads', False)
+    g.replica_reads = False
+    try:
+        yield
+    finally:
+        g.replica_reads = previous
+
+
+def _replica_reads():
+    return has_request_context() and g.get('replica_reads', False)
+
+
+def _may_write(clause):
+    return clause is not None and (isinstance(clause, UpdateBase) or not getattr(clause, 'is_select', False))
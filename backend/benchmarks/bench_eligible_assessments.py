@@ -0,0 +1,121 @@
+"""Eligible assessments for one candidate: load every job and filter in Python (legacy) vs eligible_jobs.
+
+Run from backend/:
+    python -m benchmarks.bench_eligible_assessments --jobs 50000
+    python -m benchmarks.bench_eligible_assessments --database-url postgresql://... --no-seed
+
+Defaults to a throwaway SQLite file seeded with --jobs random jobs, with the indexes declared on
+JobDescription. Walks every page of eligible_jobs and checks the union equals the legacy result
+(restricted to assessments that have not closed yet, which the old endpoint did not filter).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from app import db
+from app.models.candidate import Candidate
+from app.models.job import JobDescription
+from app.models.required_skill import RequiredSkill  # noqa: F401 (mapper relationships)
+from app.models.skill import Skill  # noqa: F401
+from app.models.user import User  # noqa: F401 (mapper relationships)
+from app.services.eligibility import eligible_jobs
+
+DEGREES = ["B.Tech", "M.Tech", "BSc", "MSc", "MBA", "PhD", "BCA", "MCA", "B.E.", "Diploma"]
+
+
+def seed(count, rng, now):
+    rows = []
+    for i in range(count):
+        experience_min = rng.randint(0, 10)
+        rows.append({
+            "recruiter_id": 1,
+            "job_title": f"Benchmark job {i}",
+            "company": f"Company {i % 500}",
+            "experience_min": experience_min,
+            "experience_max": experience_min + rng.randint(0, 5),
+            "degree_required": rng.choice(DEGREES + [None, rng.choice(DEGREES).upper()]),
+            "duration": rng.choice([30, 45, 60, 90]),
+            "num_questions": 20,
+            "schedule": now + timedelta(minutes=rng.randint(-60 * 24 * 90, 60 * 24 * 90))
+        })
+    for start in range(0, count, 5000):
+        db.session.execute(db.insert(JobDescription), rows[start:start + 5000])
+    db.session.commit()
+
+
+def legacy_eligible(candidate):
+    # What get_eligible_assessments did before: every job loaded, filtered in Python
+    eligible = []
+    for assessment in JobDescription.query.all():
+        experience_match = (assessment.experience_min <= candidate.years_of_experience <= assessment.experience_max)
+        degree_match = False
+        if assessment.degree_required and candidate.degree:
+            degree_match = assessment.degree_required.lower() == candidate.degree.lower()
+        elif not assessment.degree_required:
+            degree_match = True
+        if experience_match and degree_match:
+            eligible.append(assessment)
+    return eligible
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--jobs", type=int, default=50000)
+    parser.add_argument("--no-seed", action="store_true", help="use the jobs already in the database")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    db.init_app(app)
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            JobDescription.__table__.create(db.engine, checkfirst=True)
+        if not args.no_seed:
+            seed(args.jobs, rng, now)
+        total = JobDescription.query.count()
+        candidates = [Candidate(years_of_experience=rng.randint(0, 12), degree=rng.choice(DEGREES + [None]))
+                      for _ in range(args.candidates)]
+
+        legacy_time = first_page_time = 0.0
+        pages = mismatches = 0
+        for candidate in candidates:
+            started = time.perf_counter()
+            legacy = legacy_eligible(candidate)
+            legacy_time += time.perf_counter() - started
+            db.session.expunge_all()
+
+            started = time.perf_counter()
+            page, cursor = eligible_jobs(candidate, limit=args.limit, now=now)
+            first_page_time += time.perf_counter() - started
+            found = [job.job_id for job in page]
+            while cursor:
+                page, cursor = eligible_jobs(candidate, cursor=cursor, limit=args.limit, now=now)
+                found += [job.job_id for job in page]
+                pages += 1
+            pages += 1
+            expected = {job.job_id for job in legacy
+                        if job.schedule + timedelta(minutes=job.duration) > now}
+            mismatches += len(expected.symmetric_difference(found)) + len(found) - len(set(found))
+            db.session.expunge_all()
+
+        print(f"{total} jobs, {args.candidates} candidates")
+        print(f"     legacy (all jobs, Python filter): {legacy_time / args.candidates * 1000:8.2f} ms per request")
+        print(f"eligible_jobs (first page of {args.limit:3d}): {first_page_time / args.candidates * 1000:8.2f} ms per request")
+        print(f"pages walked: {pages}, job ids differing from the legacy filter: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Hot queries before and after the indexes of migration 0002 (app/migrations/versions/v0002_hot_path_indexes.py).
+
+Run from backend/:
+    python -m benchmarks.bench_hot_path_indexes --jobs 5000 --candidates 50000
+    python -m benchmarks.bench_hot_path_indexes --database-url postgresql://.../scratch
+
+Seeds synthetic recruiters, jobs, questions, candidates, skills, registrations and attempts, drops
+the migration's indexes (its downgrade), runs each query, then recreates them (its upgrade) and runs
+them again. Point --database-url at a scratch database: the indexes are dropped there.
+
+On Postgres each query is timed with EXPLAIN (ANALYZE) and the top plan node is printed; SQLite has
+no EXPLAIN ANALYZE, so there the query is timed directly and EXPLAIN QUERY PLAN shows scan vs index.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import insert, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+from app import db
+from app.migrations.versions import v0002_hot_path_indexes as hot_path_indexes
+from app.models.assessment_attempt import AssessmentAttempt
+from app.models.assessment_registration import AssessmentRegistration
+from app.models.candidate import Candidate
+from app.models.candidate_skill import CandidateSkill
+from app.models.job import JobDescription
+from app.models.mcq import MCQ
+from app.models.required_skill import RequiredSkill  # noqa: F401 (mapper relationships)
+from app.models.skill import Skill
+from app.models.user import User
+
+BANDS = ["good", "better", "perfect"]
+
+# (label, SQL); parameters are drawn at random from the seeded id ranges
+QUERIES = [
+    ("mcqs for a job, skill and band",
+     "SELECT mcq_id, question FROM mcqs WHERE job_id = :job_id AND skill_id = :skill_id AND difficulty_band = :band"),
+    ("mcq counts per skill and band for a job",
+     "SELECT skill_id, difficulty_band, count(*) FROM mcqs WHERE job_id = :job_id GROUP BY skill_id, difficulty_band"),
+    ("a candidate's attempts at a job",
+     "SELECT attempt_id, status FROM assessment_attempts WHERE candidate_id = :candidate_id AND job_id = :job_id"),
+    ("a job's registrants",
+     "SELECT candidate_id FROM assessment_registrations WHERE job_id = :job_id"),
+    ("holders of a skill",
+     "SELECT candidate_id, proficiency FROM candidate_skills WHERE skill_id = :skill_id"),
+    ("a recruiter's assessments",
+     "SELECT job_id, job_title FROM job_descriptions WHERE recruiter_id = :recruiter_id"),
+]
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(element, compiler, **kw):
+    # SQLite has no JSONB; assessment_attempts.performance_log is stored as JSON there
+    return "JSON"
+
+
+def seed(rng, recruiters, jobs, candidates, skills):
+    now = datetime.utcnow()
+    batches = {
+        User: [{"id": i, "name": f"Recruiter {i}", "email": f"r{i}@example.com", "role": "recruiter"}
+               for i in range(1, recruiters + 1)],
+        Skill: [{"skill_id": i, "name": f"Skill {i}"} for i in range(1, skills + 1)],
+        JobDescription: [{"job_id": i, "recruiter_id": rng.randint(1, recruiters), "job_title": f"Job {i}",
+                          "company": "X", "experience_min": 1, "experience_max": 5, "duration": 30,
+                          "num_questions": 20, "schedule": now} for i in range(1, jobs + 1)],
+        Candidate: [{"candidate_id": i, "name": f"Candidate {i}", "email": f"c{i}@example.com",
+                     "years_of_experience": rng.randint(0, 12)} for i in range(1, candidates + 1)],
+        MCQ: [], CandidateSkill: [], AssessmentRegistration: [], AssessmentAttempt: [],
+    }
+    for job_id in range(1, jobs + 1):
+        for skill_id in rng.sample(range(1, skills + 1), 3):
+            for band in BANDS:
+                batches[MCQ] += [{"job_id": job_id, "skill_id": skill_id, "difficulty_band": band,
+                                  "question": f"Question {n}", "option_a": "a", "option_b": "b", "option_c": "c",
+                                  "option_d": "d", "correct_answer": "A"} for n in range(5)]
+    for candidate_id in range(1, candidates + 1):
+        batches[CandidateSkill] += [{"candidate_id": candidate_id, "skill_id": s, "proficiency": rng.choice([4, 6, 8])}
+                                    for s in rng.sample(range(1, skills + 1), 8)]
+        for job_id in rng.sample(range(1, jobs + 1), 4):
+            batches[AssessmentRegistration].append({"candidate_id": candidate_id, "job_id": job_id})
+            batches[AssessmentAttempt].append({"candidate_id": candidate_id, "job_id": job_id, "status": "completed",
+                                               "start_time": now - timedelta(days=rng.randint(0, 90))})
+    for model, rows in batches.items():
+        for start in range(0, len(rows), 10000):
+            db.session.execute(insert(model), rows[start:start + 10000])
+    db.session.commit()
+
+
+def run_queries(rng, args, repeat):
+    """{label: (milliseconds per execution, plan summary)} for every query in QUERIES."""
+    connection = db.session.connection()
+    postgres = connection.dialect.name == "postgresql"
+    connection.execute(text("ANALYZE"))
+    results = {}
+    for label, sql in QUERIES:
+        samples = [{"job_id": rng.randint(1, args.jobs), "skill_id": rng.randint(1, args.skills),
+                    "band": rng.choice(BANDS), "candidate_id": rng.randint(1, args.candidates),
+                    "recruiter_id": rng.randint(1, args.recruiters)} for _ in range(repeat)]
+        params = [{k: v for k, v in sample.items() if f":{k}" in sql} for sample in samples]
+        if postgres:
+            times = []
+            for p in params:
+                plan = connection.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), p).scalar()
+                plan = plan if isinstance(plan, list) else json.loads(plan)
+                times.append(plan[0]["Execution Time"])
+            node = plan[0]["Plan"]
+            while node.get("Plans") and node["Node Type"] in ("Aggregate", "HashAggregate", "GroupAggregate", "Sort"):
+                node = node["Plans"][0]
+            summary = node["Node Type"] + (f" using {node['Index Name']}" if node.get("Index Name") else "")
+        else:
+            summary = "; ".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params[0]))
+            times = []
+            for p in params:
+                started = time.perf_counter()
+                connection.execute(text(sql), p).all()
+                times.append((time.perf_counter() - started) * 1000)
+        results[label] = (sorted(times)[len(times) // 2], summary)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--recruiters", type=int, default=500)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--candidates", type=int, default=50000)
+    parser.add_argument("--skills", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20, help="executions per query; the median is reported")
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    db.init_app(app)
+
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            for model in (User, Skill, JobDescription, MCQ, Candidate, CandidateSkill, AssessmentRegistration,
+                          AssessmentAttempt):
+                model.__table__.create(db.engine, checkfirst=True)
+        if not args.no_seed:
+            started = time.perf_counter()
+            seed(random.Random(args.seed), args.recruiters, args.jobs, args.candidates, args.skills)
+            print(f"seeded in {time.perf_counter() - started:.1f} s")
+
+        # Autocommit, as app.migrations runs this version: Postgres drops and builds the indexes CONCURRENTLY
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            hot_path_indexes.downgrade(connection)
+        before = run_queries(random.Random(args.seed), args, args.repeat)
+        db.session.commit()
+        started = time.perf_counter()
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            hot_path_indexes.upgrade(connection)
+        print(f"migration 0002 upgrade (index builds): {time.perf_counter() - started:.1f} s")
+        after = run_queries(random.Random(args.seed), args, args.repeat)
+        db.session.commit()
+
+        print(f"{db.engine.dialect.name}: {args.recruiters} recruiters, {args.jobs} jobs, {args.candidates} candidates, "
+              f"{args.skills} skills; median of {args.repeat} executions")
+        for label, _ in QUERIES:
+            (before_ms, before_plan), (after_ms, after_plan) = before[label], after[label]
+            print(f"{label}\n    before: {before_ms:9.3f} ms  {before_plan}\n"
+                  f"     after: {after_ms:9.3f} ms  {after_plan}  ({before_ms / max(after_ms, 1e-6):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
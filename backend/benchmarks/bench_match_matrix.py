@@ -0,0 +1,138 @@
+"""Full rebuild of job_matches (every candidate's top jobs, every job's top candidates) with the sparse match matrix.
+
+Run from backend/:
+    python -m benchmarks.bench_match_matrix --candidates 100000 --jobs 5000
+    python -m benchmarks.bench_match_matrix --database-url postgresql://... --no-seed
+
+Defaults to a throwaway SQLite file seeded with --candidates candidates and --jobs jobs drawn from
+a pool of --skills skills. Times loading, scoring and storing separately, then checks a sample of
+candidates and jobs against app.services.ranking.score_candidates evaluated over every job / every
+candidate: stored scores must be equal and each top k must hold the k best scores.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import insert
+
+from app import db
+from app.models.candidate import Candidate
+from app.models.candidate_skill import CandidateSkill
+from app.models.job import JobDescription
+from app.models.job_match import JobMatch
+from app.models.required_skill import RequiredSkill
+from app.models.skill import Skill
+from app.models.user import User  # noqa: F401 (mapper relationships)
+from app.services.match_matrix import compute_top_matches, load_match_inputs, rebuild_job_matches
+from app.services.ranking import score_candidates
+
+
+def seed(rng, candidates, jobs, skills):
+    now = datetime.utcnow()
+    db.session.execute(insert(Skill), [{"skill_id": i, "name": f"Skill {i}"} for i in range(1, skills + 1)])
+    job_rows, required_rows = [], []
+    for job_id in range(1, jobs + 1):
+        experience_min = rng.randint(0, 10)
+        job_rows.append({"job_id": job_id, "recruiter_id": 1, "job_title": f"Benchmark job {job_id}", "company": "X",
+                         "experience_min": experience_min, "experience_max": experience_min + rng.randint(0, 5),
+                         "duration": 30, "num_questions": 20, "schedule": now})
+        required_rows += [{"job_id": job_id, "skill_id": s, "priority": rng.randint(1, 5)}
+                          for s in rng.sample(range(1, skills + 1), rng.randint(3, 10))]
+    candidate_rows, skill_rows = [], []
+    for candidate_id in range(1, candidates + 1):
+        candidate_rows.append({"candidate_id": candidate_id, "name": f"Candidate {candidate_id}",
+                               "email": f"c{candidate_id}@example.com",
+                               "years_of_experience": rng.choice([rng.randint(0, 15), round(rng.uniform(0, 15), 1)])})
+        skill_rows += [{"candidate_id": candidate_id, "skill_id": s, "proficiency": rng.choice([0, 4, 6, 8])}
+                       for s in rng.sample(range(1, skills + 1), rng.randint(0, 15))]
+    for model, rows in ((JobDescription, job_rows), (RequiredSkill, required_rows), (Candidate, candidate_rows),
+                        (CandidateSkill, skill_rows)):
+        for start in range(0, len(rows), 10000):
+            db.session.execute(insert(model), rows[start:start + 10000])
+    db.session.commit()
+
+
+def brute_force_scores(inputs, job, rows=slice(None)):
+    # The job's ranking formula for the candidates at `rows` (all by default), skills densified per job
+    j = int(np.searchsorted(inputs["job_ids"], job.job_id))
+    priority = inputs["priority"][:, j].toarray().ravel()
+    required = np.flatnonzero(priority)
+    proficiency = inputs["proficiency"][rows][:, required].toarray()
+    return score_candidates(job, inputs["years"][rows], proficiency, priority[required])[3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--candidates", type=int, default=100000)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--skills", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--sample", type=int, default=50, help="candidates and jobs checked against brute force")
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    db.init_app(app)
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            for model in (JobDescription, Skill, RequiredSkill, Candidate, CandidateSkill, JobMatch):
+                model.__table__.create(db.engine, checkfirst=True)
+        if not args.no_seed:
+            started = time.perf_counter()
+            seed(rng, args.candidates, args.jobs, args.skills)
+            print(f"seeded in {time.perf_counter() - started:.1f} s")
+
+        started = time.perf_counter()
+        inputs = load_match_inputs()
+        load_time = time.perf_counter() - started
+        started = time.perf_counter()
+        compute_top_matches(inputs, args.top_k)
+        compute_time = time.perf_counter() - started
+        db.session.rollback()
+
+        started = time.perf_counter()
+        counts = rebuild_job_matches(top_k=args.top_k)
+        rebuild_time = time.perf_counter() - started
+        print(f"{counts['candidates']} candidates x {counts['jobs']} jobs, "
+              f"{inputs['proficiency'].nnz} candidate skills, top {args.top_k}")
+        print(f"  load_match_inputs: {load_time:8.2f} s")
+        print(f"compute_top_matches: {compute_time:8.2f} s")
+        print(f"rebuild_job_matches: {rebuild_time:8.2f} s in total ({counts['rows']} rows stored)")
+
+        # Brute force over a sample: every job for some candidates, every candidate for some jobs
+        jobs = JobDescription.query.order_by(JobDescription.job_id).all()
+        candidate_ids = inputs["candidate_ids"].tolist()
+        sampled_candidates = sorted(rng.sample(range(len(candidate_ids)), min(args.sample, len(candidate_ids))))
+        candidate_rows = np.column_stack([brute_force_scores(inputs, job, sampled_candidates) for job in jobs])
+        job_position = {job.job_id: j for j, job in enumerate(jobs)}
+        top_k_jobs, top_k_candidates = min(args.top_k, len(jobs)), min(args.top_k, len(candidate_ids))
+        score_mismatches = top_mismatches = 0
+        for row, i in zip(candidate_rows, sampled_candidates):
+            stored = JobMatch.query.filter(JobMatch.candidate_id == candidate_ids[i], JobMatch.candidate_rank.isnot(None)) \
+                .order_by(JobMatch.candidate_rank).all()
+            score_mismatches += sum(1 for m in stored if m.match_score != row[job_position[m.job_id]])
+            top_mismatches += [m.match_score for m in stored] != sorted(row, reverse=True)[:top_k_jobs]
+        candidate_position = {c: i for i, c in enumerate(candidate_ids)}
+        for job in rng.sample(jobs, min(args.sample, len(jobs))):
+            column = brute_force_scores(inputs, job)
+            stored = JobMatch.query.filter(JobMatch.job_id == job.job_id, JobMatch.job_rank.isnot(None)) \
+                .order_by(JobMatch.job_rank).all()
+            score_mismatches += sum(1 for m in stored if m.match_score != column[candidate_position[m.candidate_id]])
+            top_mismatches += [m.match_score for m in stored] != sorted(column, reverse=True)[:top_k_candidates]
+        print(f"sampled {args.sample} candidates and {args.sample} jobs: {score_mismatches} stored scores differ, "
+              f"{top_mismatches} top-k lists differ from brute force")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Writing 10,000 generated MCQs: one ORM object per row vs save_questions per (skill, band).
+
+Run from backend/:
+    python -m benchmarks.bench_mcq_inserts --rows 10000
+    python -m benchmarks.bench_mcq_inserts --database-url postgresql://... --job-id 1 --skill-id 1
+
+Defaults to a throwaway SQLite file. Against Postgres, point --job-id/--skill-id at existing
+rows (the foreign keys are enforced there); the rows written by each mode are deleted again.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from app import db
+from app.models.job import JobDescription  # noqa: F401 (mapper relationships)
+from app.models.mcq import MCQ
+from app.models.mcq_pool import PoolMCQ
+from app.models.skill import Skill  # noqa: F401
+from app.models.user import User  # noqa: F401
+from app.services.question_batches import save_questions
+
+BANDS = ("good", "better", "perfect")
+
+
+def make_questions(rows):
+    return [
+        {
+            "question": f"Benchmark question {i}: which option is correct?",
+            "option_a": f"Option {i}A",
+            "option_b": f"Option {i}B",
+            "option_c": f"Option {i}C",
+            "option_d": f"Option {i}D",
+            "correct_answer": "ABCD"[i % 4]
+        }
+        for i in range(rows)
+    ]
+
+
+def orm_per_row(job_id, skill_id, questions, chunk):
+    # What prepare_question_batches used to do: add objects one by one, commit once at the end
+    for i, q in enumerate(questions):
+        band = BANDS[(i // chunk) % 3]
+        db.session.add(MCQ(job_id=job_id, skill_id=skill_id, difficulty_band=band, **q))
+        db.session.add(PoolMCQ(skill_id=skill_id, difficulty_band=band, usage_count=1, **q))
+    db.session.commit()
+
+
+def bulk_per_chunk(job_id, skill_id, questions, chunk):
+    for start in range(0, len(questions), chunk):
+        band = BANDS[(start // chunk) % 3]
+        save_questions(job_id, skill_id, band, questions[start:start + chunk])
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--chunk", type=int, default=20, help="questions per (skill, band) commit")
+    parser.add_argument("--job-id", type=int, default=1)
+    parser.add_argument("--skill-id", type=int, default=1)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    db.init_app(app)
+    questions = make_questions(args.rows)
+
+    with app.app_context():
+        for model in (MCQ, PoolMCQ):
+            model.__table__.create(db.engine, checkfirst=True)
+        for name, fn in (("orm per row", orm_per_row), ("bulk per chunk", bulk_per_chunk)):
+            started = time.perf_counter()
+            fn(args.job_id, args.skill_id, questions, args.chunk)
+            elapsed = time.perf_counter() - started
+            written = MCQ.query.filter_by(job_id=args.job_id, skill_id=args.skill_id).count()
+            print(f"{name:>15}: {elapsed:7.3f} s, {args.rows / elapsed:9.0f} MCQs/s, {written} rows")
+            MCQ.query.filter_by(job_id=args.job_id, skill_id=args.skill_id).delete()
+            PoolMCQ.query.filter(PoolMCQ.question.like("Benchmark question %")).delete(synchronize_session=False)
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
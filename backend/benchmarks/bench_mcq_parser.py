@@ -0,0 +1,221 @@
+"""Throughput and yield of the MCQ batch parser, legacy char-by-char parser vs parse_mcq_response.
+
+Run from backend/:
+    python -m benchmarks.bench_mcq_parser --question-dir ../question_batches
+
+The corpus is built from the recorded question batches in --question-dir, rendered into the
+raw shapes Gemini returns: the requested bracketed list, the same with code fences, numbering
+and extra blank lines, single-line strings with escaped newlines, JSON-mode objects, and options
+written inline (all on the question's line with the answer, or on one line of their own).
+A "quoted" batch of questions about code, whose questions and options contain string literals,
+checks that quote characters inside an item survive parsing, and a "preamble" batch that question
+text such as "d: a dict" is not taken for an option. Raw responses saved as *.txt in
+--corpus-dir are added as-is.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+
+from app.services.mcq_parser import parse_mcq_response
+
+LETTERS = "ABCD"
+
+# Questions and options that quote code: the quotes are part of the content and must be kept
+QUOTED_QUESTIONS = [
+    ('What does print(len("hi")) output?', ["2", '"hi"', "hi", "None"], "A"),
+    ('"Hello" + " world" evaluates to which value in Python?',
+     ['"Hello world"', "An error", '"Hello" " world"', "None"], "A"),
+    ("Which call splits the line on commas?", ['line.split(",")', "line.split()", 'line.join(",")', "split(line)"], "A"),
+    ('What is the type of the expression "3" * 2?', ['str, "33"', "int, 6", "TypeError", "float"], "A"),
+    ("Which JSON document is valid?", ['{"key": "value"}', "{'key': 'value'}", "{key: value}", '["a",]'], "A"),
+]
+# Questions whose text has lines that look like option markers in lower case: they must stay question text
+PREAMBLE_QUESTIONS = [
+    ("Given the variables below\nd: a dict of word counts\nWhat does len(d) return?",
+     ["The number of distinct words", "The total word count", "The longest word", "None"], "A"),
+    ("Consider the function\nc: the number of calls so far\nWhen is c incremented?",
+     ["Before the call", "On every call", "Never", "After an exception"], "B"),
+    ("In the schema below\nb. the birth date column\nWhich type should b have?", ["TEXT", "INTEGER", "DATE", "BLOB"], "C"),
+]
+
+
+def legacy_parse_question(question_text):
+    # Verbatim copy of the old nested parse_question, minus the prints
+    lines = [line.strip() for line in question_text.strip().split("\n") if line.strip()]
+    if len(lines) != 6:
+        return None
+    match = re.match(r'Correct Answer:\s*\(([A-D])\)\s*$', lines[5])
+    if not match:
+        return None
+    return {
+        "question": lines[0],
+        "option_a": re.sub(r'^\(A\)\s*', '', lines[1]),
+        "option_b": re.sub(r'^\(B\)\s*', '', lines[2]),
+        "option_c": re.sub(r'^\(C\)\s*', '', lines[3]),
+        "option_d": re.sub(r'^\(D\)\s*', '', lines[4]),
+        "correct_answer": match.group(1)
+    }
+
+
+def legacy_parse_response(raw_text):
+    # Verbatim copy of the old nested parse_response, minus the prints
+    raw_text = raw_text.strip()
+    raw_text = re.sub(r'^```(json|python)\s*\n', '', raw_text, flags=re.MULTILINE)
+    raw_text = re.sub(r'\n```$', '', raw_text, flags=re.MULTILINE)
+    raw_text = raw_text.strip()
+    if not (raw_text.startswith("[") and raw_text.endswith("]")):
+        return []
+    content = raw_text[1:-1].strip()
+    if not content:
+        return []
+    questions = []
+    current_question = []
+    inside_quote = False
+    current_line = ""
+    for char in content:
+        if char == '"':
+            inside_quote = not inside_quote
+            current_line += char
+        elif char == ',' and not inside_quote:
+            if current_line:
+                current_question.append(current_line.strip('"'))
+                questions.append("\n".join(current_question))
+                current_question = []
+                current_line = ""
+        else:
+            current_line += char
+            if char == "\n":
+                current_question.append(current_line.strip())
+                current_line = ""
+    if current_line:
+        current_question.append(current_line.strip('"'))
+        questions.append("\n".join(current_question))
+    return questions
+
+
+def legacy_parse(raw_text):
+    return [parsed for parsed in map(legacy_parse_question, legacy_parse_response(raw_text)) if parsed]
+
+
+def clean_recorded(text):
+    return re.sub(r'^[\s",\'\\]+', "", text).replace("\\", "").replace('"', "'").strip()
+
+
+def load_recorded_questions(question_dir):
+    questions = []
+    for path in sorted(glob.glob(os.path.join(question_dir, "*.json"))):
+        with open(path) as f:
+            for q in json.load(f):
+                options = q.get("options", [])
+                if len(options) != 4 or q.get("answer") not in options:
+                    continue
+                # The files still carry debris the old parser left at batch boundaries
+                text = clean_recorded(re.sub(r'^```\w*\s*\[', "", q["question"]))
+                questions.append((text, [clean_recorded(o) for o in options], LETTERS[options.index(q["answer"])]))
+    return questions
+
+
+def render(batch, shape):
+    if shape == "json_mode":
+        return json.dumps([{"question": q, "options": opts, "correct_answer": ans} for q, opts, ans in batch], indent=2)
+    items = []
+    for i, (q, opts, ans) in enumerate(batch, 1):
+        option_lines = "\n".join(f"({letter}) {opt}" for letter, opt in zip(LETTERS, opts))
+        if shape == "bracketed":
+            items.append(f'"{q}\n\n{option_lines}\n\nCorrect Answer: ({ans})"')
+        elif shape == "quoted":
+            # The requested bracketed list with the content's quotes escaped, raw newlines kept
+            item = f"{q}\n\n{option_lines}\n\nCorrect Answer: ({ans})".replace('"', '\\"')
+            items.append(f'"{item}"')
+        elif shape == "single_line":
+            inline = " ".join(f"({letter}) {opt}" for letter, opt in zip(LETTERS, opts))
+            items.append(json.dumps(f"{q} {inline} Correct Answer: ({ans})"))
+        elif shape == "options_line":
+            inline = " ".join(f"({letter}) {opt}" for letter, opt in zip(LETTERS, opts))
+            items.append(json.dumps(f"{q}\n{inline}\nCorrect Answer: ({ans})"))
+        elif shape == "numbered":
+            items.append(f'"{i}. {q}\n\n\n{option_lines}\n\n\nCorrect Answer: ({ans})"')
+        elif shape == "escaped":
+            items.append(json.dumps(f"{q}\n\n{option_lines}\n\nCorrect Answer: ({ans})"))
+    body = "[" + ",\n".join(items) + "]" if shape != "numbered" else "```python\n[\n" + ",\n\n".join(items) + "\n]\n```"
+    return body
+
+
+def build_corpus(question_dir, batch_size):
+    questions = load_recorded_questions(question_dir)
+    corpus = []
+    for shape in ("bracketed", "numbered", "escaped", "json_mode", "single_line", "options_line"):
+        for start in range(0, len(questions) - batch_size + 1, batch_size):
+            corpus.append((shape, render(questions[start:start + batch_size], shape), batch_size))
+    corpus.append(("quoted", render(QUOTED_QUESTIONS, "quoted"), len(QUOTED_QUESTIONS)))
+    corpus.append(("quoted", render(QUOTED_QUESTIONS, "escaped"), len(QUOTED_QUESTIONS)))
+    corpus.append(("quoted", render(QUOTED_QUESTIONS, "json_mode"), len(QUOTED_QUESTIONS)))
+    corpus.append(("preamble", render(PREAMBLE_QUESTIONS, "escaped"), len(PREAMBLE_QUESTIONS)))
+    return corpus
+
+
+def time_parser(parser, corpus, repeats):
+    accepted = {}
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for shape, text, _ in corpus:
+            accepted[shape] = accepted.get(shape, 0) + len(parser(text))
+    elapsed = time.perf_counter() - started
+    return elapsed, {shape: count // repeats for shape, count in accepted.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--question-dir", default="../question_batches")
+    parser.add_argument("--corpus-dir", default=None, help="extra raw Gemini responses (*.txt)")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.question_dir, args.batch_size)
+    if args.corpus_dir:
+        for path in sorted(glob.glob(os.path.join(args.corpus_dir, "*.txt"))):
+            with open(path) as f:
+                corpus.append(("recorded", f.read(), None))
+    expected = {}
+    for shape, _, size in corpus:
+        expected[shape] = expected.get(shape, 0) + (size or 0)
+    size_mb = sum(len(text) for _, text, _ in corpus) / 1e6
+    print(f"corpus: {len(corpus)} responses, {size_mb:.2f} MB")
+
+    for name, fn in (("legacy", legacy_parse), ("single-pass", lambda text: parse_mcq_response(text)[0])):
+        elapsed, accepted = time_parser(fn, corpus, args.repeats)
+        print(f"{name:>12}: {elapsed / args.repeats * 1000:8.2f} ms per corpus pass, "
+              f"{size_mb * args.repeats / elapsed:6.1f} MB/s")
+        for shape in expected:
+            print(f"{'':>14}{shape:<10} accepted {accepted.get(shape, 0)}/{expected[shape] or '?'}")
+
+    # Linear scaling: one response of growing size
+    questions = load_recorded_questions(args.question_dir)
+    for n in (20, 200, 2000):
+        text = render((questions * (n // len(questions) + 1))[:n], "bracketed")
+        for name, fn in (("legacy", legacy_parse), ("single-pass", lambda t: parse_mcq_response(t)[0])):
+            started = time.perf_counter()
+            fn(text)
+            print(f"{n:>6} items {name:>12}: {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+    # Exact round trips; question lines are joined with spaces
+    fixtures = {"quoted": QUOTED_QUESTIONS, "preamble": PREAMBLE_QUESTIONS}
+    for shape, text, _ in corpus:
+        if shape not in fixtures:
+            continue
+        parsed = [(q["question"], [q["option_a"], q["option_b"], q["option_c"], q["option_d"]], q["correct_answer"])
+                  for q in parse_mcq_response(text)[0]]
+        if parsed != [(q.replace("\n", " "), opts, ans) for q, opts, ans in fixtures[shape]]:
+            raise SystemExit(f"{shape} questions were altered by the parser: {parsed}")
+
+    rejected = [r for _, text, _ in corpus for r in parse_mcq_response(text)[1]]
+    if rejected:
+        print(f"sample rejection reasons: {sorted({r['reason'] for r in rejected})[:5]}")
+
+
+if __name__ == "__main__":
+    main()
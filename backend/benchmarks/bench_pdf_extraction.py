@@ -0,0 +1,126 @@
+"""Throughput and text fidelity of the PDF extraction backends.
+
+Run from backend/:
+    python -m benchmarks.bench_pdf_extraction
+    python -m benchmarks.bench_pdf_extraction --corpus-dir /path/to/resumes
+
+The fixture corpus is generated with PyMuPDF from known text (one- and two-column resumes,
+a long resume and a 200-page document), so fidelity is word recall and precision against
+the text that was written. PDFs in --corpus-dir have no ground truth; they are scored
+against pdfminer, the backend the app used before.
+"""
+import argparse
+import glob
+import os
+import random
+import time
+from collections import Counter
+
+import fitz
+
+from app.services import pdf_extraction
+from app.services.pdf_extraction import EXTRACTORS, extract_pdf_text
+
+WORDS = ("python flask react docker kubernetes postgres developed built deployed pipelines machine learning "
+         "deep models data engineering analytics dashboards led team of engineers designed scalable services "
+         "university bachelor technology certification aws gcp azure microservices testing ci cd").split()
+
+
+def sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def make_pdf(rng, pages, columns):
+    doc = fitz.open()
+    written = []
+    for _ in range(pages):
+        page = doc.new_page()
+        width = (page.rect.width - 72 - 18 * (columns - 1)) / columns
+        for col in range(columns):
+            x0 = 36 + col * (width + 18)
+            text = "\n".join(sentence(rng, rng.randint(6, 14)) for _ in range(12))
+            page.insert_textbox(fitz.Rect(x0, 36, x0 + width, page.rect.height - 36), text, fontsize=9)
+            written.append(text)
+    data = doc.tobytes()
+    doc.close()
+    return data, " ".join(written)
+
+
+def build_corpus(seed):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(20):
+        corpus.append((f"resume_1col_{i}", *make_pdf(rng, rng.randint(1, 2), 1)))
+    for i in range(10):
+        corpus.append((f"resume_2col_{i}", *make_pdf(rng, 2, 2)))
+    corpus.append(("resume_long", *make_pdf(rng, 12, 1)))
+    corpus.append(("pathological_200_pages", *make_pdf(rng, 200, 2)))
+    return corpus
+
+
+def fidelity(extracted, truth):
+    got = Counter(extracted.lower().replace(".", " ").split())
+    want = Counter(truth.lower().replace(".", " ").split())
+    overlap = sum((got & want).values())
+    recall = overlap / max(1, sum(want.values()))
+    precision = overlap / max(1, sum(got.values()))
+    return recall, precision
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus-dir", default=None)
+    parser.add_argument("--max-pages", type=int, default=pdf_extraction.PDF_MAX_PAGES)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.corpus_dir:
+        corpus = []
+        for path in sorted(glob.glob(os.path.join(args.corpus_dir, "*.pdf"))):
+            with open(path, "rb") as f:
+                data = f.read()
+            corpus.append((os.path.basename(path), data, EXTRACTORS["pdfminer"](data, args.max_pages)))
+    else:
+        corpus = build_corpus(args.seed)
+    print(f"corpus: {len(corpus)} PDFs, {sum(len(d) for _, d, _ in corpus) / 1e6:.1f} MB")
+
+    # Per backend, in-process, with the page limit; ground truth covers the pages that are read
+    for backend, extract in EXTRACTORS.items():
+        started = time.perf_counter()
+        recalls, precisions, slowest = [], [], (0, None)
+        for name, data, truth in corpus:
+            doc_started = time.perf_counter()
+            text = extract(data, args.max_pages)
+            elapsed = time.perf_counter() - doc_started
+            slowest = max(slowest, (elapsed, name))
+            if not args.corpus_dir and name.startswith("pathological"):
+                continue
+            recall, precision = fidelity(text, truth)
+            recalls.append(recall)
+            precisions.append(precision)
+        total = time.perf_counter() - started
+        print(f"{backend:>10}: {len(corpus) / total:7.1f} docs/s, recall {sum(recalls) / len(recalls):.3f}, "
+              f"precision {sum(precisions) / len(precisions):.3f}, slowest {slowest[1]} {slowest[0] * 1000:.0f} ms")
+
+    # Without the page limit, what the old request-thread extraction paid for the pathological document
+    name, data, _ = corpus[-1]
+    started = time.perf_counter()
+    EXTRACTORS["pdfminer"](data, 0)
+    print(f"pdfminer, no page limit, {name}: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # Through the process pool, with fallback and the per-document timeout
+    extract_pdf_text(corpus[0][1])  # start the workers
+    started = time.perf_counter()
+    extracted = sum(1 for _, data, _ in corpus if extract_pdf_text(data, max_pages=args.max_pages))
+    total = time.perf_counter() - started
+    print(f"pool ({pdf_extraction.PDF_WORKERS} workers, {'/'.join(pdf_extraction.PDF_BACKENDS)}): "
+          f"{len(corpus) / total:7.1f} docs/s sequential, {extracted}/{len(corpus)} extracted")
+    started = time.perf_counter()
+    text = extract_pdf_text(data, backends=["pdfminer"], max_pages=10000, timeout=0.5)
+    print(f"timeout 0.5s on {name} with pdfminer: {'timed out' if text is None else 'finished'} "
+          f"after {time.perf_counter() - started:.2f}s")
+    print(f"fallback from a broken backend: {bool(extract_pdf_text(corpus[0][1], backends=['missing', 'pdfminer']))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Scoring a 60-skill resume: infer_proficiency per skill (legacy) vs infer_proficiencies for all skills at once.
+
+Run from backend/:
+    python -m benchmarks.bench_proficiency --skills 60 --resumes 200
+
+Also checks that both give identical proficiencies on every generated resume, including
+short skills that are substrings of other words ("c", "r", "go", "ai") and regex metacharacters.
+"""
+import argparse
+import logging
+import random
+import time
+
+from app.services.resume_pipeline import infer_proficiencies
+
+logger = logging.getLogger("legacy_infer_proficiency")
+
+SKILLS = [
+    "Python", "Machine Learning", "Artificial Intelligence", "JavaScript", "React", "Flask", "Django", "SQL",
+    "PostgreSQL", "Docker", "Kubernetes", "AWS", "GCP", "Azure", "C", "C++", "C#", "R", "Go", "Java", "Node.js",
+    "TypeScript", "Deep Learning", "NLP", "Computer Vision", "TensorFlow", "PyTorch", "Pandas", "NumPy", "Excel",
+    "Excel Pivoting", "GitHub", "Git", "Linux", "Bash", "Communication", "Leadership", "Teamwork", "Agile", "Scrum",
+    "REST", "GraphQL", "Redis", "Kafka", "Spark", "Hadoop", "Tableau", "Power BI", "Data Analysis", "Statistics",
+    "AI", "ML", "HTML", "CSS", "Jupyter", "Ajax", "Testing", "CI/CD", "Terraform", "Microservices", "Problem Solving",
+]
+FILLER = ("developed built implemented designed used created led integrated deployed the a pipelines services "
+          "platform dashboards team features models apis with for and using reinforcement learning deep learning "
+          "jupyter notebook google collab aiml certification university institute bachelor of technology").split()
+
+
+def legacy_infer_proficiency(skill, work_experience, education, projects):
+    # Verbatim copy of the per-skill scorer update_profile used to call once per skill
+    score = 0
+    skill_lower = skill.lower()
+    strong_keywords = ["developed", "built", "implemented", "designed", "used", "created", "led", "integrated", "deployed"]
+    related_terms = {
+        "artificial intelligence": ["ai", "aiml", "reinforcement learning", "deep learning"],
+        "machine learning": ["ml", "aiml", "deep learning", "reinforcement learning"],
+        "python": ["jupyter notebook", "google collab", "flask", "jupyter"],
+        "javascript": ["react", "ajax"]
+    }
+    logger.debug(f"Evaluating proficiency for skill: {skill}")
+    for exp in work_experience:
+        combined = (str(exp.get("Title", "")) + " " + str(exp.get("Description", "")) + " " + str(exp.get("Technologies", ""))).lower()
+        skill_found = False
+        if skill_lower in combined:
+            score += 2
+            skill_found = True
+            logger.debug(f"Skill '{skill}' found in work experience: +2 (Score: {score})")
+        for related_term in related_terms.get(skill_lower, []):
+            if related_term in combined:
+                score += 2
+                skill_found = True
+                logger.debug(f"Related term '{related_term}' for skill '{skill}' found in work experience: +2 (Score: {score})")
+                break
+        if skill_found and any(kw in combined for kw in strong_keywords):
+            score += 2
+            logger.debug(f"Strong keyword found for '{skill}' in work experience: +2 (Score: {score})")
+        if combined.count(skill_lower) >= 2:
+            score += 1
+            logger.debug(f"Multiple mentions of '{skill}' in work experience: +1 (Score: {score})")
+    for proj in projects:
+        proj_text = (str(proj.get("Title", "")) + " " + str(proj.get("Description", "")) + " " + str(proj.get("Technologies", ""))).lower()
+        skill_found = False
+        if skill_lower in proj_text:
+            score += 2
+            skill_found = True
+            logger.debug(f"Skill '{skill}' found in projects: +2 (Score: {score})")
+        for related_term in related_terms.get(skill_lower, []):
+            if related_term in proj_text:
+                score += 2
+                skill_found = True
+                logger.debug(f"Related term '{related_term}' for skill '{skill}' found in projects: +2 (Score: {score})")
+                break
+        if skill_found and any(kw in proj_text for kw in strong_keywords):
+            score += 2
+            logger.debug(f"Strong keyword found in project for '{skill}': +2 (Score: {score})")
+        if proj_text.count(skill_lower) >= 2:
+            score += 1
+            logger.debug(f"Multiple mentions of '{skill}' in projects: +1 (Score: {score})")
+    for edu in education:
+        edu_text = (str(edu.get("Degree", "")) + " " + str(edu.get("Institution", ""))).lower()
+        skill_found = False
+        if skill_lower in edu_text:
+            score += 1
+            skill_found = True
+            logger.debug(f"Skill '{skill}' found in education: +1 (Score: {score})")
+        for related_term in related_terms.get(skill_lower, []):
+            if related_term in edu_text:
+                score += 1
+                skill_found = True
+                logger.debug(f"Related term '{related_term}' for skill '{skill}' found in education: +1 (Score: {score})")
+                break
+        if skill_found and "certification" in edu_text:
+            score += 2
+            logger.debug(f"Certification mention for '{skill}' in education: +2 (Score: {score})")
+    if score >= 5:
+        proficiency = 8
+        logger.debug(f"Final proficiency for '{skill}': Advanced (8) with score {score}")
+    elif score >= 2:
+        proficiency = 6
+        logger.debug(f"Final proficiency for '{skill}': Intermediate (6) with score {score}")
+    else:
+        proficiency = 4
+        logger.debug(f"Final proficiency for '{skill}': Beginner (4) with score {score}")
+    return proficiency
+
+
+def text(rng, n, skill_share=0.08):
+    words = [rng.choice(SKILLS) if rng.random() < skill_share else rng.choice(FILLER) for _ in range(n)]
+    return " ".join(w.lower() if rng.random() < 0.5 else w for w in words)
+
+
+def make_resume(rng, num_skills):
+    skills = rng.sample(SKILLS, min(num_skills, len(SKILLS)))
+    work = [{"Title": text(rng, 3), "Description": text(rng, 40), "Technologies": ", ".join(rng.sample(skills, 2))}
+            for _ in range(rng.randint(2, 6))]
+    projects = [{"Title": text(rng, 4), "Description": text(rng, 30), "Technologies": ", ".join(rng.sample(skills, 2))}
+                for _ in range(rng.randint(2, 8))]
+    education = [{"Degree": text(rng, 4), "Institution": text(rng, 3)} for _ in range(rng.randint(1, 3))]
+    return skills, work, education, projects
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skills", type=int, default=60)
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--debug-logging", action="store_true",
+                        help="legacy with DEBUG enabled, as candidate.py configured it (output discarded)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.debug_logging:
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = False
+
+    rng = random.Random(args.seed)
+    resumes = [make_resume(rng, args.skills) for _ in range(args.resumes)]
+
+    started = time.perf_counter()
+    legacy = [{s.lower(): legacy_infer_proficiency(s, w, e, p) for s in skills} for skills, w, e, p in resumes]
+    legacy_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = [infer_proficiencies(skills, w, e, p) for skills, w, e, p in resumes]
+    batched_time = time.perf_counter() - started
+
+    mismatches = sum(1 for a, b in zip(legacy, batched) for s in a if a[s] != b[s])
+    levels = {}
+    for scores in batched:
+        for value in scores.values():
+            levels[value] = levels.get(value, 0) + 1
+    print(f"{args.resumes} resumes x {args.skills} skills, proficiency levels {dict(sorted(levels.items()))}")
+    print(f"     legacy: {legacy_time / args.resumes * 1000:7.3f} ms per resume")
+    print(f"    batched: {batched_time / args.resumes * 1000:7.3f} ms per resume "
+          f"({legacy_time / batched_time:.1f}x)")
+    print(f"mismatching scores: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Start latency and memory of 1,000 concurrent assessment sessions, before and after the shared question bank.
+
+Run from backend/:
+    python -m benchmarks.bench_question_bank --question-dir ../question_batches --sessions 1000
+
+Each mode runs in its own interpreter so the RSS numbers do not bleed into each other.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from app.services.question_bank import BAND_ORDER, QuestionBank
+
+SKILLS = ["Machine_Learning", "Data_Science"]
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def legacy_load_question_bank(question_dir):
+    # Verbatim copy of the per-attempt loader that start_assessment_session used to call
+    bank = {band: {} for band in BAND_ORDER}
+    for fname in os.listdir(question_dir):
+        if fname.endswith(".json"):
+            parts = fname[:-5].split("_")
+            skill = "_".join(parts[:-1])
+            band = parts[-1]
+            with open(os.path.join(question_dir, fname), "r") as f:
+                questions = json.load(f)
+            if skill not in bank[band]:
+                bank[band][skill] = []
+            random.shuffle(questions)
+            bank[band][skill].extend(questions)
+    return bank
+
+
+def run_mode(mode, question_dir, sessions):
+    states = {}
+    bank = None
+    rss_before = rss_bytes()
+    latencies = []
+    for attempt_id in range(sessions):
+        started = time.perf_counter()
+        if mode == "before":
+            states[attempt_id] = {'question_bank': legacy_load_question_bank(question_dir), 'asked_questions': []}
+        else:
+            if bank is None:
+                bank = QuestionBank.from_directory(question_dir)
+            states[attempt_id] = {
+                'bank_seed': random.getrandbits(32),
+                'bank_cursor': {skill: {band: 0 for band in BAND_ORDER} for skill in SKILLS},
+                'asked_questions': [],
+            }
+        latencies.append(time.perf_counter() - started)
+    rss_after = rss_bytes()
+    latencies.sort()
+    return {
+        'mode': mode,
+        'sessions': sessions,
+        'mean_start_ms': 1000 * sum(latencies) / len(latencies),
+        'p99_start_ms': 1000 * latencies[int(0.99 * (len(latencies) - 1))],
+        'rss_growth_mb': (rss_after - rss_before) / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--question-dir", default="../question_batches")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--mode", choices=["before", "after"])
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.question_dir, args.sessions)))
+        return
+
+    for mode in ("before", "after"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_question_bank", "--mode", mode,
+             "--question-dir", args.question_dir, "--sessions", str(args.sessions)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(out)
+        print(f"{result['mode']:>6}: {result['sessions']} sessions | "
+              f"start mean {result['mean_start_ms']:.3f} ms, p99 {result['p99_start_ms']:.3f} ms | "
+              f"RSS growth {result['rss_growth_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
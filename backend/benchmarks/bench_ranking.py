@@ -0,0 +1,212 @@
+"""Ranking the candidates registered for a job: the per-candidate loop (legacy) vs candidate_rankings.
+
+Run from backend/:
+    python -m benchmarks.bench_ranking --candidates 100000 --skills 10
+    python -m benchmarks.bench_ranking --database-url postgresql://... --job-id 1 --no-seed
+
+Defaults to a throwaway SQLite file seeded with one job, --skills required skills and
+--candidates registered candidates. Times materialising the job's candidate_rankings
+(refresh_job_rankings) and reading the whole ranking back from it (iter_ranking), and checks
+that every candidate gets the same scores and description as from the legacy loop, with the
+same sequence of total scores down the ranking (candidates tied on the rounded score may be
+ordered differently).
+
+Then times reading single ranking pages, the path the recruiter endpoint takes; compare runs
+with different --candidates to see that page reads do not grow with the pool.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import and_, insert
+
+from app import db
+from app.models.assessment_registration import AssessmentRegistration
+from app.models.candidate import Candidate
+from app.models.candidate_ranking import CandidateRanking
+from app.models.candidate_skill import CandidateSkill
+from app.models.job import JobDescription
+from app.models.required_skill import RequiredSkill
+from app.models.skill import Skill
+from app.models.user import User  # noqa: F401 (mapper relationships)
+from app.services.ranking import (iter_ranking, load_ranking_inputs, ranked_page, refresh_job_rankings,
+                                  score_candidates)
+
+
+def seed(rng, candidates, skills):
+    db.session.execute(insert(JobDescription), [{
+        "job_id": 1, "recruiter_id": 1, "job_title": "Benchmark job", "company": "X", "experience_min": 2,
+        "experience_max": 7, "duration": 30, "num_questions": 20, "schedule": datetime.utcnow()
+    }])
+    db.session.execute(insert(Skill), [{"skill_id": i, "name": f"Skill {i}"} for i in range(1, skills * 3 + 1)])
+    db.session.execute(insert(RequiredSkill), [{"job_id": 1, "skill_id": i, "priority": rng.randint(1, 5)}
+                                              for i in range(1, skills + 1)])
+    rows, skill_rows = [], []
+    for i in range(1, candidates + 1):
+        rows.append({"candidate_id": i, "name": f"Candidate {i}", "email": f"c{i}@example.com",
+                     "years_of_experience": rng.choice([rng.randint(0, 12), round(rng.uniform(0, 12), 1)])})
+        for skill_id in rng.sample(range(1, skills * 3 + 1), rng.randint(0, skills)):
+            skill_rows.append({"candidate_id": i, "skill_id": skill_id, "proficiency": rng.choice([4, 6, 8])})
+    for start in range(0, len(rows), 10000):
+        db.session.execute(insert(Candidate), rows[start:start + 10000])
+        db.session.execute(insert(AssessmentRegistration),
+                           [{"candidate_id": r["candidate_id"], "job_id": 1} for r in rows[start:start + 10000]])
+    for start in range(0, len(skill_rows), 10000):
+        db.session.execute(insert(CandidateSkill), skill_rows[start:start + 10000])
+    db.session.commit()
+
+
+def legacy_rank(job_id):
+    # Verbatim scoring from the get_ranked_candidates this replaced
+    job = JobDescription.query.get_or_404(job_id)
+    registrations = AssessmentRegistration.query.filter_by(job_id=job_id).all()
+    candidate_ids = [r.candidate_id for r in registrations]
+    candidates = Candidate.query.filter(Candidate.candidate_id.in_(candidate_ids)).all()
+    required_skills = RequiredSkill.query.filter_by(job_id=job_id).all()
+    required_skill_dict = {rs.skill_id: rs.priority for rs in required_skills}
+    candidate_skills = CandidateSkill.query.filter(
+        and_(CandidateSkill.candidate_id.in_(candidate_ids), CandidateSkill.skill_id.in_(required_skill_dict.keys()))
+    ).all()
+    candidate_skill_map = {}
+    for cs in candidate_skills:
+        if cs.candidate_id not in candidate_skill_map:
+            candidate_skill_map[cs.candidate_id] = {}
+        candidate_skill_map[cs.candidate_id][cs.skill_id] = cs.proficiency
+    max_proficiency = 8
+    max_skill_score = sum(required_skill_dict.values()) * max_proficiency
+    ranked_candidates = []
+    for candidate in candidates:
+        skill_score = 0
+        matched_skills = []
+        for skill_id, priority in required_skill_dict.items():
+            proficiency = candidate_skill_map.get(candidate.candidate_id, {}).get(skill_id, 0)
+            if proficiency > 0:
+                skill_name = Skill.query.get(skill_id).name
+                matched_skills.append(f"{skill_name} (Proficiency: {proficiency})")
+                skill_score += priority * proficiency
+        skill_score_normalized = skill_score / max_skill_score if max_skill_score > 0 else 0
+        exp_midpoint = (job.experience_min + job.experience_max) / 2
+        exp_range = job.experience_max - job.experience_min
+        exp_diff = abs(candidate.years_of_experience - exp_midpoint)
+        exp_score = max(0, 1 - (exp_diff / (exp_range / 2))) if exp_range > 0 else 1
+        total_score = (0.7 * skill_score_normalized) + (0.3 * exp_score)
+        description = f"{candidate.name} is ranked based on "
+        if matched_skills:
+            description += f"strong skills in {', '.join(matched_skills)}"
+        else:
+            description += "limited skill matches"
+        description += f" and {candidate.years_of_experience} years of experience, which "
+        if exp_diff < 0.5:
+            description += "closely matches"
+        elif exp_diff < 1.5:
+            description += "reasonably matches"
+        else:
+            description += "is outside"
+        description += f" the job's {job.experience_min}-{job.experience_max} year requirement."
+        ranked_candidates.append({
+            'candidate_id': candidate.candidate_id, 'name': candidate.name, 'email': candidate.email,
+            'total_score': round(total_score, 2), 'skill_score': round(skill_score_normalized, 2),
+            'experience_score': round(exp_score, 2), 'description': description
+        })
+    ranked_candidates.sort(key=lambda x: x['total_score'], reverse=True)
+    for i, candidate in enumerate(ranked_candidates, 1):
+        candidate['rank'] = i
+    return ranked_candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--candidates", type=int, default=100000)
+    parser.add_argument("--skills", type=int, default=10)
+    parser.add_argument("--job-id", type=int, default=1)
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--skip-legacy", action="store_true", help="the legacy loop takes ~1 min at 100k")
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    db.init_app(app)
+
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            for model in (JobDescription, Skill, RequiredSkill, Candidate, AssessmentRegistration, CandidateSkill,
+                          CandidateRanking):
+                model.__table__.create(db.engine, checkfirst=True)
+        if not args.no_seed:
+            seed(random.Random(args.seed), args.candidates, args.skills)
+        job = db.session.get(JobDescription, args.job_id)
+
+        legacy, legacy_time = None, 0.0
+        if not args.skip_legacy:
+            started = time.perf_counter()
+            legacy = legacy_rank(args.job_id)
+            legacy_time = time.perf_counter() - started
+            db.session.expunge_all()
+            job = db.session.get(JobDescription, args.job_id)
+
+        # Materialised candidate_rankings: one full refresh, then the whole ranking read back in order
+        started = time.perf_counter()
+        refresh_job_rankings(args.job_id)
+        db.session.commit()
+        refresh_time = time.perf_counter() - started
+        started = time.perf_counter()
+        ranked = list(iter_ranking(job))
+        export_time = time.perf_counter() - started
+
+        # Where the refresh time goes: loading rows, the NumPy scoring itself, and everything else (upsert)
+        started = time.perf_counter()
+        candidates, required, proficiency = load_ranking_inputs(args.job_id)
+        load_time = time.perf_counter() - started
+        years = np.array([c.years_of_experience for c in candidates], dtype=np.float64)
+        priorities = np.array([priority for _, priority, _ in required], dtype=np.int64)
+        started = time.perf_counter()
+        score_candidates(job, years, proficiency, priorities)
+        score_time = time.perf_counter() - started
+
+        print(f"{len(ranked)} candidates, {args.skills} required skills")
+        if legacy is not None:
+            print(f"           legacy loop: {legacy_time * 1000:8.1f} ms")
+        print(f"  refresh_job_rankings: {refresh_time * 1000:8.1f} ms")
+        print(f"    of which: loading {load_time * 1000:.1f} ms, scoring {score_time * 1000:.1f} ms, "
+              f"storing {(refresh_time - load_time - score_time) * 1000:.1f} ms")
+        print(f"  iter_ranking (all):   {export_time * 1000:8.1f} ms")
+        if legacy is not None:
+            print(f"  refresh + full read:  {(refresh_time + export_time) / legacy_time * 100:.0f}% of the legacy loop")
+            score_mismatches = sum(
+                1 for a, b in zip(sorted(legacy, key=lambda r: r['candidate_id']),
+                                  sorted(ranked, key=lambda r: r['candidate_id']))
+                if (a['candidate_id'], a['total_score'], a['skill_score'], a['experience_score'], a['description'])
+                != (b['candidate_id'], b['total_score'], b['skill_score'], b['experience_score'], b['description'])
+            )
+            rank_mismatches = sum(1 for a, b in zip(legacy, ranked)
+                                  if (a['total_score'], a['rank']) != (b['total_score'], b['rank']))
+            print(f"rows differing: {score_mismatches} in scores or description, {rank_mismatches} in score at rank "
+                  f"(of {len(legacy)} / {len(ranked)})")
+
+        # Single pages, as the endpoint reads them
+        by_id = {row['candidate_id']: row for row in ranked}
+        page_times, page_mismatches, cursor = [], 0, None
+        for _ in range(20):
+            started = time.perf_counter()
+            page, cursor = ranked_page(job, cursor=cursor, limit=args.page_size)
+            page_times.append(time.perf_counter() - started)
+            page_mismatches += sum(1 for row in page if {k: v for k, v in row.items() if k != 'rank'}
+                                   != {k: v for k, v in by_id[row['candidate_id']].items() if k != 'rank'})
+            if not cursor:
+                break
+        print(f"ranked_page ({args.page_size} rows): first {page_times[0] * 1000:.1f} ms, "
+              f"median of {len(page_times)} pages {sorted(page_times)[len(page_times) // 2] * 1000:.1f} ms, "
+              f"rows differing from the full ranking: {page_mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Saving a resume's skills: the old per-skill lookups vs persist_candidate_skills, by statement count.
+
+Run from backend/:
+    python -m benchmarks.bench_skill_upsert --skills 50
+    python -m benchmarks.bench_skill_upsert --database-url postgresql://... --candidate-id 1
+
+Defaults to a throwaway SQLite file. Against Postgres, point --candidate-id at an existing
+candidate (the foreign key is enforced there); the benchmark's skills are deleted afterwards.
+
+Exits non-zero if persist_candidate_skills issues more than MAX_STATEMENTS statements, or a
+number that grows with the skill count, or leaves different rows than the per-skill loop.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask
+from sqlalchemy import event
+
+from app import db
+from app.models.assessment_registration import AssessmentRegistration
+from app.models.candidate import Candidate  # noqa: F401 (foreign key target)
+from app.models.candidate_ranking import CandidateRanking
+from app.models.candidate_skill import CandidateSkill
+from app.models.job import JobDescription
+from app.models.required_skill import RequiredSkill  # noqa: F401 (mapper relationships)
+from app.models.skill import Skill
+from app.models.user import User  # noqa: F401
+from app.services.resume_pipeline import persist_candidate_skills
+
+# IN lookup, INSERT ... ON CONFLICT DO NOTHING RETURNING, upsert (+1 lookup when another upload races),
+# then refresh_candidate_rankings: stale-row delete and registered-jobs lookup (no registrations here)
+MAX_STATEMENTS = 6
+
+
+def legacy_persist(candidate_id, scored_skills):
+    # What update_profile did for every skill Gemini returned
+    for skill_name, proficiency in scored_skills:
+        skill = Skill.query.filter_by(name=skill_name).first()
+        if not skill:
+            skill = Skill(name=skill_name, category='technical')
+            db.session.add(skill)
+            db.session.flush()
+        existing_skill = CandidateSkill.query.filter_by(candidate_id=candidate_id, skill_id=skill.skill_id).first()
+        if existing_skill:
+            existing_skill.proficiency = proficiency
+        else:
+            db.session.add(CandidateSkill(candidate_id=candidate_id, skill_id=skill.skill_id, proficiency=proficiency))
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def scored(prefix, skills, known, proficiency):
+    # Half the skills already exist (from another candidate), half are new; one duplicate name
+    names = [f"{prefix} known {i}" for i in range(known)] + [f"{prefix} new {i}" for i in range(skills - known)]
+    return [(name, proficiency) for name in names] + [(names[0], proficiency)]
+
+
+def candidate_rows(candidate_id, prefix):
+    return sorted(
+        (name, proficiency) for name, proficiency in db.session.query(Skill.name, CandidateSkill.proficiency)
+        .join(CandidateSkill, CandidateSkill.skill_id == Skill.skill_id)
+        .filter(CandidateSkill.candidate_id == candidate_id, Skill.name.like(f"{prefix} %"))
+    )
+
+
+def run(fn, label, candidate_id, skills, counter):
+    # First upload creates everything it needs; the re-upload updates every proficiency
+    prefix = f"bench {label} {skills}"
+    db.session.add_all(Skill(name=f"{prefix} known {i}", category="technical") for i in range(skills // 2))
+    db.session.commit()
+    counts, started = [], time.perf_counter()
+    for proficiency in (4, 8):
+        before = counter.count
+        fn(candidate_id, scored(prefix, skills, skills // 2, proficiency))
+        db.session.commit()
+        counts.append(counter.count - before)
+    elapsed = time.perf_counter() - started
+    rows = [(name.split(" ", 3)[3], proficiency) for name, proficiency in candidate_rows(candidate_id, prefix)]
+    return counts, elapsed, rows, prefix
+
+
+def cleanup(candidate_id, prefixes):
+    for prefix in prefixes:
+        skill_ids = [s for (s,) in db.session.query(Skill.skill_id).filter(Skill.name.like(f"{prefix} %"))]
+        CandidateSkill.query.filter(CandidateSkill.candidate_id == candidate_id,
+                                    CandidateSkill.skill_id.in_(skill_ids)).delete(synchronize_session=False)
+        Skill.query.filter(Skill.skill_id.in_(skill_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--skills", type=int, default=50)
+    parser.add_argument("--candidate-id", type=int, default=1)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    db.init_app(app)
+
+    failures = []
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            for model in (Skill, CandidateSkill, JobDescription, AssessmentRegistration, CandidateRanking):
+                model.__table__.create(db.engine, checkfirst=True)
+        counter = StatementCounter(db.engine)
+        prefixes = []
+        try:
+            batched_counts = {}
+            for skills in sorted({5, args.skills}):
+                legacy = run(legacy_persist, "legacy", args.candidate_id, skills, counter)
+                batched = run(persist_candidate_skills, "batched", args.candidate_id, skills, counter)
+                prefixes += [legacy[3], batched[3]]
+                for label, (counts, elapsed, _, _) in (("per skill", legacy), ("batched", batched)):
+                    print(f"{skills:4d} skills, {label:>9}: statements {counts[0]:4d} first upload, "
+                          f"{counts[1]:4d} re-upload, {elapsed * 1000:8.1f} ms")
+                if legacy[2] != batched[2]:
+                    failures.append(f"{skills} skills: rows differ from the per-skill loop")
+                if max(batched[0]) > MAX_STATEMENTS:
+                    failures.append(f"{skills} skills: {max(batched[0])} statements (max {MAX_STATEMENTS})")
+                batched_counts[skills] = tuple(batched[0])
+            if len(set(batched_counts.values())) > 1:
+                failures.append(f"statement count depends on the skill count: {batched_counts}")
+        finally:
+            db.session.rollback()
+            cleanup(args.candidate_id, prefixes)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
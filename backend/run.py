@@ -1,8 +1,16 @@
+import os
 from app import create_app
 from dotenv import load_dotenv
 load_dotenv()
 
-app = create_app()
+# Run directly, this is the debug server: say so before the app is built, so that only the reloader's
+# serving child migrates and starts job workers (see app.runs_startup_work)
+if __name__ == "__main__":
+    os.environ["FLASK_DEBUG"] = "1"
+
+# Spawned helper processes (the PDF extraction pool) import this file again as __mp_main__; they need no app
+if __name__ != "__mp_main__":
+    app = create_app()
 
 if __name__ == "__main__":
     app.run(debug=True)
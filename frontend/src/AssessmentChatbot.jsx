@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 
 const AssessmentChatbot = () => {
@@ -12,6 +12,8 @@ const AssessmentChatbot = () => {
   const [isAssessmentComplete, setIsAssessmentComplete] = useState(false);
   const [candidateReport, setCandidateReport] = useState(null);
   const [timeLeft, setTimeLeft] = useState(null);
+  // Successor questions sent ahead by the server, keyed by their opaque handle
+  const prefetchedRef = useRef({});
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -46,23 +48,33 @@ const AssessmentChatbot = () => {
     return () => clearInterval(timer);
   }, [attemptId]);
 
+  const showNextQuestion = (data) => {
+    if (data.message === 'Assessment completed') {
+      setIsAssessmentComplete(true);
+      setCandidateReport(data.candidate_report);
+      endAssessment();
+    } else {
+      // The server omits the question body when we already hold it as a prefetched successor
+      const prefetched = prefetchedRef.current[data.handle];
+      setCurrentQuestion(data.question || (prefetched && prefetched.question));
+      setSkill(data.skill);
+      setQuestionNumber(data.question_number);
+      prefetchedRef.current = {};
+      Object.values(data.prefetch || {}).forEach((successor) => {
+        if (successor) prefetchedRef.current[successor.handle] = successor;
+      });
+    }
+  };
+
   const fetchNextQuestion = () => {
-    fetch(`http://localhost:5000/api/assessment/next-question/${attemptId}`, {
+    fetch(`http://localhost:5000/api/assessment/next-question/${attemptId}?prefetch=1`, {
       method: 'GET',
       headers: { 'Content-Type': 'application/json' },
     })
       .then((response) => response.json())
       .then((data) => {
-        if (data.message === 'Assessment completed') {
-          setIsAssessmentComplete(true);
-          setCandidateReport(data.candidate_report);
-          endAssessment();
-        } else {
-          setCurrentQuestion(data.question);
-          setSkill(data.skill);
-          setQuestionNumber(data.question_number);
-          setMessage('');
-        }
+        showNextQuestion(data);
+        setMessage('');
       })
       .catch((error) => {
         console.error('Error fetching next question:', error);
@@ -75,20 +87,22 @@ const AssessmentChatbot = () => {
     if (!userAnswer) return;
 
     const startTime = Date.now();
-    fetch(`http://localhost:5000/api/assessment/submit-answer/${attemptId}`, {
+    // Grade the answer and get the next question in a single round trip
+    fetch(`http://localhost:5000/api/assessment/submit-and-next/${attemptId}`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({
         skill: skill,
         answer: userAnswer,
         time_taken: (Date.now() - startTime) / 1000, // Time in seconds
+        prefetch_handles: Object.keys(prefetchedRef.current),
       }),
     })
       .then((response) => response.json())
       .then((data) => {
         setMessage(data.feedback);
         setUserAnswer('');
-        fetchNextQuestion();
+        showNextQuestion(data);
       })
       .catch((error) => {
         console.error('Error submitting answer:', error);
@@ -1,19 +1,26 @@
 import React, { useState, useEffect } from 'react';
-import { Link, useNavigate } from 'react-router-dom';
+import { Link, useLocation, useNavigate } from 'react-router-dom';
 import Modal from 'react-modal';
 
 // Bind modal to your appElement (for accessibility)
 Modal.setAppElement('#root');
 
+// Proficiency levels assigned by the resume analysis (see infer_proficiency)
+const PROFICIENCY_LABELS = { 4: 'Beginner', 6: 'Intermediate', 8: 'Advanced' };
+
 const CandidateDashboard = () => {
   const [candidate, setCandidate] = useState(null);
   const [assessments, setAssessments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [selectedAssessment, setSelectedAssessment] = useState(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [errorMessage, setErrorMessage] = useState('');
+  const [resumeStatus, setResumeStatus] = useState(null);
   const navigate = useNavigate();
+  const location = useLocation();
+  const resumeStatusUrl = location.state?.resumeStatusUrl;
 
-  useEffect(() => {
+  const fetchCandidate = () =>
     // Fetch candidate data (mocked candidate_id=1 for now)
     fetch('http://localhost:5000/api/candidate/profile/1')
       .then((response) => response.json())
@@ -25,12 +32,49 @@ const CandidateDashboard = () => {
       })
       .catch((error) => console.error('Error fetching candidate:', error));
 
-    // Fetch eligible assessments
-    fetch('http://localhost:5000/api/candidate/eligible-assessments/1')
+  useEffect(() => {
+    fetchCandidate();
+
+    fetchAssessments();
+  }, [navigate]);
+
+  const fetchAssessments = (cursor = null) => {
+    // Eligible assessments come a page at a time; next_cursor is null on the last page
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    fetch(`http://localhost:5000/api/candidate/eligible-assessments/1${query}`)
       .then((response) => response.json())
-      .then((data) => setAssessments(data))
+      .then((data) => {
+        setAssessments((previous) => (cursor ? [...previous, ...data.assessments] : data.assessments));
+        setNextCursor(data.next_cursor);
+      })
       .catch((error) => console.error('Error fetching assessments:', error));
-  }, [navigate]);
+  };
+
+  useEffect(() => {
+    // Poll the resume analysis job started by CompleteProfile, then reload the profile to show the skills
+    if (!resumeStatusUrl) return;
+    let timer;
+    let cancelled = false;
+    const poll = () => {
+      fetch(`http://localhost:5000${resumeStatusUrl}`)
+        .then((response) => response.json())
+        .then((job) => {
+          if (cancelled) return;
+          setResumeStatus(job);
+          if (job.status === 'completed') {
+            fetchCandidate();
+          } else if (job.status !== 'failed') {
+            timer = setTimeout(poll, 2000);
+          }
+        })
+        .catch((error) => console.error('Error fetching resume status:', error));
+    };
+    poll();
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [resumeStatusUrl]);
 
   const handleStartAssessment = (assessment) => {
     const scheduleTime = new Date(assessment.schedule);
@@ -130,6 +174,36 @@ const CandidateDashboard = () => {
         </div>
       )}
 
+      {resumeStatus && resumeStatus.status !== 'completed' && (
+        <div
+          className={`p-4 mb-6 border-l-4 ${
+            resumeStatus.status === 'failed'
+              ? 'bg-red-100 border-red-500 text-red-700'
+              : 'bg-blue-100 border-blue-500 text-blue-700'
+          }`}
+          role="status"
+        >
+          <p>
+            {resumeStatus.status === 'failed'
+              ? resumeStatus.error || 'We could not analyse your resume.'
+              : 'Analysing your resume to extract your skills...'}
+          </p>
+        </div>
+      )}
+
+      {candidate.skills && candidate.skills.length > 0 && (
+        <div className="mb-6">
+          <h2 className="text-2xl font-semibold mb-2">Your Skills</h2>
+          <div className="flex flex-wrap gap-2">
+            {candidate.skills.map((skill) => (
+              <span key={skill.name} className="bg-gray-100 text-gray-700 px-3 py-1 rounded-full">
+                {skill.name} · {PROFICIENCY_LABELS[skill.proficiency] || skill.proficiency}
+              </span>
+            ))}
+          </div>
+        </div>
+      )}
+
       {!candidate.is_profile_complete ? (
         <div className="bg-yellow-100 border-l-4 border-yellow-500 text-yellow-700 p-4 mb-6" role="alert">
           <p>Please complete your profile to access assessments.</p>
@@ -161,6 +235,14 @@ const CandidateDashboard = () => {
           ) : (
             <p className="text-gray-600">No assessments available at the moment.</p>
           )}
+          {nextCursor && (
+            <button
+              onClick={() => fetchAssessments(nextCursor)}
+              className="text-blue-500 hover:underline mt-4"
+            >
+              Load more assessments
+            </button>
+          )}
         </>
       )}
 
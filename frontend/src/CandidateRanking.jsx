@@ -7,15 +7,24 @@ const CandidateRanking = () => {
   const [error, setError] = useState('');
   const navigate = useNavigate();
 
-  useEffect(() => {
-    // Fetch ranked candidates
-    fetch(`http://localhost:5000/api/recruiter/candidates/${jobId}`)
+  const fetchRankings = (cursor = null) => {
+    // Ranked candidates come a page at a time; next_cursor is null on the last page
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    fetch(`http://localhost:5000/api/recruiter/candidates/${jobId}${query}`)
       .then((response) => response.json())
-      .then((data) => setRankingData(data))
+      .then((data) =>
+        setRankingData((previous) =>
+          cursor && previous ? { ...data, candidates: [...previous.candidates, ...data.candidates] } : data
+        )
+      )
       .catch((error) => {
         console.error('Error fetching candidates:', error);
         setError('Failed to load candidate rankings.');
       });
+  };
+
+  useEffect(() => {
+    fetchRankings();
   }, [jobId]);
 
   if (!rankingData) return <div>Loading...</div>;
@@ -51,6 +60,20 @@ const CandidateRanking = () => {
               </div>
             ))}
           </div>
+          {rankingData.next_cursor && (
+            <button
+              onClick={() => fetchRankings(rankingData.next_cursor)}
+              className="mt-6 mr-4 text-blue-500 hover:underline"
+            >
+              Load more candidates
+            </button>
+          )}
+          <a
+            href={`http://localhost:5000/api/recruiter/candidates/${jobId}/export?format=csv`}
+            className="mt-6 mr-4 text-blue-500 hover:underline"
+          >
+            Export all (CSV)
+          </a>
           <button
             onClick={() => navigate('/recruiter/dashboard')}
             className="mt-6 bg-blue-500 text-white px-4 py-2 rounded hover:bg-blue-600"
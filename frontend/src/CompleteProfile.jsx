@@ -62,8 +62,11 @@ const CompleteProfile = () => {
         body: data,
       });
       const result = await response.json();
-      if (response.ok) {
-        setMessage({ text: 'Profile updated successfully! Skills have been extracted from your resume.', type: 'success' });
+      if (response.status === 202) {
+        // Resume analysis runs in the background; the dashboard shows the skills once it finishes
+        navigate('/candidate/dashboard', { state: { resumeStatusUrl: result.status_url } });
+      } else if (response.ok) {
+        setMessage({ text: 'Profile updated successfully!', type: 'success' });
         navigate('/candidate/dashboard');
       } else {
         setMessage({ text: result.error || 'An error occurred while updating your profile.', type: 'error' });